@@ -0,0 +1,191 @@
+# batch_eval.py
+"""
+녹음 파일 여러 개를 오프라인으로 일괄 평가 (google_evaluate_text)
+
+입력: 디렉터리 / glob 패턴 / JSONL 매니페스트(.jsonl) 를 섞어서 여러 개 지정 가능
+  - 매니페스트 한 줄: {"path": "a.m4a", "prev_report": "...", "id": "선택"}
+결과: --out JSONL 에 파일 하나 끝날 때마다 한 줄씩 기록 (체크포인트)
+  - 다시 실행하면 이미 성공한 파일은 내용 해시(sha256)로 건너뜀 → 중단된 작업 이어서 처리
+  - 실패(failed)와 Report 로 변환하지 못한 응답(parse_failed)은 다시 실행할 때 재시도
+
+사용법:
+  python batch_eval.py recordings/ --out results.jsonl
+  python batch_eval.py "recordings/**/*.m4a" manifest.jsonl --workers 8 --out results.jsonl
+"""
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from gemini_service import google_evaluate_text
+from core.metrics import percentile
+from core.report_schema import parse_report, ReportParseError
+
+AUDIO_EXTS = {".m4a", ".mp4", ".mp3", ".wav", ".ogg", ".oga", ".flac", ".aac", ".webm"}
+
+
+def iter_inputs(specs: List[str], default_prev: str) -> Iterator[Dict]:
+    """디렉터리/glob/매니페스트 → {"path", "prev_report", "id"}"""
+    for spec in specs:
+        if spec.endswith(".jsonl") and os.path.isfile(spec):
+            base = os.path.dirname(os.path.abspath(spec))
+            with open(spec, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    row = json.loads(line)
+                    path = row["path"] if os.path.isabs(row["path"]) else os.path.join(base, row["path"])
+                    yield {"path": path, "prev_report": row.get("prev_report", default_prev), "id": row.get("id")}
+        elif os.path.isdir(spec):
+            for root, _, names in os.walk(spec):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTS:
+                        yield {"path": os.path.join(root, name), "prev_report": default_prev, "id": None}
+        else:
+            for path in sorted(glob.glob(spec, recursive=True)):
+                if os.path.isfile(path):
+                    yield {"path": path, "prev_report": default_prev, "id": None}
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """이미 성공한 파일의 sha256 목록"""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 중단 시 잘린 마지막 줄
+            if row.get("status") == "ok":
+                done.add(row["sha256"])
+    return done
+
+
+def audio_mime(path: str) -> str:
+    ctype, _ = mimetypes.guess_type(path)
+    return ctype if ctype and ctype.startswith("audio/") else "audio/mp4"
+
+
+class BatchRunner:
+    def __init__(self, out_path: str, workers: int):
+        self.out_path = out_path
+        self.workers = workers
+        self.done = load_checkpoint(out_path)
+        self._claimed: Set[str] = set()  # 이번 실행에서 이미 맡은 해시 (같은 내용 파일 중복 방지)
+        self._lock = threading.Lock()
+        self._out = open(out_path, "a", encoding="utf-8")
+        self.latencies: List[float] = []
+        self.counts = {"ok": 0, "failed": 0, "parse_failed": 0, "skipped": 0}
+
+    def _write(self, row: Dict) -> None:
+        with self._lock:
+            self._out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self._out.flush()
+            os.fsync(self._out.fileno())
+
+    def _count(self, key: str, latency: Optional[float] = None) -> None:
+        with self._lock:
+            self.counts[key] += 1
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def evaluate(self, item: Dict) -> str:
+        path = item["path"]
+        with open(path, "rb") as f:
+            audio = f.read()
+        sha = hashlib.sha256(audio).hexdigest()
+
+        with self._lock:
+            if sha in self.done or sha in self._claimed:
+                self.counts["skipped"] += 1
+                return "skipped"
+            self._claimed.add(sha)
+
+        row = {"path": path, "id": item["id"], "sha256": sha, "size": len(audio)}
+        t0 = time.perf_counter()
+        try:
+            result = google_evaluate_text(audio, item["prev_report"], mime_type=audio_mime(path))
+            try:
+                row["report"] = parse_report(result).model_dump()
+                row["status"] = "ok"
+            except ReportParseError as e:
+                # 체크포인트에서 완료로 치지 않음 → 재개 시 다시 평가
+                row["raw"] = getattr(result, "content", result)
+                row["parse_error"] = str(e)
+                row["status"] = "parse_failed"
+        except Exception as e:
+            row["status"] = "failed"
+            row["error"] = f"{type(e).__name__}: {e}"
+        row["elapsed_sec"] = round(time.perf_counter() - t0, 3)
+
+        self._write(row)
+        self._count(row["status"], row["elapsed_sec"])
+        return row["status"]
+
+    def run(self, items: Iterator[Dict]) -> float:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # 동시에 제출하는 작업 수를 workers*2 로 제한 (매니페스트가 커도 메모리 일정)
+            pending = set()
+            for item in items:
+                pending.add(pool.submit(self.evaluate, item))
+                if len(pending) >= self.workers * 2:
+                    finished = next(as_completed(pending))
+                    pending.discard(finished)
+                    self._report(finished)
+            for fut in as_completed(pending):
+                self._report(fut)
+        self._out.close()
+        return time.perf_counter() - t0
+
+    def _report(self, fut) -> None:
+        try:
+            fut.result()
+        except OSError as e:  # 파일 읽기 실패
+            print(f"⚠️ 파일을 읽지 못했습니다: {e}", file=sys.stderr)
+            self._count("failed")
+        total = sum(self.counts.values())
+        if total % 10 == 0:
+            print(f"⏳ {total}개 처리 ({self.counts})", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="녹음 파일 일괄 평가 (체크포인트/재개 지원)")
+    p.add_argument("inputs", nargs="+", help="디렉터리, glob 패턴, 또는 .jsonl 매니페스트")
+    p.add_argument("--out", default="batch_results.jsonl", help="결과/체크포인트 JSONL")
+    p.add_argument("--workers", type=int, default=int(os.getenv("BATCH_EVAL_WORKERS", "4")))
+    p.add_argument("--prev-report", default="", help="매니페스트에 없을 때 쓸 직전 리포트(기본: 없음)")
+    args = p.parse_args(argv)
+
+    runner = BatchRunner(args.out, args.workers)
+    if runner.done:
+        print(f"🔁 체크포인트에서 {len(runner.done)}개 완료 확인, 건너뜀", file=sys.stderr)
+
+    elapsed = runner.run(iter_inputs(args.inputs, args.prev_report))
+
+    failed = runner.counts["failed"] + runner.counts["parse_failed"]
+    evaluated = runner.counts["ok"] + failed
+    lat = runner.latencies
+    print(f"✅ 완료: {runner.counts} / {elapsed:.1f}s", file=sys.stderr)
+    if evaluated:
+        print(f"📊 처리량 {evaluated / elapsed:.2f} files/s | "
+              f"지연 p50 {percentile(lat, 0.5) or 0.0:.2f}s, p95 {percentile(lat, 0.95) or 0.0:.2f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# bench_gemini_transport.py
+"""
+Gemini 오디오 전송 방식별 평가 1건당 메모리 사용량 비교 (네트워크 없이)
+
+- inline: base64 블록 → langchain_google_genai 가 Gemini 요청(Content)으로 변환할 때까지
+- file:   File API 업로드(BytesIO 스트리밍, 가짜 클라이언트) → file_uri 블록 → Content 변환
+
+tracemalloc 으로 google_evaluate_text 호출 동안의 Python 할당 최대치를 재고, 원본 대비 배수와 RSS 증가량 출력.
+
+사용법: python bench_gemini_transport.py [MB ...]   (기본 5 20)
+"""
+import os
+import sys
+import time
+import hashlib
+import tracemalloc
+from types import SimpleNamespace
+
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("LANGSMITH_PROMPT_NAME", "bench")
+
+from langchain_google_genai.chat_models import _parse_chat_history
+
+import gemini_service
+from core import gemini_files
+from core.gemini_files import current_rss_bytes
+
+
+class FakeChain:
+    """LangSmith 체인 대신: 메시지를 Gemini 요청 형식으로 변환만 함"""
+
+    def invoke(self, inputs):
+        _parse_chat_history(inputs["audio_file"], model="gemini-2.5-flash")
+        return "{}"
+
+
+class FakeFiles:
+    def upload(self, file, config):
+        while file.read(1024 * 1024):  # 실제 업로드처럼 조각 단위로 읽기
+            pass
+        return SimpleNamespace(name="files/bench", uri="https://generativelanguage.googleapis.com/v1beta/files/bench",
+                               state="ACTIVE", expiration_time=None, error=None)
+
+
+def run(audio: bytes, transport: str) -> dict:
+    gemini_files.GEMINI_TRANSPORT = transport
+    gemini_files.file_store._refs.clear()
+    rss0 = current_rss_bytes() or 0
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    gemini_service.google_evaluate_text(audio, "", audio_sha256=hashlib.sha256(audio).hexdigest())
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak": peak, "elapsed": elapsed, "rss": (current_rss_bytes() or 0) - rss0}
+
+
+def main():
+    gemini_service.prompt_cache.get = lambda *a, **k: FakeChain()
+    gemini_files.file_store.available = lambda: True
+    gemini_files.file_store._client = SimpleNamespace(files=FakeFiles())
+
+    sizes = [float(x) for x in sys.argv[1:]] or [5, 20]
+    for mb in sizes:
+        audio = os.urandom(int(mb * 1024 * 1024))
+        for transport in ("inline", "file"):
+            r = run(audio, transport)
+            print(f"{mb:5.1f} MB {transport:6}: 할당 최대 {r['peak'] / 2**20:7.1f} MB "
+                  f"(원본 x{r['peak'] / len(audio):4.2f}) | RSS +{r['rss'] / 2**20:6.1f} MB | {r['elapsed'] * 1000:6.1f} ms")
+    print(f"inline 예산: {gemini_files.inline_budget.limit / 2**20:.0f} MB "
+          f"(동시 inline 최대 {gemini_files.inline_budget.peak / 2**20:.1f} MB 사용)")
+
+
+if __name__ == "__main__":
+    main()
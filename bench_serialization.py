@@ -0,0 +1,95 @@
+# bench_serialization.py
+"""
+통화 목록/단건 응답 직렬화 비교 벤치마크.
+
+- 기존 경로: Call.model_validate(doc) → response_model 재검증 → model_dump(mode="json") → json.dumps
+- 빠른 경로: core.fast_json.shape_doc → orjson.dumps
+
+사용법: python bench_serialization.py [건수 ...]   (기본 1000 10000)
+"""
+import sys
+import json
+import time
+import random
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from core.fast_json import shape_docs, _default
+from schema.call import Call, CallBrief
+
+CRITERIA = ["지역", "방문일시", "인사", "적극적 응대", "적극적 세일즈",
+            "용도 및 구매시기", "문의 차량 확인", "결제방법", "차량안내"]
+
+
+def make_doc(i: int) -> dict:
+    turns = [
+        {"turn": t, "text": f"샘플 발화 {t} " * 6, "speaker_role": "agent" if t % 2 else "customer"}
+        for t in range(40)
+    ]
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "agent_id": "agent01",
+        "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i),
+        "call_count": i % 7 + 1,
+        "customer_num": f"010{i:08d}",
+        "customer_name": "홍길동",
+        "url": f"http://example/{i}.m4a",
+        "evaluation_status": "done",
+        "evaluation_attempts": 1,
+        "report": {
+            "overall_score": random.randint(0, 100),
+            "conversation_list": turns,
+            "summary": "요약 " * 30,
+            "keyword": ["중고차", "방문", "결제"],
+            "is_valid": True,
+            "feedback": "피드백 " * 30,
+            "criteria": {
+                k: {"score": random.randint(0, 100), "improvement": "개선점",
+                    "evidence": ["근거 문장 하나", "근거 문장 둘"], "description": "설명 " * 10}
+                for k in CRITERIA
+            },
+            "todo_list": ["다음 통화 안내"],
+        },
+    }
+
+
+def pydantic_path(docs, model):
+    adapter = TypeAdapter(list[model])
+    models = [model.model_validate(d) for d in docs]          # 라우터의 model_validate
+    models = adapter.validate_python(models)                   # response_model 재검증
+    return json.dumps([m.model_dump(mode="json", by_alias=True) for m in models],
+                      ensure_ascii=False).encode("utf-8")
+
+
+def fast_path(docs, model):
+    return orjson.dumps(shape_docs(docs, model), default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def bench(fn, docs, model, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(docs, model)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    sizes = [int(x) for x in sys.argv[1:]] or [1000, 10000]
+    for n in sizes:
+        docs = [make_doc(i) for i in range(n)]
+        for model in (Call, CallBrief):
+            # 두 경로의 결과가 같은지 먼저 확인
+            assert json.loads(pydantic_path(docs[:50], model)) == json.loads(fast_path(docs[:50], model))
+            slow = bench(pydantic_path, docs, model)
+            fast = bench(fast_path, docs, model)
+            print(f"{model.__name__:9} n={n:>6}: pydantic {slow * 1000:8.1f} ms | fast {fast * 1000:8.1f} ms "
+                  f"| x{slow / fast:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
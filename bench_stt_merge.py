@@ -0,0 +1,124 @@
+# bench_stt_merge.py
+"""
+STT word → 턴 병합 비교 벤치마크.
+(legacy 결과와의 동일성 검사는 tests/test_stt.py 에서 pytest 로)
+
+- 기존 경로(legacy): _to_dict(model_dump) → 작은 조각 묶기(flush_small) → _merge_items_by_speaker
+- 새 경로: stt._merge_words (한 번 순회, SDK 객체 속성 직접 읽기)
+
+사용법: python bench_stt_merge.py [단어 수 ...]   (기본 50000)
+"""
+import sys
+import time
+import random
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from stt import _to_dict, _merge_items_by_speaker, _merge_words
+
+
+class Word(BaseModel):
+    """ElevenLabs SpeechToTextWordResponseModel 과 같은 모양"""
+    text: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+    type: str = "word"
+    speaker_id: Optional[str] = None
+    logprob: float = 0.0
+    characters: Optional[List[Any]] = None
+
+
+def legacy_merge(words) -> List[Dict[str, Any]]:
+    """변경 전 transcribe_speeches 의 word 경로 그대로 (golden)"""
+    ws = [_to_dict(w) for w in words]
+    merged_small: List[Dict[str, Any]] = []
+    cur_spk = None
+    buf: List[str] = []
+    start = None
+    end = None
+
+    def flush_small():
+        nonlocal buf, start, end, cur_spk
+        if buf:
+            merged_small.append({"speaker_id": cur_spk, "text": " ".join(buf).strip(), "start": start, "end": end})
+        buf = []
+        start = None
+        end = None
+
+    for w in ws:
+        spk = w.get("speaker_id")
+        token = (w.get("text") or "").strip()
+        s = w.get("start")
+        e = w.get("end")
+        if not token:
+            continue
+        if spk != cur_spk:
+            flush_small()
+            cur_spk = spk
+            buf = [token]
+            start = s
+            end = e
+        else:
+            buf.append(token)
+            if start is None and s is not None:
+                start = s
+            if e is not None:
+                end = e
+    flush_small()
+    return _merge_items_by_speaker(merged_small)
+
+
+def make_words(n: int, seed: int = 0, speakers: int = 2, messy: bool = False) -> List[Word]:
+    rnd = random.Random(seed)
+    words: List[Word] = []
+    t = 0.0
+    spk = 0
+    for i in range(n):
+        if rnd.random() < 0.08:
+            spk = rnd.randrange(speakers)
+        if i % 2:
+            # ElevenLabs 는 단어 사이 공백도 spacing 으로 내려줌
+            words.append(Word(text=" ", start=t, end=t + 0.05, type="spacing", speaker_id=f"speaker_{spk}"))
+            t += 0.05
+            continue
+        dur = rnd.uniform(0.1, 0.6)
+        start, end = round(t, 3), round(t + dur, 3)
+        sid: Optional[str] = f"speaker_{spk}"
+        if messy:
+            # 타임스탬프/화자 누락, 빈 토큰 섞기
+            r = rnd.random()
+            if r < 0.05:
+                start = None
+            elif r < 0.10:
+                end = None
+            elif r < 0.13:
+                sid = None
+            elif r < 0.15:
+                words.append(Word(text="", start=start, end=end, speaker_id=sid))
+                continue
+        words.append(Word(text=f"단어{i}", start=start, end=end, speaker_id=sid))
+        t += dur
+    return words
+
+
+def bench(fn, words, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(words)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    sizes = [int(x) for x in sys.argv[1:]] or [50000]
+    for n in sizes:
+        words = make_words(n, seed=n)
+        slow = bench(legacy_merge, words)
+        fast = bench(_merge_words, words)
+        print(f"n={n:>7}: legacy {slow * 1000:8.1f} ms | single-pass {fast * 1000:8.1f} ms | x{slow / fast:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# core/audio.py
+"""
+ffmpeg/ffprobe 기반 오디오 유틸 (STT 분할 처리, 평가 전처리용)
+
+- probe_duration: 길이(초)
+- probe_audio: 실제 컨테이너/코덱/채널/샘플레이트/길이 (ffprobe)
+- detect_silences: silencedetect 필터로 무음 구간 찾기
+- plan_chunks: 무음 경계 기준으로 겹치는 청크 구간 계산 (순수 함수)
+- cut_chunk: 구간 잘라서 mono 16kHz flac 으로 저장
+- prepare_audio: 평가 전처리 (AUDIO_PREPROCESS=1 일 때 앞뒤 무음 제거 + mono 16kHz opus/flac), 프로세스 풀에서 실행
+"""
+from __future__ import annotations
+import os
+import re
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+
+SILENCE_NOISE_DB = float(os.getenv("STT_SILENCE_NOISE_DB", "-35"))
+SILENCE_MIN_SEC = float(os.getenv("STT_SILENCE_MIN_SEC", "0.4"))
+
+# 평가 전처리 (opt-in): 켜면 업로드마다 앞뒤 무음 제거 + mono 16kHz 로 다시 인코딩한 뒤 평가
+# 끄면(기본) 원본 그대로 보내고 ffprobe 로 MIME 만 확인
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "0") == "1"
+AUDIO_PREPROCESS_CODEC = os.getenv("AUDIO_PREPROCESS_CODEC", "opus")  # opus | flac
+AUDIO_PREPROCESS_WORKERS = int(os.getenv("AUDIO_PREPROCESS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+AUDIO_OPUS_BITRATE = os.getenv("AUDIO_OPUS_BITRATE", "24k")
+AUDIO_TRIM_NOISE_DB = float(os.getenv("AUDIO_TRIM_NOISE_DB", "-50"))
+AUDIO_TRIM_PAD_SEC = 0.2  # 잘라낸 경계에 남겨둘 여유
+
+# ffprobe format_name → MIME
+_FORMAT_MIME = {
+    "mov": "audio/mp4", "mp4": "audio/mp4", "m4a": "audio/mp4", "3gp": "audio/3gpp",
+    "mp3": "audio/mpeg", "wav": "audio/wav", "ogg": "audio/ogg", "flac": "audio/flac",
+    "webm": "audio/webm", "matroska": "audio/webm", "aac": "audio/aac", "amr": "audio/amr",
+    "aiff": "audio/aiff",
+}
+_CODEC_OUT = {
+    "opus": (["-c:a", "libopus", "-b:a", AUDIO_OPUS_BITRATE, "-application", "voip"], "ogg", "audio/ogg", ".ogg"),
+    "flac": (["-c:a", "flac"], "flac", "audio/flac", ".flac"),
+}
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BIN) is not None and shutil.which(FFPROBE_BIN) is not None
+
+
+def probe_duration(path: str) -> float:
+    out = subprocess.run(
+        [FFPROBE_BIN, "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", path],
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    return float(out)
+
+
+def detect_silences(path: str, noise_db: float = SILENCE_NOISE_DB,
+                    min_sec: float = SILENCE_MIN_SEC, until: Optional[float] = None) -> List[Tuple[float, float]]:
+    """무음 구간 [(start, end), ...] (초). 끝까지 이어지는 무음은 until 을 주면 (start, until) 로 포함"""
+    proc = subprocess.run(
+        [FFMPEG_BIN, "-hide_banner", "-nostats", "-i", path,
+         "-af", f"silencedetect=noise={noise_db}dB:d={min_sec}", "-f", "null", "-"],
+        capture_output=True, text=True, check=True,
+    )
+    silences: List[Tuple[float, float]] = []
+    start: Optional[float] = None
+    for line in proc.stderr.splitlines():
+        m = _SILENCE_START.search(line)
+        if m:
+            start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END.search(line)
+        if m and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    if start is not None and until is not None and until > start:
+        silences.append((start, until))
+    return silences
+
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]],
+                target_sec: float, overlap_sec: float) -> List[Tuple[float, float]]:
+    """
+    target_sec 근처의 무음 한가운데를 경계로 자르고, 경계 양쪽으로 overlap_sec/2 씩 겹치게 함.
+    경계 ±25% 안에 무음이 없으면 target_sec 위치에서 그대로 자름.
+    """
+    if duration <= target_sec * 1.25:
+        return [(0.0, duration)]
+
+    mids = [(s + e) / 2 for s, e in silences]
+    window = target_sec * 0.25
+    half = overlap_sec / 2
+
+    cuts: List[float] = []
+    pos = 0.0
+    while duration - pos > target_sec * 1.25:
+        ideal = pos + target_sec
+        near = [m for m in mids if abs(m - ideal) <= window and m > pos + half]
+        cut = min(near, key=lambda m: abs(m - ideal)) if near else ideal
+        cuts.append(cut)
+        pos = cut
+
+    bounds = [0.0, *cuts, duration]
+    return [
+        (max(0.0, bounds[i] - (half if i else 0.0)),
+         min(duration, bounds[i + 1] + (half if i + 1 < len(bounds) - 1 else 0.0)))
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def cut_chunk(path: str, start: float, end: float, out_path: str) -> str:
+    """[start, end) 구간을 mono 16kHz flac 으로 (STT 업로드 크기 최소화)"""
+    subprocess.run(
+        [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+         "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path,
+         "-vn", "-ac", "1", "-ar", "16000", "-c:a", "flac", out_path],
+        check=True,
+    )
+    return out_path
+
+
+def format_mime(format_name: Optional[str], default: str = "audio/mp4") -> str:
+    for name in (format_name or "").split(","):
+        if name in _FORMAT_MIME:
+            return _FORMAT_MIME[name]
+    return default
+
+
+def probe_audio(path: str) -> Dict[str, Any]:
+    """ffprobe 로 실제 컨테이너/오디오 스트림 정보"""
+    out = subprocess.run(
+        [FFPROBE_BIN, "-v", "error", "-select_streams", "a:0",
+         "-show_entries", "format=format_name,duration,size:stream=codec_name,channels,sample_rate",
+         "-of", "json", path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    info = json.loads(out)
+    fmt = info.get("format") or {}
+    stream = (info.get("streams") or [{}])[0]
+    return {
+        "format": fmt.get("format_name"),
+        "mime_type": format_mime(fmt.get("format_name")),
+        "codec": stream.get("codec_name"),
+        "channels": stream.get("channels"),
+        "sample_rate": int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+        "duration_sec": round(float(fmt["duration"]), 3) if fmt.get("duration") else None,
+        "size": int(fmt["size"]) if fmt.get("size") else os.path.getsize(path),
+    }
+
+
+def trim_bounds(silences: List[Tuple[float, float]], duration: float,
+                pad: float = AUDIO_TRIM_PAD_SEC) -> Tuple[float, float]:
+    """앞/뒤 무음을 뺀 [start, end) (중간 무음은 그대로)"""
+    start, end = 0.0, duration
+    if silences and silences[0][0] <= 0.05:
+        start = max(0.0, silences[0][1] - pad)
+    if silences and silences[-1][1] >= duration - 0.05:
+        end = min(duration, silences[-1][0] + pad)
+    if end - start <= 0.5:  # 거의 전부 무음이면 자르지 않음
+        return 0.0, duration
+    return start, end
+
+
+def _preprocess_file(in_path: str, out_path: str, codec: str) -> Dict[str, Any]:
+    """(프로세스 풀 워커) 앞뒤 무음 제거 + mono 16kHz 변환. 원본/결과 정보 반환"""
+    original = probe_audio(in_path)
+    duration = original["duration_sec"] or probe_duration(in_path)
+    silences = detect_silences(in_path, noise_db=AUDIO_TRIM_NOISE_DB, min_sec=0.5, until=duration)
+    start, end = trim_bounds(silences, duration)
+
+    args, fmt, _, _ = _CODEC_OUT[codec]
+    subprocess.run(
+        [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+         "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", in_path,
+         "-vn", "-ac", "1", "-ar", "16000", *args, "-f", fmt, out_path],
+        check=True,
+    )
+    return {"original": original, "processed": probe_audio(out_path), "trimmed": [round(start, 3), round(end, 3)]}
+
+
+@dataclass
+class PreparedAudio:
+    data: bytes
+    mime_type: str
+    ext: str
+    meta: Dict[str, Any] = field(default_factory=dict)  # Call 문서에 기록할 원본/결과 정보
+    processed: bool = False
+
+
+class PreprocessStats:
+    def __init__(self):
+        self.processed = 0
+        self.fallbacks = 0  # 전처리 실패/ffmpeg 없음 → 원본 사용
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_sec = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": AUDIO_PREPROCESS,
+            "codec": AUDIO_PREPROCESS_CODEC,
+            "workers": AUDIO_PREPROCESS_WORKERS,
+            "processed": self.processed,
+            "fallbacks": self.fallbacks,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+            "avg_sec": round(self.total_sec / self.processed, 3) if self.processed else None,
+        }
+
+
+preprocess_stats = PreprocessStats()
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # 스레드/클라이언트(Mongo, MinIO, httpx)를 가진 서버 프로세스를 fork 하면 자식이 잠긴 락에 걸릴 수 있음
+        # → 깨끗한 forkserver 프로세스에서 워커를 띄움
+        _pool = ProcessPoolExecutor(max_workers=AUDIO_PREPROCESS_WORKERS,
+                                    mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _write_temp(data: bytes, suffix: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="eval_in_", suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+async def prepare_audio(data: bytes, name: str = "audio", codec: str = AUDIO_PREPROCESS_CODEC) -> PreparedAudio:
+    """
+    평가용 오디오 준비. ffmpeg 가 없거나 실패하면 원본 그대로
+    (MIME 은 가능하면 실제 컨테이너, 아니면 확장자 기준)
+    변환은 프로세스 풀에서 실행 → 이벤트 루프/GIL 에 영향 없음
+    """
+    ext = Path(name).suffix or ".bin"
+    if not ffmpeg_available():
+        if AUDIO_PREPROCESS:
+            preprocess_stats.fallbacks += 1
+        return PreparedAudio(data, format_mime(ext.lstrip(".").lower()), ext)
+
+    loop = asyncio.get_running_loop()
+    in_path = await asyncio.to_thread(_write_temp, data, ext)
+    out_ext = _CODEC_OUT[codec][3]
+    out_path = in_path + out_ext
+    try:
+        if not AUDIO_PREPROCESS:
+            original = await loop.run_in_executor(_get_pool(), probe_audio, in_path)
+            return PreparedAudio(data, original["mime_type"], ext, {"original": original})
+        t0 = time.perf_counter()
+        try:
+            meta = await loop.run_in_executor(_get_pool(), _preprocess_file, in_path, out_path, codec)
+        except Exception as e:
+            print(f"⚠️ 오디오 전처리 실패, 원본 사용: {e}")
+            preprocess_stats.fallbacks += 1
+            try:
+                original = await loop.run_in_executor(_get_pool(), probe_audio, in_path)
+                return PreparedAudio(data, original["mime_type"], ext, {"original": original})
+            except Exception:
+                return PreparedAudio(data, format_mime(ext.lstrip(".").lower()), ext)
+        processed = await asyncio.to_thread(Path(out_path).read_bytes)
+        preprocess_stats.processed += 1
+        preprocess_stats.bytes_in += len(data)
+        preprocess_stats.bytes_out += len(processed)
+        preprocess_stats.total_sec += time.perf_counter() - t0
+        return PreparedAudio(processed, _CODEC_OUT[codec][2], out_ext, meta, processed=True)
+    finally:
+        for p in (in_path, out_path):
+            try:
+                os.unlink(p)
+            except OSError:
+                pass
+
+
+def call_audio_fields(prepared: PreparedAudio) -> Dict[str, Any]:
+    """Call 문서에 기록할 원본/전처리 결과 필드"""
+    original = prepared.meta.get("original") or {}
+    fields: Dict[str, Any] = {
+        "audio_format": original.get("format"),
+        "audio_duration_sec": original.get("duration_sec"),
+    }
+    if prepared.processed:
+        processed = prepared.meta.get("processed") or {}
+        fields.update({
+            "processed_audio_size": len(prepared.data),
+            "processed_audio_duration_sec": processed.get("duration_sec"),
+            "processed_audio_mime": prepared.mime_type,
+        })
+    return {k: v for k, v in fields.items() if v is not None}
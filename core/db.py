@@ -1,11 +1,12 @@
 from __future__ import annotations
 import os
 from typing import AsyncGenerator
-from pymongo import ASCENDING, DESCENDING
 from pymongo.server_api import ServerApi
 from pymongo.errors import PyMongoError
 from pymongo import AsyncMongoClient
 
+from core.indexes import reconcile_indexes
+
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://mongo:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "chadamjin")
 
@@ -18,15 +19,14 @@ db = client[MONGO_DB_NAME]
 
 users = db.get_collection("users")
 calls = db.get_collection("calls")
+report_cache = db.get_collection("report_cache")
 
 async def ping() -> None:
     await client.admin.command("ping")
 
 async def init_indexes() -> None:
-    await users.create_index([("agent_id", ASCENDING)])
-    await users.create_index([("phone_id", ASCENDING)])
-    await calls.create_index([("user_id", ASCENDING)])
-    await calls.create_index([("created_at", DESCENDING)])
+    # 선언된 인덱스 목록(core/indexes.py)과 실제 인덱스를 맞춤
+    await reconcile_indexes(db)
 
 async def init_db() -> None:
     try:
@@ -0,0 +1,178 @@
+# core/eval_queue.py
+"""
+calls 컬렉션의 evaluation_status 필드를 그대로 작업 큐로 사용하는 평가 워커 풀.
+
+- pending 문서를 find_one_and_update로 원자적으로 선점(claim) → running
+- 실행 중에는 evaluation_lease_until 을 주기적으로 연장(heartbeat)
+- 리스가 만료된 running/retrying 문서는 다른 워커가 다시 가져갈 수 있음
+- 서버 재시작 시 sweep()으로 멈춘 작업을 pending으로 되돌림
+"""
+from __future__ import annotations
+import os
+import socket
+import asyncio
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from core.db import calls
+from core.queries import ACTIVE_EVAL_STATUSES, EVAL_QUEUE_SORT, expired_eval, pending_eval
+from schema.common import utcnow
+
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "4"))
+EVAL_LEASE_SEC = int(os.getenv("EVAL_LEASE_SEC", "120"))
+EVAL_POLL_SEC = float(os.getenv("EVAL_POLL_SEC", "5"))
+
+ACTIVE_STATUSES = ACTIVE_EVAL_STATUSES
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+CanClaim = Callable[[], bool]
+
+
+class EvalQueue:
+    def __init__(self, collection, workers: int = EVAL_WORKERS,
+                 lease_sec: int = EVAL_LEASE_SEC, poll_sec: float = EVAL_POLL_SEC):
+        self.collection = collection
+        self.workers = max(1, workers)
+        self.lease_sec = lease_sec
+        self.poll_sec = poll_sec
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._in_flight: Dict[Any, asyncio.Task] = {}
+        self._can_claim: Optional[CanClaim] = None
+
+    def _lease_until(self):
+        return utcnow() + timedelta(seconds=self.lease_sec)
+
+    async def sweep(self) -> int:
+        """리스가 없거나 만료된 running/retrying 작업을 pending으로 되돌림"""
+        res = await self.collection.update_many(
+            {
+                "evaluation_status": {"$in": ACTIVE_STATUSES},
+                "$or": [
+                    {"evaluation_lease_until": {"$exists": False}},
+                    {"evaluation_lease_until": None},
+                    {"evaluation_lease_until": {"$lt": utcnow()}},
+                ],
+            },
+            {
+                "$set": {"evaluation_status": "pending", "updated_at": utcnow()},
+                "$unset": {"evaluation_lease_until": "", "evaluation_worker": ""},
+            },
+        )
+        return res.modified_count
+
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        update = {"$set": {
+            "evaluation_status": "running",
+            "evaluation_worker": self.worker_id,
+            "evaluation_lease_until": self._lease_until(),
+            "updated_at": utcnow(),
+        }}
+        # 1) 오래된 pending부터
+        doc = await self.collection.find_one_and_update(
+            pending_eval(),
+            update,
+            sort=EVAL_QUEUE_SORT,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is not None:
+            return doc
+        # 2) 리스가 만료된 작업 회수 (워커가 죽은 경우)
+        return await self.collection.find_one_and_update(
+            expired_eval(utcnow()),
+            update,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def heartbeat(self, call_id) -> bool:
+        res = await self.collection.update_one(
+            {"_id": call_id, "evaluation_worker": self.worker_id,
+             "evaluation_status": {"$in": ACTIVE_STATUSES}},
+            {"$set": {"evaluation_lease_until": self._lease_until()}},
+        )
+        return res.matched_count > 0
+
+    async def _keep_alive(self, call_id) -> None:
+        interval = max(1.0, self.lease_sec / 3)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.heartbeat(call_id):
+                print(f"⚠️ 평가 작업 리스 연장 실패(다른 워커가 회수했거나 종료됨): {call_id}")
+                return
+
+    def notify(self) -> None:
+        """새 작업이 들어왔음을 알려 대기 중인 워커를 즉시 깨움"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _wait_for_work(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_sec)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _worker(self, handler: Handler) -> None:
+        while True:
+            # back-pressure: 하위 리미터가 포화면 새 작업을 잡지 않고 DB(pending)에 남겨둠
+            if self._can_claim is not None and not self._can_claim():
+                await self._wait_for_work()
+                continue
+            try:
+                doc = await self.claim()
+            except Exception as e:
+                print(f"❌ 평가 작업 선점 실패: {e}")
+                doc = None
+            if doc is None:
+                await self._wait_for_work()
+                continue
+
+            call_id = doc["_id"]
+            keep_alive = asyncio.create_task(self._keep_alive(call_id))
+            self._in_flight[call_id] = asyncio.current_task()
+            try:
+                await handler(doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 평가 작업 처리 중 예외: {call_id}: {e}")
+            finally:
+                keep_alive.cancel()
+                self._in_flight.pop(call_id, None)
+
+    def start(self, handler: Handler, can_claim: Optional[CanClaim] = None) -> None:
+        if self._tasks:
+            return
+        self._can_claim = can_claim
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(handler)) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        in_flight = list(self._in_flight)
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # 처리 중이던 작업은 다음 프로세스가 바로 가져가도록 pending으로 반납
+        if in_flight:
+            await self.collection.update_many(
+                {"_id": {"$in": in_flight}, "evaluation_worker": self.worker_id},
+                {
+                    "$set": {"evaluation_status": "pending", "updated_at": utcnow()},
+                    "$unset": {"evaluation_lease_until": "", "evaluation_worker": ""},
+                },
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers,
+            "in_flight": len(self._in_flight),
+            "lease_sec": self.lease_sec,
+        }
+
+
+eval_queue = EvalQueue(calls)
@@ -0,0 +1,154 @@
+# core/events.py
+"""
+call 단위 이벤트 pub/sub (GET /call/{call_id}/events SSE 용)
+
+- 평가 경로가 상태 변경/부분 결과를 emit() → 같은 call을 구독 중인 SSE 연결로 전달
+- EVENTS_CHANGE_STREAM=1 이면 Mongo change stream 으로 calls 변경을 받아 전달
+  (서버 여러 대일 때 다른 프로세스의 평가 결과도 전달, 레플리카셋 필요)
+  → 브리지가 열려 있으면 emit()은 로컬 전달을 생략해 같은 이벤트가 두 번 가지 않게 함
+
+이벤트 종류
+- status:     {"status", "attempts", "error"}
+- transcript: {"turns": [...]}  (STT 결과)
+- summary:    {"overall_score", "summary", "keyword", "is_valid", "feedback", "todo_list"}
+- criteria:   {"criteria": {...}}
+"""
+from __future__ import annotations
+import os
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "64"))
+EVENTS_CHANGE_STREAM = os.getenv("EVENTS_CHANGE_STREAM", "0") == "1"
+
+TERMINAL_STATUSES = ("done", "failed")
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def report_events(report: Dict[str, Any]) -> List[Event]:
+    """report → summary, criteria 이벤트 순서대로"""
+    summary = {k: report.get(k) for k in
+               ("overall_score", "summary", "keyword", "is_valid", "feedback", "todo_list")}
+    return [("summary", summary), ("criteria", {"criteria": report.get("criteria") or {}})]
+
+
+def doc_events(doc: Dict[str, Any]) -> List[Event]:
+    """call 문서의 현재 상태 → 이벤트 목록 (구독 직후 스냅샷 전송용)"""
+    events: List[Event] = [("status", {
+        "status": doc.get("evaluation_status", "pending"),
+        "attempts": doc.get("evaluation_attempts", 0),
+        "error": doc.get("evaluation_last_error"),
+    })]
+    if doc.get("transcript"):
+        events.append(("transcript", {"turns": doc["transcript"]}))
+    if doc.get("report"):
+        events.extend(report_events(doc["report"]))
+    return events
+
+
+class EventBus:
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subs: Dict[str, Set[asyncio.Queue]] = {}
+        self._bridge: Optional[asyncio.Task] = None
+        self.bridged = False
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, call_id: str) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subs.setdefault(call_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, call_id: str, q: asyncio.Queue) -> None:
+        subs = self._subs.get(call_id)
+        if subs is not None:
+            subs.discard(q)
+            if not subs:
+                self._subs.pop(call_id, None)
+
+    def has_subscribers(self, call_id: str) -> bool:
+        return call_id in self._subs
+
+    def publish(self, call_id: str, event: str, data: Dict[str, Any]) -> None:
+        for q in self._subs.get(call_id, ()):
+            if q.full():
+                # 느린 구독자: 가장 오래된 이벤트를 버리고 최신 유지
+                q.get_nowait()
+                self.dropped += 1
+            q.put_nowait((event, data))
+            self.published += 1
+
+    def emit(self, call_id: str, event: str, data: Dict[str, Any]) -> None:
+        """평가 경로에서 호출. change stream 브리지가 같은 변경을 전달 중이면 생략"""
+        if not self.bridged:
+            self.publish(call_id, event, data)
+
+    # --- change stream 브리지 ---
+
+    def _publish_change(self, change: Dict[str, Any]) -> None:
+        call_id = str(change["documentKey"]["_id"])
+        if not self.has_subscribers(call_id):
+            return
+        fields = (change.get("updateDescription") or {}).get("updatedFields") or {}
+        # 결과 먼저, 상태는 마지막 (done 은 report 와 같은 업데이트로 들어오고 SSE 는 done 에서 종료)
+        if fields.get("transcript"):
+            self.publish(call_id, "transcript", {"turns": fields["transcript"]})
+        if fields.get("report"):
+            for event, data in report_events(fields["report"]):
+                self.publish(call_id, event, data)
+        if "evaluation_status" in fields:
+            self.publish(call_id, "status", {
+                "status": fields["evaluation_status"],
+                "attempts": fields.get("evaluation_attempts"),
+                "error": fields.get("evaluation_last_error"),
+            })
+
+    async def _watch(self, collection) -> None:
+        pipeline = [{"$match": {"operationType": "update"}}]
+        connected = False
+        while True:
+            try:
+                async with await collection.watch(pipeline) as stream:
+                    self.bridged = connected = True
+                    print("✅ calls change stream 연결 (이벤트 브리지)")
+                    async for change in stream:
+                        self._publish_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not connected:
+                    # standalone Mongo 등 change stream 불가 → 로컬 전달로 대체
+                    print(f"⚠️ change stream 사용 불가, 프로세스 내부 이벤트만 전달: {e}")
+                    return
+                # 연결이 끊김 → 잠시 로컬 전달로 돌렸다가 재연결
+                self.bridged = False
+                print(f"⚠️ change stream 끊김, 재연결 시도: {e}")
+                await asyncio.sleep(5)
+
+    def start_bridge(self, collection) -> None:
+        if EVENTS_CHANGE_STREAM and self._bridge is None:
+            self._bridge = asyncio.create_task(self._watch(collection))
+
+    async def stop_bridge(self) -> None:
+        if self._bridge is not None:
+            self._bridge.cancel()
+            try:
+                await self._bridge
+            except asyncio.CancelledError:
+                pass
+            self._bridge = None
+            self.bridged = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls_watched": len(self._subs),
+            "subscribers": sum(len(s) for s in self._subs.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+            "change_stream": self.bridged,
+        }
+
+
+event_bus = EventBus()
@@ -0,0 +1,91 @@
+# core/export.py
+"""
+calls 대량 내보내기(NDJSON) 공용 로직 — /call/export 엔드포인트와 export_calls.py CLI가 함께 사용.
+
+비동기 커서를 batch 단위로 읽으면서 바로 한 줄씩 인코딩해 내보내므로
+결과 건수와 상관없이 메모리 사용량이 일정하다.
+"""
+from __future__ import annotations
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+import orjson
+
+from core.fast_json import shape_doc, shape_sparse, model_projection, _default
+from schema.call import Call
+from schema.common import KST
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+CALL_FIELD_NAMES = {(f.alias or name) for name, f in Call.model_fields.items()} | {"id"}
+CALL_PROJECTION = model_projection(Call)
+
+
+def fields_projection(fields: Optional[str]) -> Optional[Dict[str, int]]:
+    """fields=call_count,report.overall_score 형태 → Mongo projection (없으면 None)"""
+    if not fields:
+        return None
+    names = {"_id" if n.strip() == "id" else n.strip() for n in fields.split(",") if n.strip()}
+    unknown = sorted(n for n in names if n.split(".", 1)[0] not in CALL_FIELD_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # 상위 필드를 통째로 요청했으면 하위 경로는 제외 (projection 경로 충돌 방지)
+    names = {n for n in names if "." not in n or n.split(".", 1)[0] not in names}
+    return {"_id": 1, **{n: 1 for n in names}}
+
+
+def _aware(dt: datetime) -> datetime:
+    # 시간대 없는 입력은 KST로 간주
+    return dt if dt.tzinfo else dt.replace(tzinfo=KST)
+
+
+def build_export_filter(
+    agent_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    evaluation_status: Optional[str] = None,
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if agent_id:
+        query["agent_id"] = agent_id
+    if user_id:
+        query["user_id"] = user_id
+    if evaluation_status:
+        query["evaluation_status"] = evaluation_status
+    if date_from or date_to:
+        created: Dict[str, datetime] = {}
+        if date_from:
+            created["$gte"] = _aware(date_from)
+        if date_to:
+            created["$lt"] = _aware(date_to)
+        query["created_at"] = created
+    return query
+
+
+async def iter_ndjson(collection, query: Dict[str, Any],
+                      projection: Optional[Dict[str, int]] = None) -> AsyncIterator[bytes]:
+    """조건에 맞는 call을 NDJSON 청크(약 64KB 단위)로 내보냄"""
+    cursor = collection.find(query, projection=projection or CALL_PROJECTION, batch_size=EXPORT_BATCH_SIZE)
+    buf = bytearray()
+    async for doc in cursor:
+        row = shape_sparse(doc) if projection else shape_doc(doc, Call)
+        buf += orjson.dumps(row, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        buf += b"\n"
+        if len(buf) >= EXPORT_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """청크 스트림을 그대로 gzip 스트림으로 (전체를 메모리에 모으지 않음)"""
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 → gzip 헤더
+    async for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
@@ -0,0 +1,120 @@
+# core/fast_json.py
+"""
+우리가 직접 저장(검증 후 저장)한 Mongo 문서를 Pydantic 재검증 없이 바로 JSON으로 내보내는 경로.
+
+기존: doc → Call.model_validate → (FastAPI response_model) 재검증 → 직렬화
+빠른 경로: doc → 모델 필드 기준으로 모양만 맞춤(shape_doc) → orjson.dumps
+
+출력 형태는 response_model 경로와 같게 맞춘다.
+- 키는 alias 기준(_id), 없는 필드는 모델 기본값
+- _id(ObjectId) → 문자열, created_at(CreatedAtKSTMixin) → KST isoformat
+"""
+from __future__ import annotations
+import typing
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from schema.common import KST, CreatedAtKSTMixin
+
+# 필드 처리 방식
+_PLAIN, _OID, _KST, _MODEL, _LIST_MODEL, _DICT_MODEL = range(6)
+
+
+def _default(o: Any):
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError(f"Type is not JSON serializable: {type(o).__name__}")
+
+
+class TrustedJSONResponse(Response):
+    """ORJSONResponse와 같은 역할 + ObjectId 처리"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _model_in(annotation: Any) -> Tuple[int, Optional[Type[BaseModel]]]:
+    """어노테이션 안의 하위 모델 찾기: Optional[M] / List[M] / Dict[K, M]"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _MODEL, annotation
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in (list, List) and args:
+        kind, sub = _model_in(args[0])
+        return (_LIST_MODEL, sub) if kind == _MODEL else (_PLAIN, None)
+    if origin in (dict, Dict) and len(args) == 2:
+        kind, sub = _model_in(args[1])
+        return (_DICT_MODEL, sub) if kind == _MODEL else (_PLAIN, None)
+    if origin is typing.Union:
+        for a in args:
+            kind, sub = _model_in(a)
+            if kind != _PLAIN:
+                return kind, sub
+    return _PLAIN, None
+
+
+@lru_cache(maxsize=None)
+def _plan(model: Type[BaseModel]) -> Tuple[Tuple[str, Any, int, Any], ...]:
+    plan = []
+    for name, f in model.model_fields.items():
+        key = f.alias or name
+        default = None if f.is_required() else f.get_default(call_default_factory=True)
+        if name == "id" and key == "_id":
+            kind, sub = _OID, None
+        elif name == "created_at" and issubclass(model, CreatedAtKSTMixin):
+            kind, sub = _KST, None
+        else:
+            kind, sub = _model_in(f.annotation)
+        plan.append((key, default, kind, sub))
+    return tuple(plan)
+
+
+def shape_doc(doc: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """문서를 모델 필드 모양으로 (검증 없이) 정리"""
+    out: Dict[str, Any] = {}
+    for key, default, kind, sub in _plan(model):
+        v = doc.get(key, default)
+        if v is None or kind == _PLAIN:
+            out[key] = v
+        elif kind == _OID:
+            out[key] = str(v)
+        elif kind == _KST:
+            out[key] = v.astimezone(KST).isoformat() if isinstance(v, datetime) else v
+        elif kind == _MODEL:
+            out[key] = shape_doc(v, sub)
+        elif kind == _LIST_MODEL:
+            out[key] = [shape_doc(x, sub) for x in v]
+        else:  # _DICT_MODEL
+            out[key] = {k: shape_doc(x, sub) for k, x in v.items()}
+    return out
+
+
+def shape_sparse(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """fields= 로 일부 필드만 읽은 문서: 모델 모양 대신 읽은 그대로 (_id/created_at만 변환)"""
+    doc["_id"] = str(doc["_id"])
+    if isinstance(doc.get("created_at"), datetime):
+        doc["created_at"] = doc["created_at"].astimezone(KST).isoformat()
+    return doc
+
+
+def shape_docs(docs: Iterable[Dict[str, Any]], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    return [shape_doc(d, model) for d in docs]
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """모델 필드만 읽는 Mongo projection (하위 모델은 점 경로로)"""
+    proj: Dict[str, int] = {}
+    for key, _default, kind, sub in _plan(model):
+        if kind == _MODEL and sub is not None:
+            for sub_key in model_projection(sub):
+                proj[f"{key}.{sub_key}"] = 1
+        else:
+            proj[key] = 1
+    return proj
@@ -0,0 +1,192 @@
+# core/gemini_files.py
+"""
+Gemini 에 오디오를 넘기는 방식(transport) 선택
+
+- inline: 오디오를 base64 로 메시지에 그대로 넣음 (작은 파일용, 기존 방식)
+  → bytes + base64 str(1.33배) + 요청 변환용 사본이 동시에 메모리에 있으므로 동시 평가가 많으면 RSS 급증
+- file:   Gemini File API 에 한 번 업로드하고 file_uri 만 넘김 (큰 파일용)
+  → sha256 기준으로 업로드 결과를 재사용 (재시도/같은 파일 재평가 시 업로드 생략)
+
+inline 으로 동시에 잡고 있는 payload 크기는 GEMINI_INLINE_BUDGET_BYTES 로 제한.
+예산이 모자라면 file 로 돌리고, File API 를 쓸 수 없으면 예산이 빌 때까지 대기.
+google-genai 패키지는 file 전송을 쓸 때만 필요 (없으면 inline 만 사용)
+"""
+from __future__ import annotations
+import io
+import os
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "auto")  # auto | inline | file
+GEMINI_FILE_MIN_BYTES = int(os.getenv("GEMINI_FILE_MIN_BYTES", str(8 * 1024 * 1024)))
+GEMINI_INLINE_BUDGET_BYTES = int(os.getenv("GEMINI_INLINE_BUDGET_BYTES", str(128 * 1024 * 1024)))
+GEMINI_FILE_TTL_SEC = int(os.getenv("GEMINI_FILE_TTL_SEC", str(46 * 3600)))  # File API 보관 48시간보다 짧게
+GEMINI_FILE_WAIT_SEC = float(os.getenv("GEMINI_FILE_WAIT_SEC", "60"))
+
+# inline 평가 1건이 잡는 메모리 / 원본 크기
+# 원본 bytes + base64 str(4/3) + 요청 변환 시 다시 디코딩한 bytes 등 (bench_gemini_transport.py 측정값 약 3.7)
+INLINE_MEMORY_FACTOR = float(os.getenv("GEMINI_INLINE_MEMORY_FACTOR", "3.7"))
+
+
+def inline_cost(nbytes: int) -> int:
+    """inline 전송 시 동시에 메모리에 올라가는 크기 추정"""
+    return int(nbytes * INLINE_MEMORY_FACTOR)
+
+
+class InlineBudget:
+    """동시 inline payload 크기 제한 (평가는 스레드에서 돌기 때문에 threading 기반)"""
+
+    def __init__(self, limit: int = GEMINI_INLINE_BUDGET_BYTES):
+        self.limit = limit
+        self.in_use = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self, cost: int) -> bool:
+        with self._cond:
+            if self.in_use and self.in_use + cost > self.limit:
+                return False
+            self._take(cost)
+            return True
+
+    def acquire(self, cost: int) -> None:
+        with self._cond:
+            # 혼자서 예산보다 큰 경우는 다른 inline 이 없을 때만 허용
+            self._cond.wait_for(lambda: not self.in_use or self.in_use + cost <= self.limit)
+            self._take(cost)
+
+    def _take(self, cost: int) -> None:
+        self.in_use += cost
+        self.peak = max(self.peak, self.in_use)
+
+    def release(self, cost: int) -> None:
+        with self._cond:
+            self.in_use -= cost
+            self._cond.notify_all()
+
+
+class GeminiFileStore:
+    """File API 업로드 + sha256 → file_uri 캐시"""
+
+    def __init__(self, ttl_sec: int = GEMINI_FILE_TTL_SEC):
+        self.ttl_sec = ttl_sec
+        self._client = None
+        self._refs: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.reuses = 0
+        self.uploaded_bytes = 0
+
+    def available(self) -> bool:
+        if not os.getenv("GOOGLE_API_KEY"):
+            return False
+        try:
+            import google.genai  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _get_client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+        return self._client
+
+    def _wait_active(self, f):
+        deadline = time.monotonic() + GEMINI_FILE_WAIT_SEC
+        while str(getattr(f.state, "name", f.state)) == "PROCESSING":
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Gemini 파일 처리 대기 시간 초과: {f.name}")
+            time.sleep(1)
+            f = self._get_client().files.get(name=f.name)
+        if str(getattr(f.state, "name", f.state)) == "FAILED":
+            raise RuntimeError(f"Gemini 파일 처리 실패: {f.name} {f.error}")
+        return f
+
+    def file_uri(self, audio: bytes, mime_type: str, sha256: str) -> str:
+        now = time.monotonic()
+        with self._lock:
+            ref = self._refs.get(sha256)
+            if ref and ref[1] > now:
+                self.reuses += 1
+                return ref[0]
+
+        f = self._get_client().files.upload(
+            file=io.BytesIO(audio),  # bytes 를 복사하지 않고 그대로 스트리밍 업로드
+            config={"mime_type": mime_type, "display_name": sha256},
+        )
+        f = self._wait_active(f)
+
+        ttl = self.ttl_sec
+        if f.expiration_time:
+            remain = (f.expiration_time - datetime.now(timezone.utc) - timedelta(hours=1)).total_seconds()
+            ttl = max(0, min(ttl, int(remain)))
+        with self._lock:
+            self._refs[sha256] = (f.uri, now + ttl)
+            # 만료된 참조 정리
+            for k in [k for k, (_, exp) in self._refs.items() if exp <= now]:
+                del self._refs[k]
+            self.uploads += 1
+            self.uploaded_bytes += len(audio)
+        return f.uri
+
+    def forget(self, sha256: str) -> None:
+        with self._lock:
+            self._refs.pop(sha256, None)
+
+
+class TransportStats:
+    def __init__(self):
+        self.inline = 0
+        self.file = 0
+        self.inline_waits = 0
+        self.file_fallbacks = 0  # file 전송 실패 → inline 으로 대체
+
+    def to_dict(self, budget: InlineBudget, store: GeminiFileStore) -> Dict[str, Any]:
+        return {
+            "mode": GEMINI_TRANSPORT,
+            "file_min_bytes": GEMINI_FILE_MIN_BYTES,
+            "inline": self.inline,
+            "file": self.file,
+            "inline_waits": self.inline_waits,
+            "file_fallbacks": self.file_fallbacks,
+            "inline_bytes_in_use": budget.in_use,
+            "inline_bytes_peak": budget.peak,
+            "inline_budget_bytes": budget.limit,
+            "file_uploads": store.uploads,
+            "file_reuses": store.reuses,
+            "file_cached_refs": len(store._refs),
+        }
+
+
+inline_budget = InlineBudget()
+file_store = GeminiFileStore()
+transport_stats = TransportStats()
+
+
+def choose_transport(nbytes: int) -> str:
+    """'inline' | 'file'. inline 이면 예산을 이미 잡은 상태로 반환 (호출한 쪽에서 release)"""
+    use_file = file_store.available() and (
+        GEMINI_TRANSPORT == "file" or (GEMINI_TRANSPORT == "auto" and nbytes >= GEMINI_FILE_MIN_BYTES)
+    )
+    if use_file:
+        return "file"
+    cost = inline_cost(nbytes)
+    if inline_budget.try_acquire(cost):
+        return "inline"
+    if GEMINI_TRANSPORT != "inline" and file_store.available():
+        return "file"
+    transport_stats.inline_waits += 1
+    inline_budget.acquire(cost)
+    return "inline"
+
+
+def current_rss_bytes() -> Optional[int]:
+    """현재 프로세스 RSS (리눅스 /proc 기준, 없으면 None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
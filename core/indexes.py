@@ -0,0 +1,202 @@
+# core/indexes.py
+"""
+인덱스 선언 목록(레지스트리)과 시작 시 동기화(reconcile).
+
+- INDEXES: 컬렉션별로 있어야 하는 인덱스 (라우터의 쿼리 모양별로 하나씩)
+- QUERY_SHAPES: 라우터/큐가 실제로 날리는 쿼리 모양 (core.queries 로 생성)
+  → audit_query_shapes() 가 explain() 으로 검사 (tests/test_indexes.py, index_audit.py)
+- reconcile_indexes(): 없는 인덱스 생성, 옵션이 바뀐 인덱스 재생성.
+  목록에 없는 인덱스(수동/운영 생성 포함)는 기본적으로 로그만 남기고,
+  삭제는 index_audit.py --drop-unknown 으로 명시적으로 요청할 때만
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from core import queries
+from core.export import build_export_filter
+from schema.common import utcnow
+
+QUEUE_STATUSES = ["pending", "running", "retrying"]
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("agent_id", ASCENDING)], name="agent_id_1"),
+        # create_call, /user/phone/{phone_id}, /call/phone/{phone_id}: phone_id의 최신 유저
+        IndexModel(
+            [("phone_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="phone_latest",
+        ),
+        # GET /user: 최신순 스캔 + is_deleted != true 는 FETCH 에서 거름
+        # (partialFilterExpression 은 $ne 를 표현할 수 없어 부분 인덱스로 만들지 않음)
+        IndexModel([("created_at", DESCENDING)], name="created_at_-1"),
+    ],
+    "calls": [
+        # /call/user/{user_id}, /paged, /phone/{phone_id}: 유저별 최신순 (+ _id 타이브레이커)
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_created_at",
+        ),
+        # /call/export, export_calls.py: 상담원별 기간 내보내기
+        IndexModel([("agent_id", ASCENDING), ("created_at", DESCENDING)], name="agent_created_at"),
+        # create_call: 직전 통화(call_count 최대) 조회 + 동시 업로드 시 call_count 중복 방지
+        IndexModel(
+            [("user_id", ASCENDING), ("customer_num", ASCENDING), ("call_count", DESCENDING)],
+            name="user_customer_call_count",
+            unique=True,
+        ),
+        # 평가 큐: 처리 대기/진행 중인 문서만 인덱싱 (done/failed는 제외돼 작게 유지)
+        IndexModel(
+            [("evaluation_status", ASCENDING), ("created_at", ASCENDING)],
+            name="eval_queue",
+            partialFilterExpression={"evaluation_status": {"$in": QUEUE_STATUSES}},
+        ),
+    ],
+    "report_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("prompt_version", ASCENDING)], name="prompt_version"),
+    ],
+}
+
+# 인덱스 동일성 비교에 쓰는 옵션
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+@dataclass
+class QueryShape:
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+    limit: int = 0
+    allow_sort: bool = False  # 메모리 SORT 허용 여부(기본 불허)
+
+
+_OID = str(ObjectId())
+_NOW = utcnow()
+
+# 실제 코드와 같은 조건 생성 함수(core.queries, core.export)로 만듦 → 라우터가 바뀌면 점검도 같이 바뀜
+QUERY_SHAPES: List[QueryShape] = [
+    # router/user.py
+    QueryShape("get_all_user", "users", queries.active_users(), queries.ALL_USERS_SORT),
+    # core/user_cache.py (GET /user/{id}, /push/call, /user/phone, create_call, /call/phone)
+    QueryShape("user_cache.get_by_id", "users", queries.user_by_id(_OID)),
+    QueryShape("user_cache.get_by_phone", "users", queries.latest_user_by_phone("p"),
+               queries.LATEST_USER_SORT, limit=1),
+    QueryShape("user_cache.get_by_phone.active", "users", queries.latest_user_by_phone("p", active_only=True),
+               queries.LATEST_USER_SORT, limit=1),
+    # router/call.py
+    QueryShape("create_call.prev", "calls", queries.prev_call(_OID, "010"), queries.PREV_CALL_SORT, limit=1),
+    QueryShape("get_call_by_id", "calls", {"_id": ObjectId(_OID)}),
+    QueryShape("get_calls_by_user", "calls", queries.calls_by_user(_OID), queries.CALL_LIST_SORT),
+    QueryShape("get_calls_by_user_paginated", "calls", queries.calls_by_user(_OID),
+               queries.CALL_LIST_SORT, limit=30),
+    QueryShape("get_calls_by_user_paginated.cursor", "calls",
+               queries.calls_by_user(_OID, after=(_NOW, ObjectId(_OID))), queries.CALL_LIST_SORT, limit=31),
+    # core/export.py (/call/export, export_calls.py)
+    QueryShape("export_calls.agent", "calls", build_export_filter(agent_id="a", date_from=_NOW, date_to=_NOW)),
+    QueryShape("export_calls.user", "calls", build_export_filter(user_id=_OID, date_from=_NOW)),
+    # router/push.py, core/notify.py
+    QueryShape("push_targets", "users", queries.push_targets([ObjectId(_OID)])),
+    # core/eval_queue.py
+    QueryShape("eval_queue.claim", "calls", queries.pending_eval(), queries.EVAL_QUEUE_SORT, limit=1),
+    QueryShape("eval_queue.reclaim", "calls", queries.expired_eval(_NOW), limit=1),
+    # core/report_cache.py
+    QueryShape("report_cache.get", "report_cache", queries.report_cache_entry("k", _NOW)),
+]
+
+
+def _same_index(existing: Dict[str, Any], wanted: Dict[str, Any]) -> bool:
+    if list(existing["key"].items()) != list(wanted["key"].items()):
+        return False
+    return all(existing.get(opt) == wanted.get(opt) for opt in _COMPARED_OPTIONS)
+
+
+async def _create(collection, model: IndexModel) -> None:
+    try:
+        await collection.create_indexes([model])
+    except OperationFailure as e:
+        spec = model.document
+        if not spec.get("unique"):
+            raise
+        # 기존 데이터에 중복이 있으면 유니크 인덱스를 만들 수 없음 → 일반 인덱스로 대체
+        print(f"⚠️ 유니크 인덱스 생성 실패({spec['name']}), 기존 중복 데이터 정리 필요: {e}")
+        opts = {k: v for k, v in spec.items() if k not in ("key", "unique")}
+        await collection.create_index(list(spec["key"].items()), **opts)
+
+
+async def reconcile_indexes(database, drop_unknown: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """레지스트리와 실제 인덱스를 맞춤. 컬렉션별 생성/삭제/미등록 목록 반환"""
+    report: Dict[str, Dict[str, List[str]]] = {}
+    for coll_name, models in INDEXES.items():
+        collection = database[coll_name]
+        existing = {ix["name"]: ix async for ix in await collection.list_indexes()}
+        wanted = {m.document["name"]: m for m in models}
+        created: List[str] = []
+        dropped: List[str] = []
+        unknown = [name for name in existing if name != "_id_" and name not in wanted]
+
+        for name, model in wanted.items():
+            cur = existing.get(name)
+            if cur is not None and _same_index(cur, model.document):
+                continue
+            if cur is not None:
+                # 유니크 → 일반 인덱스로 대체된 경우는 그대로 둠 (중복 정리 전까지)
+                if model.document.get("unique") and not cur.get("unique") and \
+                        list(cur["key"].items()) == list(model.document["key"].items()):
+                    continue
+                await collection.drop_index(name)
+                dropped.append(name)
+            await _create(collection, model)
+            created.append(name)
+
+        if drop_unknown:
+            for name in unknown:
+                await collection.drop_index(name)
+                dropped.append(name)
+        elif unknown:
+            print(f"⚠️ {coll_name} 레지스트리에 없는 인덱스(삭제하지 않음): {unknown}")
+
+        if created or dropped:
+            print(f"🗂️ {coll_name} 인덱스 동기화: 생성 {created}, 삭제 {dropped}")
+        report[coll_name] = {"created": created, "dropped": dropped, "unknown": unknown}
+    return report
+
+
+def plan_stages(plan: Any) -> List[str]:
+    """explain() 결과의 winningPlan에서 모든 stage 이름 수집 (classic/SBE 모두)"""
+    stages: List[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for v in plan.values():
+            stages.extend(plan_stages(v))
+    elif isinstance(plan, list):
+        for v in plan:
+            stages.extend(plan_stages(v))
+    return stages
+
+
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+
+async def audit_query_shapes(database) -> List[Tuple[QueryShape, List[str], Set[str]]]:
+    """QUERY_SHAPES 마다 explain() → (shape, stage 목록, 문제 stage) 목록"""
+    results = []
+    for shape in QUERY_SHAPES:
+        cursor = database[shape.collection].find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        if shape.limit:
+            cursor = cursor.limit(shape.limit)
+        plan = await cursor.explain()
+        stages = plan_stages(plan["queryPlanner"]["winningPlan"])
+        bad = BAD_STAGES & set(stages)
+        if shape.allow_sort:
+            bad.discard("SORT")
+        results.append((shape, stages, bad))
+    return results
@@ -0,0 +1,12 @@
+# core/metrics.py
+"""지표 집계용 공통 함수 (/admin/metrics, 배치 스크립트)"""
+from __future__ import annotations
+from typing import Iterable, Optional
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+    """nearest-rank 백분위수 (q: 0~1). 값이 없으면 None"""
+    xs = sorted(values)
+    if not xs:
+        return None
+    return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
@@ -0,0 +1,180 @@
+# core/notify.py
+"""
+평가 완료/실패 FCM 데이터 메시지 (앱이 /call/{id} 를 폴링하지 않도록)
+
+- notify(): 평가 경로에서 호출, 바로 보내지 않고 유저별로 모아 둠
+- 유저별 디바운스: 마지막 알림 후 NOTIFY_DEBOUNCE_SEC 동안 추가 알림이 없으면 전송
+  (계속 들어와도 첫 알림 후 NOTIFY_MAX_DELAY_SEC 안에는 전송)
+- 보낼 때는 유저 여러 명의 push_token 을 한 번에 조회하고 push_service.send_each 로 묶어서 전송
+- 한 유저의 여러 건은 상태별(EVALUATION_DONE / EVALUATION_FAILED) 메시지 하나로 합침
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from firebase_admin import messaging
+
+from core.db import users
+from core.push_service import push_service, FCM_BATCH_SIZE
+from core.queries import push_targets
+
+NOTIFY_DEBOUNCE_SEC = float(os.getenv("NOTIFY_DEBOUNCE_SEC", "2"))
+NOTIFY_MAX_DELAY_SEC = float(os.getenv("NOTIFY_MAX_DELAY_SEC", "10"))
+
+MESSAGE_TYPES = {"done": "EVALUATION_DONE", "failed": "EVALUATION_FAILED"}
+
+
+class _Pending:
+    __slots__ = ("first_at", "last_at", "items")
+
+    def __init__(self, now: float):
+        self.first_at = now
+        self.last_at = now
+        self.items: List[Tuple[str, str]] = []  # (call_id, status)
+
+
+def build_data(status: str, call_ids: List[str]) -> Dict[str, str]:
+    """FCM data 페이로드 (값은 모두 문자열이어야 함)"""
+    return {
+        "type": MESSAGE_TYPES[status],
+        "callId": call_ids[-1],           # 가장 최근 건
+        "callIds": ",".join(call_ids),
+        "count": str(len(call_ids)),
+    }
+
+
+class EvalNotifier:
+    def __init__(self, users, debounce_sec: float = NOTIFY_DEBOUNCE_SEC,
+                 max_delay_sec: float = NOTIFY_MAX_DELAY_SEC):
+        self.users = users
+        self.debounce_sec = debounce_sec
+        self.max_delay_sec = max_delay_sec
+        self._pending: Dict[str, _Pending] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.skipped_no_token = 0
+
+    def notify(self, user_id: Optional[str], call_id: str, status: str) -> None:
+        if not user_id or status not in MESSAGE_TYPES:
+            return
+        now = time.monotonic()
+        p = self._pending.get(user_id)
+        if p is None:
+            p = self._pending[user_id] = _Pending(now)
+        p.last_at = now
+        p.items.append((call_id, status))
+        self.queued += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _due(self, now: float) -> List[str]:
+        return [
+            uid for uid, p in self._pending.items()
+            if now - p.last_at >= self.debounce_sec or now - p.first_at >= self.max_delay_sec
+        ]
+
+    def _next_deadline(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return min(min(p.last_at + self.debounce_sec, p.first_at + self.max_delay_sec)
+                   for p in self._pending.values())
+
+    async def flush(self, user_ids: Optional[List[str]] = None) -> int:
+        """대상 유저(없으면 전체)의 모인 알림을 전송. 보낸 메시지 수 반환"""
+        ids = list(self._pending) if user_ids is None else user_ids
+        batch = {uid: self._pending.pop(uid) for uid in ids if uid in self._pending}
+        if not batch:
+            return 0
+
+        oids = [ObjectId(uid) for uid in batch if ObjectId.is_valid(uid)]
+        tokens: Dict[str, str] = {}
+        async for u in self.users.find(push_targets(oids), projection={"push_token": 1}):
+            tokens[str(u["_id"])] = u["push_token"]
+
+        messages: List[Tuple[str, Dict[str, str]]] = []
+        for uid, p in batch.items():
+            token = tokens.get(uid)
+            if not token:
+                self.skipped_no_token += len(p.items)
+                continue
+            by_status: Dict[str, List[str]] = {}
+            for call_id, status in p.items:
+                by_status.setdefault(status, []).append(call_id)
+            for status, call_ids in by_status.items():
+                messages.append((token, build_data(status, call_ids)))
+
+        sent = 0
+        for i in range(0, len(messages), FCM_BATCH_SIZE):
+            sent += await self._send(messages[i:i + FCM_BATCH_SIZE])
+        return sent
+
+    async def _send(self, chunk: List[Tuple[str, Dict[str, str]]]) -> int:
+        msgs = [messaging.Message(data=data, token=token,
+                                  android=messaging.AndroidConfig(priority="high"))
+                for token, data in chunk]
+        try:
+            result = await push_service.send_each(msgs)
+        except Exception as e:
+            print(f"⚠️ 평가 알림 전송 실패 ({len(msgs)}건): {e}")
+            self.failed += len(msgs)
+            return 0
+        self.batches += 1
+        self.sent += result.success
+        self.failed += result.failure
+        return result.success
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            deadline = self._next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            due = self._due(time.monotonic())
+            if due:
+                try:
+                    await self.flush(due)
+                except Exception as e:
+                    print(f"⚠️ 평가 알림 처리 오류: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """종료 시 남은 알림은 바로 전송"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"⚠️ 남은 평가 알림 전송 실패: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_users": len(self._pending),
+            "pending": sum(len(p.items) for p in self._pending.values()),
+            "queued": self.queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "skipped_no_token": self.skipped_no_token,
+        }
+
+
+eval_notifier = EvalNotifier(users)
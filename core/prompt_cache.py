@@ -0,0 +1,146 @@
+# core/prompt_cache.py
+"""
+LangSmith 프롬프트(+모델 체인) 프로세스 전역 캐시.
+
+- 키: (프롬프트 이름, include_model) → 현재 커밋 해시와 체인을 보관
+- TTL이 지나면 요청은 기존 체인으로 바로 응답하고, 백그라운드 스레드에서 갱신
+- 갱신 실패 시 마지막으로 성공한 버전을 계속 사용
+- LANGSMITH_PROMPT_COMMIT 으로 특정 커밋에 고정(pin) 가능 → 고정 시 갱신하지 않음
+"""
+from __future__ import annotations
+import os
+import time
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+PROMPT_TTL_SEC = float(os.getenv("LANGSMITH_PROMPT_TTL_SEC", "300"))
+PROMPT_COMMIT = os.getenv("LANGSMITH_PROMPT_COMMIT") or None  # 예: "a1b2c3d4"
+
+
+@dataclass
+class _Entry:
+    commit: Optional[str]
+    chain: Any
+    loaded_at: float
+
+
+class PromptCache:
+    def __init__(self, ttl_sec: float = PROMPT_TTL_SEC, pinned_commit: Optional[str] = PROMPT_COMMIT):
+        self.ttl_sec = ttl_sec
+        self.pinned_commit = pinned_commit
+        self._client = None
+        self._entries: Dict[Tuple[str, bool], _Entry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, bool], threading.Lock] = {}
+        self._refreshing: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_error: Optional[str] = None
+
+    # --- 내부 유틸 ---
+    def _get_client(self):
+        if self._client is None:
+            from langsmith import Client
+            self._client = Client()
+        return self._client
+
+    def _key_lock(self, key: Tuple[str, bool]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _identifier(self, name: str) -> str:
+        if self.pinned_commit and ":" not in name:
+            return f"{name}:{self.pinned_commit}"
+        return name
+
+    def _load(self, name: str, include_model: bool, current: Optional[_Entry]) -> _Entry:
+        """커밋 해시를 먼저 확인하고, 바뀐 경우에만 체인을 새로 만든다."""
+        client = self._get_client()
+        identifier = self._identifier(name)
+        commit = client.pull_prompt_commit(identifier)
+        commit_hash = getattr(commit, "commit_hash", None)
+        if current is not None and commit_hash and commit_hash == current.commit:
+            return _Entry(current.commit, current.chain, time.monotonic())
+
+        base = identifier.split(":", 1)[0]
+        target = f"{base}:{commit_hash}" if commit_hash else identifier
+        chain = client.pull_prompt(target, include_model=include_model)
+        return _Entry(commit_hash, chain, time.monotonic())
+
+    def _refresh(self, key: Tuple[str, bool]) -> None:
+        name, include_model = key
+        try:
+            with self._key_lock(key):
+                current = self._entries.get(key)
+                entry = self._load(name, include_model, current)
+                self._entries[key] = entry
+                self.refreshes += 1
+                if current is not None and current.commit != entry.commit:
+                    print(f"🔄 LangSmith 프롬프트 갱신: {name} {current.commit} → {entry.commit}")
+        except Exception as e:
+            # 실패하면 마지막 정상 버전 유지 (loaded_at을 늦춰 곧바로 재시도하지 않도록)
+            self.refresh_errors += 1
+            self.last_error = str(e)
+            current = self._entries.get(key)
+            if current is not None:
+                current.loaded_at = time.monotonic()
+            print(f"⚠️ LangSmith 프롬프트 갱신 실패({name}), 이전 버전 사용: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_in_background(self, key: Tuple[str, bool]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+
+    # --- 공개 API ---
+    def get(self, name: str, include_model: bool = True) -> Any:
+        """캐시된 프롬프트/체인 반환. 최초 요청만 동기 로딩."""
+        key = (name, include_model)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            if not self.pinned_commit and time.monotonic() - entry.loaded_at > self.ttl_sec:
+                self._refresh_in_background(key)
+            return entry.chain
+
+        self.misses += 1
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(name, include_model, None)
+                self._entries[key] = entry
+        return entry.chain
+
+    def version(self, name: str, include_model: bool = True) -> Optional[str]:
+        """현재 캐시된 커밋 해시 (없으면 None)"""
+        entry = self._entries.get((name, include_model))
+        return entry.commit if entry else None
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key[0] == name:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "last_error": self.last_error,
+            "pinned_commit": self.pinned_commit,
+            "versions": {f"{k[0]}|model={k[1]}": e.commit for k, e in self._entries.items()},
+        }
+
+
+prompt_cache = PromptCache()
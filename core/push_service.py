@@ -0,0 +1,124 @@
+# core/push_service.py
+"""
+FCM 전송 서비스 (비동기)
+
+- firebase_admin.messaging 의 동기 전송을 스레드에서 실행해 이벤트 루프를 막지 않음
+- 여러 건은 send_each / send_each_for_multicast 로 500건씩 묶어서 전송
+- 토큰별 실패 중 만료/미등록/잘못된 토큰은 users.push_token 에서 자동 정리
+"""
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import exceptions as fb_exceptions
+from firebase_admin import messaging
+
+from core.db import users
+from core.user_cache import user_cache
+
+FCM_BATCH_SIZE = 500  # FCM 배치 전송 최대 건수
+
+
+def is_invalid_token_error(exc: Optional[Exception]) -> bool:
+    """다시 보내도 소용없는 토큰 오류인지 (만료/삭제/다른 프로젝트/형식 오류)"""
+    if isinstance(exc, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+        return True
+    if isinstance(exc, fb_exceptions.InvalidArgumentError):
+        return "registration token" in str(exc).lower()
+    return False
+
+
+@dataclass
+class PushResult:
+    success: int = 0
+    failure: int = 0
+    pruned: int = 0
+    message_ids: List[Optional[str]] = field(default_factory=list)  # 요청 순서대로 (실패는 None)
+    errors: Dict[str, str] = field(default_factory=dict)            # token → 오류
+
+    def merge(self, other: "PushResult") -> None:
+        self.success += other.success
+        self.failure += other.failure
+        self.pruned += other.pruned
+        self.message_ids.extend(other.message_ids)
+        self.errors.update(other.errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"success": self.success, "failure": self.failure, "pruned": self.pruned,
+                "errors": self.errors}
+
+
+class PushService:
+    def __init__(self, users_collection):
+        self.users = users_collection
+        self.sent = 0
+        self.failed = 0
+        self.pruned = 0
+        self.batches = 0
+
+    async def prune_tokens(self, tokens: List[str]) -> int:
+        if not tokens:
+            return 0
+        res = await self.users.update_many({"push_token": {"$in": tokens}}, {"$set": {"push_token": None}})
+        user_cache.invalidate_tokens(tokens)
+        if res.modified_count:
+            print(f"🧹 만료/잘못된 푸시 토큰 {res.modified_count}개 정리")
+        self.pruned += res.modified_count
+        return res.modified_count
+
+    async def _collect(self, tokens: List[str], responses) -> PushResult:
+        result = PushResult()
+        invalid: List[str] = []
+        for token, r in zip(tokens, responses):
+            result.message_ids.append(r.message_id if r.success else None)
+            if r.success:
+                result.success += 1
+                continue
+            result.failure += 1
+            result.errors[token] = str(r.exception)
+            if is_invalid_token_error(r.exception):
+                invalid.append(token)
+        result.pruned = await self.prune_tokens(invalid)
+        self.batches += 1
+        self.sent += result.success
+        self.failed += result.failure
+        return result
+
+    async def send(self, message: messaging.Message) -> str:
+        """단건 전송. 토큰 오류면 토큰 정리 후 예외 그대로 전달"""
+        try:
+            message_id = await asyncio.to_thread(messaging.send, message)
+        except Exception as e:
+            self.failed += 1
+            if message.token and is_invalid_token_error(e):
+                await self.prune_tokens([message.token])
+            raise
+        self.sent += 1
+        return message_id
+
+    async def send_each(self, messages: List[messaging.Message]) -> PushResult:
+        """메시지마다 payload 가 다를 때 (500건씩 send_each)"""
+        result = PushResult()
+        for i in range(0, len(messages), FCM_BATCH_SIZE):
+            chunk = messages[i:i + FCM_BATCH_SIZE]
+            resp = await asyncio.to_thread(messaging.send_each, chunk)
+            result.merge(await self._collect([m.token for m in chunk], resp.responses))
+        return result
+
+    async def send_multicast(self, tokens: List[str], data: Optional[Dict[str, str]] = None,
+                             notification: Optional[messaging.Notification] = None) -> PushResult:
+        """같은 payload 를 여러 토큰에 (500개씩 send_each_for_multicast)"""
+        result = PushResult()
+        for i in range(0, len(tokens), FCM_BATCH_SIZE):
+            chunk = tokens[i:i + FCM_BATCH_SIZE]
+            msg = messaging.MulticastMessage(tokens=chunk, data=data, notification=notification)
+            resp = await asyncio.to_thread(messaging.send_each_for_multicast, msg)
+            result.merge(await self._collect(chunk, resp.responses))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sent": self.sent, "failed": self.failed, "pruned": self.pruned, "batches": self.batches}
+
+
+push_service = PushService(users)
@@ -0,0 +1,85 @@
+# core/queries.py
+"""
+라우터/캐시/큐가 Mongo 에 보내는 조회 조건(filter)과 정렬을 만드는 함수 모음.
+
+실제 코드와 core.indexes.QUERY_SHAPES(→ tests/test_indexes.py explain 검사)가
+같은 함수를 쓰므로, 조회 조건을 바꾸면 인덱스 점검도 같이 따라간다.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+
+Sort = List[Tuple[str, int]]
+
+LATEST_USER_SORT: Sort = [("created_at", -1), ("_id", -1)]
+ALL_USERS_SORT: Sort = [("created_at", -1)]
+CALL_LIST_SORT: Sort = [("created_at", -1), ("_id", -1)]
+PREV_CALL_SORT: Sort = [("call_count", -1)]
+EVAL_QUEUE_SORT: Sort = [("created_at", 1)]
+
+ACTIVE_EVAL_STATUSES = ["running", "retrying"]
+
+# is_deleted 가 없는 예전/수동 입력 문서도 삭제되지 않은 유저로 취급
+NOT_DELETED: Dict[str, Any] = {"is_deleted": {"$ne": True}}
+
+
+# --- users ---
+
+def active_users() -> Dict[str, Any]:
+    """GET /user"""
+    return dict(NOT_DELETED)
+
+
+def user_by_id(user_id: str) -> Dict[str, Any]:
+    """user_cache.get_by_id (삭제 여부는 캐시에서 확인)"""
+    return {"_id": ObjectId(user_id)}
+
+
+def latest_user_by_phone(phone_id: str, active_only: bool = False) -> Dict[str, Any]:
+    """user_cache.get_by_phone: LATEST_USER_SORT 로 1건"""
+    query: Dict[str, Any] = {"phone_id": phone_id}
+    if active_only:
+        query.update(NOT_DELETED)
+    return query
+
+
+def push_targets(user_oids: Sequence[ObjectId]) -> Dict[str, Any]:
+    """/push/bulk, 평가 완료 알림: 삭제되지 않았고 토큰이 있는 유저"""
+    return {"_id": {"$in": list(user_oids)}, **NOT_DELETED, "push_token": {"$nin": [None, ""]}}
+
+
+# --- calls ---
+
+def prev_call(user_id: str, customer_num: str) -> Dict[str, Any]:
+    """create_call: PREV_CALL_SORT 로 직전 통화 1건"""
+    return {"user_id": user_id, "customer_num": customer_num}
+
+
+def calls_by_user(user_id: str, after: Optional[Tuple[datetime, ObjectId]] = None) -> Dict[str, Any]:
+    """유저별 통화 목록 (CALL_LIST_SORT). after=(created_at, _id) 면 그 문서보다 오래된 것만 (keyset)"""
+    query: Dict[str, Any] = {"user_id": user_id}
+    if after is not None:
+        created_at, last_id = after
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+    return query
+
+
+def pending_eval() -> Dict[str, Any]:
+    """평가 큐 선점: EVAL_QUEUE_SORT 로 가장 오래된 pending"""
+    return {"evaluation_status": "pending"}
+
+
+def expired_eval(now: datetime) -> Dict[str, Any]:
+    """평가 큐 회수: 리스가 만료된 running/retrying"""
+    return {"evaluation_status": {"$in": ACTIVE_EVAL_STATUSES}, "evaluation_lease_until": {"$lt": now}}
+
+
+# --- report_cache ---
+
+def report_cache_entry(key: str, now: datetime) -> Dict[str, Any]:
+    return {"_id": key, "expires_at": {"$gt": now}}
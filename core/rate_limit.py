@@ -0,0 +1,153 @@
+# core/rate_limit.py
+"""
+Gemini 평가 호출 앞단의 전역 리미터.
+
+- 동시 실행 상한(semaphore)
+- 분당 요청 수 / 분당 바이트 수 토큰 버킷
+- 대기열 상한(back-pressure): 가득 차면 LimiterFull
+  대기열에 들어올 수 있는 건 평가 워커(EVAL_WORKERS) 수만큼이므로 기본 상한은 워커 수에서 유도
+- 429 / RESOURCE_EXHAUSTED 가 보이면 속도를 절반으로 낮추고, 성공이 이어지면 천천히 회복
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "4"))
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_BYTES_PER_MIN = float(os.getenv("GEMINI_BYTES_PER_MIN", str(200 * 1024 * 1024)))
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "4"))
+# 동시 실행 슬롯을 넘는 워커 수만큼만 대기 허용 (최소 1) → 포화되면 워커가 새 작업을 잡지 않음
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", str(max(1, EVAL_WORKERS - GEMINI_MAX_IN_FLIGHT))))
+
+
+class LimiterFull(Exception):
+    """대기열이 가득 차서 더 이상 요청을 받을 수 없음"""
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    msg = f"{type(exc).__name__}: {exc}"
+    return "429" in msg or "RESOURCE_EXHAUSTED" in msg or "ResourceExhausted" in msg
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.per_minute = per_minute
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float, factor: float) -> None:
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.per_minute / 60.0 * factor)
+
+    def wait_time(self, amount: float, now: float, factor: float = 1.0) -> float:
+        """amount 만큼 꺼내려면 몇 초 기다려야 하는지 (0이면 즉시 가능)"""
+        self._refill(now, factor)
+        amount = min(amount, self.capacity)  # 버킷보다 큰 요청이 영원히 막히지 않도록
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / (self.per_minute * factor)
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class EvalLimiter:
+    def __init__(self, max_in_flight: int = GEMINI_MAX_IN_FLIGHT, rpm: float = GEMINI_RPM,
+                 bytes_per_min: float = GEMINI_BYTES_PER_MIN, max_queue: int = GEMINI_MAX_QUEUE,
+                 min_factor: float = 0.1):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.min_factor = min_factor
+        self.requests = TokenBucket(rpm)
+        self.bytes = TokenBucket(bytes_per_min)
+        self.factor = 1.0  # 적응형 감속 배율 (1.0 = 정상 속도)
+        self._sem = asyncio.Semaphore(max_in_flight)
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.total_acquired = 0
+        self.total_rejected = 0
+        self.total_throttled = 0
+        self.total_wait_sec = 0.0
+        self.last_wait_sec = 0.0
+
+    def has_capacity(self) -> bool:
+        return self.waiting < self.max_queue
+
+    async def _take_tokens(self, nbytes: int) -> None:
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    self.requests.wait_time(1, now, self.factor),
+                    self.bytes.wait_time(nbytes, now, self.factor),
+                )
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.bytes.consume(nbytes)
+                    return
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self, nbytes: int = 0):
+        """async with limiter.slot(len(audio)): ... 형태로 사용"""
+        if self.waiting >= self.max_queue:
+            self.total_rejected += 1
+            raise LimiterFull(f"평가 대기열이 가득 찼습니다 (waiting={self.waiting})")
+
+        self.waiting += 1
+        t0 = time.monotonic()
+        acquired = False
+        try:
+            await self._sem.acquire()
+            acquired = True
+            await self._take_tokens(max(0, int(nbytes or 0)))
+        except BaseException:
+            if acquired:
+                self._sem.release()
+            raise
+        finally:
+            self.waiting -= 1
+            self.last_wait_sec = time.monotonic() - t0
+
+        self.total_wait_sec += self.last_wait_sec
+        self.total_acquired += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+
+    def report_throttled(self) -> None:
+        """429 계열 에러: 속도 절반으로 (multiplicative decrease)"""
+        self.total_throttled += 1
+        self.factor = max(self.min_factor, self.factor * 0.5)
+        print(f"⚠️ Gemini rate limit 감지 → 속도 배율 {self.factor:.2f}")
+
+    def report_success(self) -> None:
+        """성공 시 조금씩 회복 (additive increase)"""
+        if self.factor < 1.0:
+            self.factor = min(1.0, self.factor + 0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "rate_factor": round(self.factor, 3),
+            "acquired": self.total_acquired,
+            "rejected": self.total_rejected,
+            "throttled": self.total_throttled,
+            "last_wait_sec": round(self.last_wait_sec, 3),
+            "avg_wait_sec": round(self.total_wait_sec / self.total_acquired, 3) if self.total_acquired else None,
+        }
+
+
+gemini_limiter = EvalLimiter()
@@ -0,0 +1,103 @@
+# core/report_cache.py
+"""
+오디오 내용 해시 기반 평가 결과(report) 캐시.
+
+키 = (오디오 SHA-256, 프롬프트 버전(커밋 해시), 이전 report 텍스트의 SHA-256)
+같은 녹음을 다시 올리거나 재시도할 때 Gemini 호출 없이 기존 report를 재사용한다.
+- TTL: expires_at TTL 인덱스로 Mongo가 자동 삭제
+- 조회는 키에 들어간 프롬프트 버전으로만 맞춤 → 이전 버전 항목은 TTL로 만료
+  (롤링 배포 중 구/신 버전 프로세스가 서로의 항목을 지우지 않도록 자동 삭제는 하지 않음,
+   정리가 필요하면 DELETE /admin/report-cache 로 명시적으로)
+- 키의 프롬프트 버전은 Gemini 오디오 프롬프트 기준 → Gemini 가 만든 report 만 저장
+  (failover/헤지로 다른 provider 가 만든 report 가 Gemini 결과처럼 재사용되지 않도록)
+"""
+from __future__ import annotations
+import os
+import hashlib
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from core.db import report_cache as report_cache_col
+from core.queries import report_cache_entry
+from schema.common import utcnow
+
+REPORT_CACHE_TTL_SEC = int(os.getenv("REPORT_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+REPORT_CACHE_PROVIDER = "gemini"  # 캐시 키(gemini_service.current_prompt_version)를 계산한 평가 provider
+
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def cache_key(audio_sha256: str, prompt_version: str, prev_report_text: str) -> str:
+    return f"{audio_sha256}:{prompt_version}:{_sha256_text(prev_report_text)}"
+
+
+class ReportCache:
+    def __init__(self, collection, ttl_sec: int = REPORT_CACHE_TTL_SEC, provider: str = REPORT_CACHE_PROVIDER):
+        self.collection = collection
+        self.ttl_sec = ttl_sec
+        self.provider = provider
+        self._seen_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.skipped_provider = 0
+        self.invalidated = 0
+
+    async def get(self, audio_sha256: str, prompt_version: str, prev_report_text: str) -> Optional[Dict[str, Any]]:
+        self._seen_version = prompt_version
+        doc = await self.collection.find_one(
+            report_cache_entry(cache_key(audio_sha256, prompt_version, prev_report_text), utcnow()),
+            projection={"report": 1},
+        )
+        if doc and doc.get("report"):
+            self.hits += 1
+            return doc["report"]
+        self.misses += 1
+        return None
+
+    async def put(self, audio_sha256: str, prompt_version: str, prev_report_text: str,
+                  report: Dict[str, Any], provider: Optional[str] = REPORT_CACHE_PROVIDER) -> bool:
+        """저장했으면 True. 키를 계산한 provider 가 아닌 쪽이 만든 report 는 저장하지 않음"""
+        if provider != self.provider:
+            self.skipped_provider += 1
+            return False
+        now = utcnow()
+        await self.collection.update_one(
+            {"_id": cache_key(audio_sha256, prompt_version, prev_report_text)},
+            {"$set": {
+                "audio_sha256": audio_sha256,
+                "prompt_version": prompt_version,
+                "provider": provider,
+                "report": report,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl_sec),
+            }},
+            upsert=True,
+        )
+        self.puts += 1
+        return True
+
+    async def invalidate(self, keep_version: Optional[str] = None) -> int:
+        """keep_version 이외 버전의 항목 삭제 (None이면 전체 삭제)"""
+        query = {"prompt_version": {"$ne": keep_version}} if keep_version else {}
+        res = await self.collection.delete_many(query)
+        self.invalidated += res.deleted_count
+        return res.deleted_count
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "puts": self.puts,
+            "skipped_provider": self.skipped_provider,
+            "invalidated": self.invalidated,
+            "prompt_version": self._seen_version,
+            "ttl_sec": self.ttl_sec,
+        }
+
+
+report_cache = ReportCache(report_cache_col)
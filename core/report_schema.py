@@ -0,0 +1,284 @@
+# core/report_schema.py
+"""
+평가 결과(Report) 구조화 출력 + 로컬 보정
+
+- report_json_schema: schema.call.Report 로 만든 Gemini 응답 스키마 (response_json_schema 용)
+  criteria 는 고정 키(CriteriaKey)를 속성으로 펼치고, $ref 는 인라인
+- parse_report: 체인 결과(str / AIMessage / dict) → Report
+  JSON 추출(코드펜스, 앞뒤 설명문) → 키 별칭 / bool / 점수 보정 → 검증
+  고칠 수 있는 응답은 여기서 고쳐서 멀티모달 재실행(재시도)을 피함
+"""
+from __future__ import annotations
+import re
+import copy
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, get_args
+
+from pydantic import BaseModel, ValidationError
+
+from schema.call import Report, CriteriaDetail, CriteriaKey
+
+CRITERIA_KEYS: Tuple[str, ...] = get_args(CriteriaKey)
+
+# 프롬프트/예전 응답에서 쓰던 이름 → CriteriaKey (공백만 다른 경우는 자동으로 맞춤)
+CRITERIA_ALIASES = {
+    "용도나 구매시기": "용도 및 구매시기",
+    "용도/구매시기": "용도 및 구매시기",
+    "고객 물음에 대한 적극 응대": "적극적 응대",
+    "고객 문의 적극 응대": "적극적 응대",
+    "차량에 대한 안내": "차량안내",
+    "결제 수단": "결제방법",
+    "방문 일정": "방문일시",
+    "인사말": "인사",
+}
+REPORT_KEY_ALIASES = {
+    "keywords": "keyword",
+    "todo": "todo_list",
+    "todos": "todo_list",
+    "conversation": "conversation_list",
+    "conversations": "conversation_list",
+    "valid": "is_valid",
+    "score": "overall_score",
+}
+SPEAKER_ALIASES = {
+    "agent": "agent", "상담원": "agent", "상담사": "agent", "직원": "agent", "딜러": "agent",
+    "customer": "customer", "고객": "customer", "client": "customer", "user": "customer",
+}
+_TRUE = {"true", "t", "yes", "y", "1", "예", "네", "유효", "o"}
+_FALSE = {"false", "f", "no", "n", "0", "아니오", "아니요", "무효", "x", "none", "null", ""}
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class ReportParseError(ValueError):
+    """보정으로도 Report 를 만들 수 없는 응답 (재시도 대상)"""
+
+
+# --- 생성용 JSON 스키마 ---
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(copy.deepcopy(defs[node["$ref"].rsplit("/", 1)[-1]]), defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items() if k not in ("title", "default")}
+    if isinstance(node, list):
+        return [_inline_refs(v, defs) for v in node]
+    return node
+
+
+@lru_cache(maxsize=1)
+def report_json_schema() -> Dict[str, Any]:
+    schema = Report.model_json_schema()
+    defs = schema.pop("$defs", {})
+    schema = _inline_refs(schema, defs)
+    detail = _inline_refs(CriteriaDetail.model_json_schema(), {})
+    # Dict[Literal, ...] (propertyNames) 대신 고정 키 9개를 모두 채우도록
+    schema["properties"]["criteria"] = {
+        "type": "object",
+        "properties": {key: detail for key in CRITERIA_KEYS},
+        "required": list(CRITERIA_KEYS),
+    }
+    return schema
+
+
+# --- 응답 → dict ---
+
+def _text_of(raw: Any) -> Any:
+    """AIMessage / content block 리스트 → 문자열 (dict 는 그대로)"""
+    content = getattr(raw, "content", raw)
+    if isinstance(content, list):
+        parts = [b if isinstance(b, str) else b.get("text", "") for b in content
+                 if isinstance(b, str) or (isinstance(b, dict) and b.get("type", "text") == "text")]
+        return "".join(parts)
+    return content
+
+
+def extract_json(raw: Any) -> Dict[str, Any]:
+    if isinstance(raw, BaseModel) and not hasattr(raw, "content"):  # 메시지 객체는 content 로
+        return raw.model_dump()
+    data = _text_of(raw)
+    if isinstance(data, dict):
+        return data
+    if not isinstance(data, (str, bytes)):
+        raise ReportParseError(f"지원하지 않는 응답 형식: {type(data).__name__}")
+    text = data.decode("utf-8") if isinstance(data, bytes) else data
+    text = _FENCE.sub("", text.strip())
+    try:
+        obj = json.loads(text)
+    except json.JSONDecodeError:
+        # 앞뒤에 설명문이 붙은 경우: 가장 바깥 { ... } 만
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            raise ReportParseError("응답에서 JSON 객체를 찾지 못함")
+        try:
+            obj = json.loads(text[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise ReportParseError(f"JSON 파싱 실패: {e}") from e
+    if isinstance(obj, str):  # JSON 문자열 안에 JSON 이 한 번 더 들어간 경우
+        return extract_json(obj)
+    if not isinstance(obj, dict):
+        raise ReportParseError(f"JSON 최상위가 객체가 아님: {type(obj).__name__}")
+    return obj
+
+
+# --- 보정 ---
+
+def _squash(s: str) -> str:
+    return re.sub(r"\s+", "", s)
+
+
+_CRITERIA_BY_SQUASHED = {_squash(k): k for k in CRITERIA_KEYS}
+_CRITERIA_BY_SQUASHED.update({_squash(a): k for a, k in CRITERIA_ALIASES.items()})
+
+
+def criteria_key(name: str) -> Optional[str]:
+    return _CRITERIA_BY_SQUASHED.get(_squash(str(name)))
+
+
+def coerce_bool(value: Any) -> Any:
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str):
+        s = value.strip().lower()
+        if s in _TRUE:
+            return True
+        if s in _FALSE:
+            return False
+    return value
+
+
+def coerce_score(value: Any) -> Any:
+    """85 / 85.4 / "85" / "85점" → 0~100 정수 (숫자가 아니면 그대로 두고 검증에서 실패)"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        m = _NUMBER.search(value)
+        if not m:
+            return value
+        value = float(m.group())
+    if isinstance(value, (int, float)):
+        return max(0, min(100, int(round(value))))
+    return value
+
+
+def _str_list(value: Any) -> Any:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [s.strip() for s in re.split(r"[,\n]", value) if s.strip()]
+    if isinstance(value, list):
+        return [v if isinstance(v, str) else json.dumps(v, ensure_ascii=False) for v in value if v is not None]
+    return value
+
+
+def normalize_report_payload(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """모델 응답 dict 를 Report 에 맞게 보정. (보정된 dict, 적용한 보정 목록)"""
+    repairs: List[str] = []
+    out: Dict[str, Any] = {}
+    for key, value in data.items():
+        canon = REPORT_KEY_ALIASES.get(key, key)
+        if canon != key:
+            if canon in data:
+                continue
+            repairs.append(f"key:{key}->{canon}")
+        out[canon] = value
+
+    if "is_valid" in out:
+        fixed = coerce_bool(out["is_valid"])
+        if fixed is not out["is_valid"]:
+            repairs.append("is_valid:bool")
+        out["is_valid"] = fixed
+
+    if "overall_score" in out:
+        fixed = coerce_score(out["overall_score"])
+        if fixed != out["overall_score"] or type(fixed) is not type(out["overall_score"]):
+            repairs.append("overall_score:clamp")
+        out["overall_score"] = fixed
+
+    for key in ("keyword", "todo_list"):
+        if key in out and not isinstance(out[key], list):
+            out[key] = _str_list(out[key])
+            repairs.append(f"{key}:list")
+
+    turns = out.get("conversation_list")
+    if turns is None and "conversation_list" in out:
+        out["conversation_list"] = []
+    elif isinstance(turns, list):
+        fixed_turns = []
+        for i, t in enumerate(turns):
+            if not isinstance(t, dict) or not t.get("text"):
+                repairs.append("conversation_list:drop")
+                continue
+            t = dict(t)
+            role = SPEAKER_ALIASES.get(str(t.get("speaker_role", "")).strip().lower())
+            if role and role != t.get("speaker_role"):
+                t["speaker_role"] = role
+                repairs.append("conversation_list:speaker_role")
+            turn = coerce_score(t.get("turn")) if t.get("turn") is not None else i
+            t["turn"] = turn if isinstance(turn, int) else i
+            fixed_turns.append(t)
+        out["conversation_list"] = fixed_turns
+
+    criteria = out.get("criteria")
+    if isinstance(criteria, dict):
+        fixed_criteria: Dict[str, Any] = {}
+        for name, detail in criteria.items():
+            key = criteria_key(name)
+            if key is None:
+                repairs.append(f"criteria:drop:{name}")
+                continue
+            if key != name:
+                repairs.append(f"criteria:{name}->{key}")
+            if key in fixed_criteria:
+                continue
+            if isinstance(detail, (int, float, str)):  # {"인사": 80} 처럼 점수만 온 경우
+                detail = {"score": detail}
+                repairs.append(f"criteria:{key}:score_only")
+            if isinstance(detail, dict):
+                detail = dict(detail)
+                if "score" in detail:
+                    fixed = coerce_score(detail["score"])
+                    if fixed != detail["score"] or type(fixed) is not type(detail["score"]):
+                        repairs.append(f"criteria:{key}:score")
+                    detail["score"] = fixed
+                if "evidence" in detail and not isinstance(detail["evidence"], list):
+                    detail["evidence"] = _str_list(detail["evidence"])
+                    repairs.append(f"criteria:{key}:evidence")
+            fixed_criteria[key] = detail
+        out["criteria"] = fixed_criteria
+
+    return out, repairs
+
+
+class ParseStats:
+    def __init__(self):
+        self.parsed = 0
+        self.repaired = 0  # 보정 후 통과 (재시도 한 번 아낌)
+        self.failed = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"parsed": self.parsed, "repaired": self.repaired, "failed": self.failed}
+
+
+parse_stats = ParseStats()
+
+
+def parse_report(raw: Any) -> Report:
+    try:
+        data, repairs = normalize_report_payload(extract_json(raw))
+        report = Report.model_validate(data)
+    except ReportParseError:
+        parse_stats.failed += 1
+        raise
+    except ValidationError as e:
+        parse_stats.failed += 1
+        raise ReportParseError(f"Report 검증 실패: {e.error_count()}건 {e.errors()[0]['loc']}") from e
+    parse_stats.parsed += 1
+    if repairs:
+        parse_stats.repaired += 1
+        print(f"🩹 평가 응답 보정: {', '.join(repairs[:10])}{' ...' if len(repairs) > 10 else ''}")
+    return report
@@ -0,0 +1,138 @@
+# core/retry.py
+"""
+평가 재시도 정책: 오류 분류 + 분류별 재시도 예산 + jitter 백오프
+
+- transient:  네트워크 끊김/타임아웃/5xx → 짧은 간격으로 몇 번
+- rate_limit: 429 / RESOURCE_EXHAUSTED / 리미터 대기열 초과 → 길게 기다리고 예산 넉넉히
+- validation: 응답을 Report 로 만들 수 없음 → 추론만 다시 (대기 짧게, 1~2번)
+- permanent:  오디오 없음/인증/잘못된 요청/설정 누락 → 기다리지 않고 바로 실패
+
+백오프는 full jitter: uniform(0, min(cap, base * 2^n)) → 같은 순간 실패한 작업들이 동시에 다시 몰리지 않음
+"""
+from __future__ import annotations
+import os
+import re
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
+
+from core.rate_limit import LimiterFull, is_rate_limited
+from core.report_schema import ReportParseError
+
+TRANSIENT = "transient"
+RATE_LIMIT = "rate_limit"
+VALIDATION = "validation"
+PERMANENT = "permanent"
+
+# 다시 보내도 결과가 같은 요청 오류 (Google API status / HTTP 4xx)
+_PERMANENT_STATUS = re.compile(
+    r"INVALID_ARGUMENT|PERMISSION_DENIED|UNAUTHENTICATED|API_KEY_INVALID|FAILED_PRECONDITION|NOT_FOUND"
+)
+_PERMANENT_S3_CODES = {"NoSuchKey", "NoSuchBucket", "AccessDenied", "InvalidAccessKeyId", "SignatureDoesNotMatch"}
+_PERMANENT_HTTP = {400, 401, 403, 404, 405, 410, 413, 415, 422}
+
+
+class PermanentError(RuntimeError):
+    """재시도해도 소용없는 오류 (설정 누락, 입력 자체가 잘못됨 등)"""
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def classify_error(exc: BaseException) -> str:
+    if isinstance(exc, PermanentError):
+        return PERMANENT
+    if isinstance(exc, (ReportParseError, ValidationError)):
+        return VALIDATION
+    if isinstance(exc, LimiterFull) or is_rate_limited(exc):
+        return RATE_LIMIT
+    if type(exc).__name__ == "S3Error" and getattr(exc, "code", None) in _PERMANENT_S3_CODES:
+        return PERMANENT
+    if isinstance(exc, FileNotFoundError):
+        return PERMANENT
+
+    status = _status_code(exc)
+    if status is not None:
+        if status in (408, 425, 429) or status >= 500:
+            return RATE_LIMIT if status == 429 else TRANSIENT
+        if status in _PERMANENT_HTTP:
+            return PERMANENT
+    if _PERMANENT_STATUS.search(f"{exc}"):
+        return PERMANENT
+    # 연결 오류/타임아웃/알 수 없는 오류는 일시적인 것으로 보고 재시도
+    return TRANSIENT
+
+
+@dataclass(frozen=True)
+class RetryBudget:
+    retries: int      # 이 분류로 실패했을 때 다시 시도할 수 있는 횟수
+    base_sec: float
+    cap_sec: float
+
+
+def _budget(name: str, retries: int, base_sec: float, cap_sec: float) -> RetryBudget:
+    prefix = f"EVAL_RETRY_{name.upper()}"
+    return RetryBudget(
+        int(os.getenv(f"{prefix}", str(retries))),
+        float(os.getenv(f"{prefix}_BASE_SEC", str(base_sec))),
+        float(os.getenv(f"{prefix}_CAP_SEC", str(cap_sec))),
+    )
+
+
+class RetryPolicy:
+    def __init__(self, budgets: Dict[str, RetryBudget], rng: Optional[random.Random] = None):
+        self.budgets = budgets
+        self.rng = rng or random.Random()
+        self.retries: Dict[str, int] = {k: 0 for k in budgets}
+        self.gave_up: Dict[str, int] = {k: 0 for k in budgets}
+        self.slept_sec = 0.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls({
+            TRANSIENT: _budget(TRANSIENT, 3, 2.0, 30.0),
+            RATE_LIMIT: _budget(RATE_LIMIT, 4, 10.0, 120.0),
+            VALIDATION: _budget(VALIDATION, 1, 0.5, 5.0),
+            PERMANENT: RetryBudget(0, 0.0, 0.0),
+        })
+
+    def should_retry(self, error_class: str, failures: int) -> bool:
+        """이 분류로 failures 번째 실패했을 때 한 번 더 해볼지"""
+        budget = self.budgets.get(error_class, self.budgets[TRANSIENT])
+        ok = failures <= budget.retries
+        if not ok:
+            self.gave_up[error_class] = self.gave_up.get(error_class, 0) + 1
+        return ok
+
+    def delay(self, error_class: str, failures: int) -> float:
+        budget = self.budgets.get(error_class, self.budgets[TRANSIENT])
+        ceiling = min(budget.cap_sec, budget.base_sec * (2 ** max(0, failures - 1)))
+        return self.rng.uniform(0, ceiling)
+
+    async def sleep(self, error_class: str, failures: int) -> float:
+        delay = self.delay(error_class, failures)
+        self.retries[error_class] = self.retries.get(error_class, 0) + 1
+        self.slept_sec += delay
+        await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budgets": {k: vars(b) for k, b in self.budgets.items()},
+            "retries": dict(self.retries),
+            "gave_up": dict(self.gave_up),
+            "slept_sec": round(self.slept_sec, 1),
+        }
+
+
+retry_policy = RetryPolicy.from_env()
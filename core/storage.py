@@ -0,0 +1,226 @@
+# core/storage.py
+"""
+MinIO 업로드 유틸.
+
+동기 클라이언트(minio.Minio)의 put_object를 전용(크기 제한) 스레드 풀에서 실행해
+이벤트 루프를 막지 않는다. UploadFile의 파일 객체를 그대로 청크 단위로 읽어
+멀티파트 업로드에 흘려보내며(별도 사본 없음), 업로드 크기/지연/처리량을 기록한다.
+
+업로드하면서 같은 청크를 로컬 스풀 파일에도 써 두어, 평가 단계는 MinIO를 다시
+거치지 않고 바로 바이트를 읽는다. 스풀이 없으면(다른 호스트/재시작) 내부
+엔드포인트로 get_object 한 번만 내려받는다. 공개 호스트명(PUBLIC_BASE)은 쓰지 않는다.
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, BinaryIO, Dict, Optional
+
+from minio import Minio
+from dotenv import load_dotenv
+
+from core.metrics import percentile
+
+load_dotenv()
+
+MINIO_ENDPOINT = "chadamjin.tail3de323.ts.net:9000"
+MINIO_ACCESS   = os.getenv("MINIO_ACCESS_KEY", "")
+MINIO_SECRET   = os.getenv("MINIO_SECRET_KEY", "")
+MINIO_SECURE   = os.getenv("MINIO_SECURE", "false").lower() == "true"
+MINIO_BUCKET   = os.getenv("MINIO_BUCKET", "chadamjin")
+PUBLIC_BASE    = "http://chadamjin.tail3de323.ts.net:9000"
+
+MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", str(10 * 1024 * 1024)))  # 최소 5MiB
+MINIO_UPLOAD_WORKERS = int(os.getenv("MINIO_UPLOAD_WORKERS", "4"))
+# 서버 ↔ MinIO 내부 통신용 (docker compose 서비스명)
+MINIO_INTERNAL_ENDPOINT = os.getenv("MINIO_INTERNAL_ENDPOINT", "minio:9000")
+MINIO_INTERNAL_SECURE = os.getenv("MINIO_INTERNAL_SECURE", "false").lower() == "true"
+EVAL_SPOOL_DIR = Path(os.getenv("EVAL_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "chadamjin-spool")))
+EVAL_SPOOL_MAX_AGE_SEC = int(os.getenv("EVAL_SPOOL_MAX_AGE_SEC", str(24 * 3600)))
+
+mc = Minio(
+    MINIO_ENDPOINT,
+    access_key=MINIO_ACCESS,
+    secret_key=MINIO_SECRET,
+    secure=MINIO_SECURE,
+)
+
+mc_internal = Minio(
+    MINIO_INTERNAL_ENDPOINT,
+    access_key=MINIO_ACCESS,
+    secret_key=MINIO_SECRET,
+    secure=MINIO_INTERNAL_SECURE,
+)
+
+# 업로드 전용 스레드 풀 (anyio 기본 스레드 풀과 분리)
+_upload_executor = ThreadPoolExecutor(max_workers=MINIO_UPLOAD_WORKERS, thread_name_prefix="minio-upload")
+
+
+class _MeteredReader:
+    """put_object가 read(n)으로 당겨가는 청크 수/SHA-256을 계산하고, 필요하면 스풀 파일에도 복사"""
+    def __init__(self, raw: BinaryIO, spool: Optional[BinaryIO] = None):
+        self.raw = raw
+        self.spool = spool
+        self.nbytes = 0
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.raw.read(size)
+        self.nbytes += len(chunk)
+        self.sha256.update(chunk)
+        if self.spool is not None and chunk:
+            self.spool.write(chunk)
+        return chunk
+
+
+@dataclass
+class UploadResult:
+    object_name: str
+    size: int
+    elapsed_sec: float
+    sha256: str
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.size / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+
+class UploadStats:
+    """최근 업로드 N건의 크기/지연 분포 → part_size 산정용"""
+    def __init__(self, window: int = 500):
+        self.count = 0
+        self.failures = 0
+        self.total_bytes = 0
+        self.total_sec = 0.0
+        self.sizes: deque = deque(maxlen=window)
+        self.latencies: deque = deque(maxlen=window)
+
+    def record(self, r: UploadResult) -> None:
+        self.count += 1
+        self.total_bytes += r.size
+        self.total_sec += r.elapsed_sec
+        self.sizes.append(r.size)
+        self.latencies.append(r.elapsed_sec)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "total_bytes": self.total_bytes,
+            "avg_bytes_per_sec": round(self.total_bytes / self.total_sec, 1) if self.total_sec else None,
+            "size_p50": percentile(self.sizes, 0.5),
+            "size_p95": percentile(self.sizes, 0.95),
+            "latency_p50_sec": percentile(self.latencies, 0.5),
+            "latency_p95_sec": percentile(self.latencies, 0.95),
+            "part_size": MINIO_PART_SIZE,
+            "workers": MINIO_UPLOAD_WORKERS,
+        }
+
+
+upload_stats = UploadStats()
+
+
+def public_url(object_name: str) -> str:
+    return f"{PUBLIC_BASE}/{MINIO_BUCKET}/{object_name}"
+
+
+def object_name_from_url(url: str) -> str:
+    """예전 문서(url만 저장) 호환: 공개 URL에서 버킷 내 object 경로 추출"""
+    prefix = f"{PUBLIC_BASE}/{MINIO_BUCKET}/"
+    if url.startswith(prefix):
+        return url[len(prefix):]
+    return url.split(f"/{MINIO_BUCKET}/", 1)[-1]
+
+
+def spool_path(object_name: str) -> Path:
+    return EVAL_SPOOL_DIR / object_name.replace("/", "_")
+
+
+def _put_with_spool(reader: _MeteredReader, object_name: str, content_type: str) -> None:
+    path = spool_path(object_name)
+    try:
+        EVAL_SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        reader.spool = open(path, "wb")
+    except OSError as e:
+        print(f"⚠️ 스풀 파일 생성 실패, MinIO만 사용: {e}")
+    try:
+        mc.put_object(
+            MINIO_BUCKET,
+            object_name,
+            data=reader,
+            length=-1,
+            part_size=MINIO_PART_SIZE,
+            content_type=content_type,
+        )
+    except Exception:
+        if reader.spool is not None:
+            reader.spool.close()
+            reader.spool = None
+            path.unlink(missing_ok=True)
+        raise
+    finally:
+        if reader.spool is not None:
+            reader.spool.close()
+
+
+async def upload_fileobj(fileobj: BinaryIO, object_name: str, content_type: str) -> UploadResult:
+    """파일 객체를 MinIO에 스트리밍 업로드 (이벤트 루프 밖에서 실행, 로컬 스풀 동시 기록)"""
+    reader = _MeteredReader(fileobj)
+    loop = asyncio.get_running_loop()
+    t0 = time.perf_counter()
+    try:
+        await loop.run_in_executor(
+            _upload_executor,
+            partial(_put_with_spool, reader, object_name, content_type),
+        )
+    except Exception:
+        upload_stats.failures += 1
+        raise
+    result = UploadResult(object_name, reader.nbytes, time.perf_counter() - t0, reader.sha256.hexdigest())
+    upload_stats.record(result)
+    return result
+
+
+def _read_audio(object_name: str) -> bytes:
+    path = spool_path(object_name)
+    if path.is_file():
+        return path.read_bytes()
+    resp = mc_internal.get_object(MINIO_BUCKET, object_name)
+    try:
+        return resp.read()
+    finally:
+        resp.close()
+        resp.release_conn()
+
+
+async def load_audio(object_name: str) -> bytes:
+    """평가용 오디오 바이트: 로컬 스풀 → 없으면 내부 엔드포인트 get_object"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_upload_executor, _read_audio, object_name)
+
+
+def remove_spool(object_name: str) -> None:
+    spool_path(object_name).unlink(missing_ok=True)
+
+
+def cleanup_spool(max_age_sec: int = EVAL_SPOOL_MAX_AGE_SEC) -> int:
+    """오래된(평가가 끝나지 않은 채 남은) 스풀 파일 정리"""
+    if not EVAL_SPOOL_DIR.is_dir():
+        return 0
+    cutoff = time.time() - max_age_sec
+    removed = 0
+    for p in EVAL_SPOOL_DIR.iterdir():
+        try:
+            if p.is_file() and p.stat().st_mtime < cutoff:
+                p.unlink()
+                removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,169 @@
+# core/user_cache.py
+"""
+users 문서 프로세스 내 캐시 (LRU + TTL)
+
+- _id → 유저 문서, (phone_id, active_only) → 그 기기의 최신 유저 _id
+- create_user / logout / 토큰 정리 / 전체 삭제 시 바로 무효화(write-through invalidation)
+- USER_CACHE_CHANGE_STREAM=1 이면 users change stream 으로 다른 워커의 변경도 무효화 (레플리카셋 필요)
+- 돌려주는 문서는 복사본 (호출한 쪽에서 고쳐도 캐시는 그대로)
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from bson import ObjectId
+
+from core.db import users
+from core.queries import LATEST_USER_SORT, latest_user_by_phone, user_by_id
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SEC = float(os.getenv("USER_CACHE_TTL_SEC", "60"))
+USER_CACHE_CHANGE_STREAM = os.getenv("USER_CACHE_CHANGE_STREAM", "0") == "1"
+
+PhoneKey = Tuple[str, bool]
+
+
+class UserCache:
+    def __init__(self, collection, max_size: int = USER_CACHE_SIZE, ttl_sec: float = USER_CACHE_TTL_SEC):
+        self.collection = collection
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self._by_id: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._by_phone: "OrderedDict[PhoneKey, Tuple[str, float]]" = OrderedDict()
+        self._watch: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # --- 내부 LRU ---
+
+    def _get(self, table: OrderedDict, key):
+        entry = table.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires < time.monotonic():
+            del table[key]
+            return None
+        table.move_to_end(key)
+        return value
+
+    def _put(self, table: OrderedDict, key, value) -> None:
+        table[key] = (value, time.monotonic() + self.ttl_sec)
+        table.move_to_end(key)
+        while len(table) > self.max_size:
+            table.popitem(last=False)
+
+    def _store(self, doc: Dict[str, Any]) -> None:
+        self._put(self._by_id, str(doc["_id"]), doc)
+
+    # --- 조회 ---
+
+    async def get_by_id(self, user_id: str, active_only: bool = False) -> Optional[Dict[str, Any]]:
+        if not ObjectId.is_valid(user_id):
+            return None
+        doc = self._get(self._by_id, user_id)
+        if doc is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            doc = await self.collection.find_one(user_by_id(user_id))
+            if doc is None:
+                return None
+            self._store(doc)
+        if active_only and doc.get("is_deleted"):
+            return None
+        return dict(doc)
+
+    async def get_by_phone(self, phone_id: str, active_only: bool = False) -> Optional[Dict[str, Any]]:
+        """phone_id 의 가장 최근 생성된 유저 (active_only=True 면 삭제되지 않은 유저 중)"""
+        key = (phone_id, active_only)
+        user_id = self._get(self._by_phone, key)
+        if user_id is not None:
+            doc = self._get(self._by_id, user_id)
+            if doc is not None:
+                self.hits += 1
+                return dict(doc)
+
+        self.misses += 1
+        doc = await self.collection.find_one(latest_user_by_phone(phone_id, active_only), sort=LATEST_USER_SORT)
+        if doc is None:
+            return None
+        self._store(doc)
+        self._put(self._by_phone, key, str(doc["_id"]))
+        return dict(doc)
+
+    # --- 무효화 ---
+
+    def invalidate(self, user_id: Optional[str] = None, phone_id: Optional[str] = None) -> None:
+        if user_id is not None:
+            doc = self._by_id.pop(user_id, (None, 0))[0]
+            if doc and doc.get("phone_id"):
+                phone_id = phone_id or doc["phone_id"]
+            for key in [k for k, (uid, _) in self._by_phone.items() if uid == user_id]:
+                del self._by_phone[key]
+        if phone_id is not None:
+            self._by_phone.pop((phone_id, False), None)
+            self._by_phone.pop((phone_id, True), None)
+        self.invalidations += 1
+
+    def invalidate_tokens(self, tokens: Iterable[str]) -> None:
+        """push_token 정리 후 해당 유저 문서 무효화"""
+        tokens = set(tokens)
+        for uid in [uid for uid, (doc, _) in self._by_id.items() if doc.get("push_token") in tokens]:
+            self.invalidate(user_id=uid)
+
+    def clear(self) -> None:
+        self._by_id.clear()
+        self._by_phone.clear()
+        self.invalidations += 1
+
+    # --- change stream (다른 워커의 변경) ---
+
+    async def _run_watch(self, collection) -> None:
+        try:
+            async with await collection.watch() as stream:
+                print("✅ users change stream 연결 (유저 캐시 무효화)")
+                async for change in stream:
+                    op = change.get("operationType")
+                    if op in ("drop", "rename", "dropDatabase", "invalidate"):
+                        self.clear()
+                        continue
+                    user_id = str(change["documentKey"]["_id"])
+                    phone_id = (change.get("fullDocument") or {}).get("phone_id")
+                    self.invalidate(user_id=user_id, phone_id=phone_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ users change stream 사용 불가, 프로세스 내부 무효화 + TTL만 사용: {e}")
+
+    def start_watch(self, collection=None) -> None:
+        if USER_CACHE_CHANGE_STREAM and self._watch is None:
+            self._watch = asyncio.create_task(self._run_watch(collection or self.collection))
+
+    async def stop_watch(self) -> None:
+        if self._watch is not None:
+            self._watch.cancel()
+            try:
+                await self._watch
+            except asyncio.CancelledError:
+                pass
+            self._watch = None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "users": len(self._by_id),
+            "phones": len(self._by_phone),
+            "invalidations": self.invalidations,
+            "ttl_sec": self.ttl_sec,
+        }
+
+
+user_cache = UserCache(users)
@@ -0,0 +1,97 @@
+# eval_pipeline.py
+"""
+평가 1건을 단계별로 실행: download → preprocess → inference
+
+- 단계마다 결과를 보관해서, 재시도하면 실패한 단계부터 다시 실행
+  (다운로드/전처리는 한 번만, 응답을 Report 로 만들 수 없으면 추론만 다시)
+- current 에 지금 실행 중인 단계 이름 → 실패 기록/로그에 사용
+- inference 는 eval_providers 라우터 (provider 선택 + 헤지).
+  헤지에서 유효한 Report 를 먼저 돌려준 쪽을 고르려고 검증(parse_report)도 라우터 안에서 함
+- 상태 저장, 이벤트, 재시도 판단은 호출하는 쪽(router.call)에서
+"""
+from __future__ import annotations
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.audio import PreparedAudio, prepare_audio
+from core.storage import load_audio
+from eval_providers import ProviderRouter, provider_router
+from schema.call import Report
+
+DOWNLOAD = "download"
+PREPROCESS = "preprocess"
+INFERENCE = "inference"
+
+
+class EvalStages:
+    def __init__(self, object_name: str, prev_report_text: str, audio_sha256: Optional[str] = None,
+                 audio_size: int = 0, on_prepared: Optional[Callable[[PreparedAudio], Awaitable[None]]] = None,
+                 router: ProviderRouter = provider_router):
+        self.object_name = object_name
+        self.prev_report_text = prev_report_text
+        self.audio_sha256 = audio_sha256
+        self.audio_size = audio_size
+        self.on_prepared = on_prepared
+        self.router = router
+        self.transcript: Optional[Awaitable] = None  # on_prepared 에서 시작한 STT 작업 (텍스트 평가 provider 가 재사용)
+        self.provider: Optional[str] = None
+        self.hedged = False
+        self.current: Optional[str] = None
+        self.raw: Optional[bytes] = None
+        self.prepared: Optional[PreparedAudio] = None
+        self.output: Any = None
+        self.report: Optional[Report] = None
+        self.timings: Dict[str, float] = {}
+        self.runs: Dict[str, int] = {}
+
+    def _enter(self, stage: str) -> float:
+        self.current = stage
+        self.runs[stage] = self.runs.get(stage, 0) + 1
+        return time.perf_counter()
+
+    def _leave(self, stage: str, t0: float) -> None:
+        self.timings[stage] = round(self.timings.get(stage, 0.0) + time.perf_counter() - t0, 3)
+
+    async def download(self) -> bytes:
+        if self.raw is None:
+            t0 = self._enter(DOWNLOAD)
+            self.raw = await load_audio(self.object_name)
+            self._leave(DOWNLOAD, t0)
+        return self.raw
+
+    async def preprocess(self) -> PreparedAudio:
+        if self.prepared is None:
+            raw = await self.download()
+            t0 = self._enter(PREPROCESS)
+            self.prepared = await prepare_audio(raw, self.object_name)
+            self._leave(PREPROCESS, t0)
+            self.raw = None  # 이후 단계는 전처리 결과만 사용
+            if self.on_prepared is not None:
+                await self.on_prepared(self.prepared)
+        return self.prepared
+
+    async def infer(self) -> Report:
+        if self.report is None:
+            prepared = await self.preprocess()
+            # File API 참조 캐시는 실제로 보내는 bytes 기준
+            send_sha256 = (f"{self.audio_sha256}:{prepared.mime_type}"
+                           if self.audio_sha256 and prepared.processed else self.audio_sha256)
+            filename = os.path.splitext(os.path.basename(self.object_name))[0] + prepared.ext
+            t0 = self._enter(INFERENCE)
+            try:
+                result = await self.router.evaluate(prepared, self.prev_report_text, send_sha256, filename,
+                                                    transcript=self.transcript)
+            finally:
+                self._leave(INFERENCE, t0)
+            self.output = result.output
+            self.report = result.report
+            self.provider = result.provider
+            self.hedged = result.hedged
+        return self.report
+
+    async def run(self) -> Report:
+        """캐시된 단계는 건너뛰고 남은 단계만 실행"""
+        report = await self.infer()
+        self.current = None
+        return report
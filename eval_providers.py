@@ -0,0 +1,332 @@
+# eval_providers.py
+"""
+평가 백엔드(provider) 선택 + 헤지(hedged) 요청
+
+- gemini: 오디오를 그대로 Gemini 에 (gemini_service.google_evaluate_text, 기본)
+- openai: STT 텍스트 + 직전 report → 텍스트 평가 (openai_service.openai_evaluate_transcript)
+          평가 중 transcript 스트리밍(EVAL_STREAM_TRANSCRIPT)이 켜져 있으면 그 STT 결과를 재사용
+          아직 Gemini 와 같은 수준의 report 를 보장하지 않으므로 기본 설정에서는 사용하지 않음
+- fake:   네트워크 없이 고정 Report 반환 (로컬 테스트용, EVAL_FAKE_* 로 지연/실패율 조절)
+
+호출마다 최근 지연/오류율로 1순위를 고르고, 1순위가 p95 지연(deadline)을 넘기거나 실패하면
+2순위를 추가로 띄워서 먼저 유효한 Report 를 돌려준 쪽을 채택 (나머지는 취소).
+EVAL_PROVIDERS 순서가 기본 우선순위.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import random
+import asyncio
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, List, Optional
+
+from anyio import to_thread
+
+from core.audio import PreparedAudio
+from core.metrics import percentile
+from core.rate_limit import gemini_limiter, is_rate_limited
+from core.report_schema import CRITERIA_KEYS, ReportParseError, parse_report
+from core.retry import PermanentError
+from gemini_service import google_evaluate_text
+from openai_service import openai_evaluate_transcript
+from schema.call import Report
+from stt import transcribe_speeches_async
+
+EVAL_PROVIDERS = [p.strip() for p in os.getenv("EVAL_PROVIDERS", "gemini").split(",") if p.strip()]
+EVAL_HEDGE = os.getenv("EVAL_HEDGE", "0") == "1"
+EVAL_HEDGE_DEFAULT_SEC = float(os.getenv("EVAL_HEDGE_DEFAULT_SEC", "120"))  # 지연 표본이 모자랄 때
+EVAL_HEDGE_MIN_SEC = float(os.getenv("EVAL_HEDGE_MIN_SEC", "15"))
+EVAL_HEDGE_MAX_SEC = float(os.getenv("EVAL_HEDGE_MAX_SEC", "300"))
+EVAL_HEDGE_MIN_SAMPLES = int(os.getenv("EVAL_HEDGE_MIN_SAMPLES", "20"))
+EVAL_PROVIDER_MAX_ERROR_RATE = float(os.getenv("EVAL_PROVIDER_MAX_ERROR_RATE", "0.5"))
+EVAL_PROVIDER_LATENCY_RATIO = float(os.getenv("EVAL_PROVIDER_LATENCY_RATIO", "2"))
+EVAL_PROVIDER_WINDOW = int(os.getenv("EVAL_PROVIDER_WINDOW", "100"))
+
+EVAL_FAKE_LATENCY_SEC = float(os.getenv("EVAL_FAKE_LATENCY_SEC", "0.2"))
+EVAL_FAKE_FAILURE_RATE = float(os.getenv("EVAL_FAKE_FAILURE_RATE", "0"))
+EVAL_FAKE_REPORT_PATH = os.getenv("EVAL_FAKE_REPORT_PATH")
+
+
+class ProviderStats:
+    """최근 N건의 성공 지연 + 성공/실패 기록"""
+
+    def __init__(self, window: int = EVAL_PROVIDER_WINDOW):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)  # True=성공
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+        self.hedged = 0     # 헤지(2순위)로 호출된 횟수
+        self.cancelled = 0
+        self.in_flight = 0
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        self.calls += 1
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(elapsed)
+        else:
+            self.errors += 1
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def p50(self) -> Optional[float]:
+        return percentile(self.latencies, 0.5) if len(self.latencies) >= EVAL_HEDGE_MIN_SAMPLES else None
+
+    def p95(self) -> Optional[float]:
+        return percentile(self.latencies, 0.95) if len(self.latencies) >= EVAL_HEDGE_MIN_SAMPLES else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wins": self.wins,
+            "hedged": self.hedged,
+            "cancelled": self.cancelled,
+            "in_flight": self.in_flight,
+            "error_rate": round(self.error_rate(), 4),
+            "latency_p50_sec": percentile(self.latencies, 0.5),
+            "latency_p95_sec": percentile(self.latencies, 0.95),
+        }
+
+
+class Provider(ABC):
+    name = "base"
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def evaluate(self, audio: PreparedAudio, prev_report_text: str,
+                       audio_sha256: Optional[str], filename: str,
+                       transcript: Optional[Awaitable] = None) -> Any:
+        """
+        모델 원본 응답 (Report 변환/검증은 라우터에서)
+        transcript: 이미 진행 중인 STT 작업 (결과는 턴 목록, 실패하면 None)
+        """
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    def available(self) -> bool:
+        return bool(os.getenv("GOOGLE_API_KEY"))
+
+    async def evaluate(self, audio, prev_report_text, audio_sha256, filename, transcript=None):
+        try:
+            # 동기 함수 → 스레드에서 실행 (전역 리미터 통과 후에만 스레드 점유)
+            async with gemini_limiter.slot(len(audio.data)):
+                output = await to_thread.run_sync(
+                    lambda: google_evaluate_text(audio.data, prev_report_text,
+                                                 mime_type=audio.mime_type, audio_sha256=audio_sha256)
+                )
+        except Exception as e:
+            if is_rate_limited(e):
+                gemini_limiter.report_throttled()
+            raise
+        gemini_limiter.report_success()
+        return output
+
+
+class OpenAITextProvider(Provider):
+    """화자 분리 텍스트 + 직전 report 를 텍스트 프롬프트(LANGSMITH_TEXT_PROMPT_NAME)로 평가"""
+    name = "openai"
+
+    def available(self) -> bool:
+        return all(os.getenv(k) for k in ("OPENAI_API_KEY", "ELEVENLABS_API_KEY", "LANGSMITH_TEXT_PROMPT_NAME"))
+
+    async def evaluate(self, audio, prev_report_text, audio_sha256, filename, transcript=None):
+        turns = None
+        if transcript is not None:
+            # 스트리밍 STT 결과 재사용 (헤지 취소가 공유 작업까지 취소하지 않도록 shield)
+            try:
+                turns = await asyncio.shield(transcript)
+            except Exception as e:
+                print(f"⚠️ 스트리밍 STT 결과를 쓸 수 없어 다시 STT: {e}")
+        if turns is None:
+            turns = await transcribe_speeches_async(audio.data, filename=filename)
+        text = "\n".join(f"[{t['start']}-{t['end']}] {t['speaker']}: {t['text']}" for t in turns)
+        return await to_thread.run_sync(openai_evaluate_transcript, text, prev_report_text)
+
+
+class FakeProvider(Provider):
+    name = "fake"
+
+    def __init__(self, latency_sec: float = EVAL_FAKE_LATENCY_SEC, failure_rate: float = EVAL_FAKE_FAILURE_RATE,
+                 report_path: Optional[str] = EVAL_FAKE_REPORT_PATH):
+        self.latency_sec = latency_sec
+        self.failure_rate = failure_rate
+        self.report_path = report_path
+
+    def _report(self) -> Dict[str, Any]:
+        if self.report_path:
+            with open(self.report_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {
+            "overall_score": 0,
+            "summary": "fake provider 평가 결과",
+            "is_valid": True,
+            "criteria": {k: {"score": 0, "description": "fake"} for k in CRITERIA_KEYS},
+        }
+
+    async def evaluate(self, audio, prev_report_text, audio_sha256, filename, transcript=None):
+        await asyncio.sleep(self.latency_sec)
+        if random.random() < self.failure_rate:
+            raise ConnectionError("fake provider: 임의 실패")
+        return json.dumps(self._report(), ensure_ascii=False)
+
+
+PROVIDER_CLASSES = {"gemini": GeminiProvider, "openai": OpenAITextProvider, "fake": FakeProvider}
+
+
+@dataclass
+class ProviderResult:
+    provider: str
+    output: Any
+    report: Report
+    hedged: bool = False
+    elapsed_sec: float = 0.0
+
+
+class ProviderRouter:
+    def __init__(self, providers: List[Provider], hedge: bool = EVAL_HEDGE):
+        self.providers = providers
+        self.hedge = hedge
+        self.provider_stats: Dict[str, ProviderStats] = {p.name: ProviderStats() for p in providers}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0  # 1순위 실패로 2순위 실행
+
+    @classmethod
+    def from_env(cls) -> "ProviderRouter":
+        unknown = [n for n in EVAL_PROVIDERS if n not in PROVIDER_CLASSES]
+        if unknown:
+            print(f"⚠️ 알 수 없는 평가 provider 무시: {unknown}")
+        return cls([PROVIDER_CLASSES[n]() for n in EVAL_PROVIDERS if n in PROVIDER_CLASSES])
+
+    def ranked(self) -> List[Provider]:
+        """
+        사용 가능한 provider 순위: 오류율이 한도 이하인 것 중 설정 순서대로.
+        다른 provider 의 최근 p50 지연이 1순위의 1/EVAL_PROVIDER_LATENCY_RATIO 보다 짧으면 그쪽을 앞으로
+        """
+        order = {p.name: i for i, p in enumerate(self.providers)}
+        usable = [p for p in self.providers if p.available()]
+        ranked = sorted(usable, key=lambda p: (self.provider_stats[p.name].error_rate() > EVAL_PROVIDER_MAX_ERROR_RATE,
+                                               order[p.name]))
+        healthy = [p for p in ranked if self.provider_stats[p.name].error_rate() <= EVAL_PROVIDER_MAX_ERROR_RATE]
+        if len(healthy) > 1:
+            p50 = {p.name: self.provider_stats[p.name].p50() for p in healthy}
+            first = p50[healthy[0].name]
+            faster = [p for p in healthy[1:] if first is not None and p50[p.name] is not None
+                      and p50[p.name] * EVAL_PROVIDER_LATENCY_RATIO < first]
+            if faster:
+                ranked.remove(faster[0])
+                ranked.insert(0, faster[0])
+        return ranked
+
+    def deadline(self, provider: Provider) -> float:
+        """이 시간 안에 끝나지 않으면 헤지 (1순위의 최근 p95)"""
+        p95 = self.provider_stats[provider.name].p95()
+        if p95 is None:
+            return EVAL_HEDGE_DEFAULT_SEC
+        return max(EVAL_HEDGE_MIN_SEC, min(EVAL_HEDGE_MAX_SEC, p95))
+
+    async def _attempt(self, provider: Provider, audio: PreparedAudio, prev_report_text: str,
+                       audio_sha256: Optional[str], filename: str,
+                       transcript: Optional[Awaitable] = None) -> ProviderResult:
+        stats = self.provider_stats[provider.name]
+        stats.in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            output = await provider.evaluate(audio, prev_report_text, audio_sha256, filename, transcript)
+            if not output:
+                raise ReportParseError("평가 응답이 비어 있음")
+            report = parse_report(output)
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        except Exception:
+            stats.record(False, time.perf_counter() - t0)
+            raise
+        finally:
+            stats.in_flight -= 1
+        elapsed = time.perf_counter() - t0
+        stats.record(True, elapsed)
+        return ProviderResult(provider.name, output, report, elapsed_sec=round(elapsed, 3))
+
+    async def evaluate(self, audio: PreparedAudio, prev_report_text: str,
+                       audio_sha256: Optional[str] = None, filename: str = "audio.m4a",
+                       transcript: Optional[Awaitable] = None) -> ProviderResult:
+        ranked = self.ranked()
+        if not ranked:
+            raise PermanentError(f"사용 가능한 평가 provider 가 없습니다 (EVAL_PROVIDERS={EVAL_PROVIDERS})")
+        primary, backups = ranked[0], ranked[1:]
+
+        def start(provider: Provider) -> asyncio.Task:
+            return asyncio.create_task(
+                self._attempt(provider, audio, prev_report_text, audio_sha256, filename, transcript)
+            )
+
+        tasks: Dict[asyncio.Task, Provider] = {start(primary): primary}
+        last_error: Optional[BaseException] = None
+        deadline = time.monotonic() + self.deadline(primary)
+        try:
+            while tasks:
+                can_hedge = self.hedge and backups
+                timeout = max(0.0, deadline - time.monotonic()) if can_hedge else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 1순위가 p95 를 넘김 → 2순위 추가 (둘 다 계속 진행)
+                    backup = backups.pop(0)
+                    self.hedges += 1
+                    self.provider_stats[backup.name].hedged += 1
+                    print(f"⏱️ {primary.name} 지연, {backup.name} 헤지 요청 시작")
+                    tasks[start(backup)] = backup
+                    deadline = time.monotonic() + self.deadline(backup)
+                    continue
+                for task in done:
+                    provider = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        print(f"⚠️ 평가 provider {provider.name} 실패: {e}")
+                        continue
+                    result.hedged = provider is not primary
+                    self.provider_stats[provider.name].wins += 1
+                    if result.hedged:
+                        self.hedge_wins += 1
+                    return result
+                if not tasks and backups:
+                    # 진행 중인 요청이 모두 실패 → 다음 provider 로 바로 넘김
+                    backup = backups.pop(0)
+                    self.failovers += 1
+                    tasks[start(backup)] = backup
+                    deadline = time.monotonic() + self.deadline(backup)
+            assert last_error is not None
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+                # 스레드에서 도는 호출은 끝날 때까지 남아 있으므로 결과/예외만 버림
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "order": [p.name for p in self.ranked()],
+            "hedge": self.hedge,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "providers": {
+                p.name: {**self.provider_stats[p.name].to_dict(), "hedge_deadline_sec": self.deadline(p)}
+                for p in self.providers
+            },
+        }
+
+
+provider_router = ProviderRouter.from_env()
@@ -0,0 +1,68 @@
+# export_calls.py
+"""
+통화기록 NDJSON 덤프 (오프라인용, /call/export 와 같은 필터/출력)
+
+사용법:
+  python export_calls.py --agent-id agent01 --from 2025-01-01 --to 2025-02-01 --out calls.ndjson
+  python export_calls.py --status done --fields call_count,report.overall_score --gzip --out calls.ndjson.gz
+  python export_calls.py --user-id <users._id>          # --out 없으면 stdout
+"""
+import sys
+import asyncio
+import argparse
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from core.db import calls, close_db
+from core.export import fields_projection, build_export_filter, iter_ndjson, gzip_chunks
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="calls 컬렉션 NDJSON 내보내기")
+    p.add_argument("--agent-id")
+    p.add_argument("--user-id")
+    p.add_argument("--from", dest="date_from", type=datetime.fromisoformat,
+                   help="created_at 시작(포함), ISO 형식 / 시간대 없으면 KST")
+    p.add_argument("--to", dest="date_to", type=datetime.fromisoformat,
+                   help="created_at 끝(제외), ISO 형식 / 시간대 없으면 KST")
+    p.add_argument("--status", dest="evaluation_status",
+                   help="pending | running | retrying | done | failed")
+    p.add_argument("--fields", help="내보낼 필드 (쉼표 구분, 없으면 Call 전체)")
+    p.add_argument("--gzip", action="store_true", help="gzip 압축해서 저장")
+    p.add_argument("--out", help="출력 파일 (없으면 stdout)")
+    return p.parse_args(argv)
+
+
+async def run(args) -> int:
+    try:
+        projection = fields_projection(args.fields)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    query = build_export_filter(args.agent_id, args.user_id, args.date_from, args.date_to,
+                                args.evaluation_status)
+
+    body = iter_ndjson(calls, query, projection)
+    if args.gzip:
+        body = gzip_chunks(body)
+
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    written = 0
+    try:
+        async for chunk in body:
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.out:
+            out.close()
+        await close_db()
+
+    print(f"✅ export 완료: {written:,} bytes → {args.out or 'stdout'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
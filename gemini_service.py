@@ -1,34 +1,113 @@
 import os
 import json
 import base64
+import hashlib
 import requests
+from typing import Optional, Tuple, Union
 from dotenv import load_dotenv
 
-from langsmith import Client
 from langchain_core.messages import HumanMessage
-from langchain_google_genai import GoogleGenerativeAI
+from langchain_core.runnables import RunnableSequence
+from langchain_google_genai import GoogleGenerativeAI, ChatGoogleGenerativeAI
+
+from core.prompt_cache import prompt_cache
+from core.gemini_files import (choose_transport, file_store, inline_budget, inline_cost,
+                               transport_stats)
+from core.report_schema import report_json_schema
+from core.retry import PermanentError
 
 load_dotenv()
 
 PROMPT_NAME = os.getenv("LANGSMITH_PROMPT_NAME")  # LangSmith에 저장된 프롬프트 이름
+# 1이면 Report 에서 만든 JSON 스키마로 Gemini 출력을 강제 (response_json_schema)
+GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "1") == "1"
+
+# 원본 체인 id → (원본, 스키마 적용 체인). 프롬프트 갱신으로 체인이 바뀌면 새로 만듦
+_constrained: dict = {}
+
+def current_prompt_version() -> Optional[str]:
+    """평가에 쓰이는 LangSmith 프롬프트의 현재 커밋 해시 (report 캐시 키용)"""
+    if not PROMPT_NAME:
+        return None
+    prompt_cache.get(PROMPT_NAME, include_model=True)
+    return prompt_cache.version(PROMPT_NAME, include_model=True)
+
+
+def _with_report_schema(chain):
+    """
+    체인의 Gemini 모델 호출에 response_mime_type=application/json + Report 스키마를 붙임.
+    프롬프트 쪽에서 이미 구조화 출력/도구를 쓰고 있으면 그대로 둠
+    """
+    cached = _constrained.get(id(chain))
+    if cached and cached[0] is chain:
+        return cached[1]
+
+    result = chain
+    steps = getattr(chain, "steps", None) or []
+    for i in range(len(steps) - 1, -1, -1):
+        step = steps[i]
+        model = getattr(step, "bound", step)
+        if not isinstance(model, ChatGoogleGenerativeAI):
+            continue
+        kwargs = getattr(step, "kwargs", None) or {}
+        already = model.response_schema or any(
+            k in kwargs for k in ("response_json_schema", "response_schema", "tools", "ls_structured_output_format")
+        )
+        if not already:
+            bound = step.bind(response_mime_type="application/json", response_json_schema=report_json_schema())
+            result = RunnableSequence(*steps[:i], bound, *steps[i + 1:])
+        break
 
-def google_evaluate_text(audio_path_or_url: str, report, is_url: bool = False) -> str:
+    if len(_constrained) > 8:
+        _constrained.clear()
+    _constrained[id(chain)] = (chain, result)
+    return result
+
+
+def _audio_block(audio_bytes: bytes, mime_type: str, sha256: Optional[str]) -> Tuple[dict, int]:
     """
-    LangSmith에 저장된 프롬프트를 불러와서 오디오(base64) 넣고 실행.
-    audio_path_or_url: 파일 경로나 fixed url
+    오디오 content 블록과 잡아둔 inline 예산 크기 반환
+    큰 파일은 File API 업로드 후 file_uri 참조, 작은 파일은 base64 inline
+    """
+    if choose_transport(len(audio_bytes)) == "file":
+        try:
+            uri = file_store.file_uri(audio_bytes, mime_type, sha256 or hashlib.sha256(audio_bytes).hexdigest())
+            transport_stats.file += 1
+            return {"type": "media", "file_uri": uri, "mime_type": mime_type}, 0
+        except Exception as e:
+            print(f"⚠️ Gemini 파일 업로드 실패, inline 으로 전송: {e}")
+            transport_stats.file_fallbacks += 1
+            inline_budget.acquire(inline_cost(len(audio_bytes)))
+
+    transport_stats.inline += 1
+    return {
+        "type": "audio",
+        "source_type": "base64",
+        "data": base64.b64encode(audio_bytes).decode("utf-8"),
+        "mime_type": mime_type,  # 확장자에 맞춰 변경 가능 (m4a → audio/mp4)
+    }, inline_cost(len(audio_bytes))
+
+
+def google_evaluate_text(audio_path_or_url: Union[str, bytes], report, is_url: bool = False,
+                         mime_type: str = "audio/mp4", audio_sha256: Optional[str] = None) -> str:
+    """
+    LangSmith에 저장된 프롬프트를 불러와서 오디오 넣고 실행.
+    audio_path_or_url: 파일 경로나 fixed url, 또는 이미 메모리에 있는 오디오 bytes
     is_url: True면 URL에서 다운받아서 사용
+    audio_sha256: 있으면 File API 업로드 재사용 키로 사용 (없으면 계산)
     """
     if not PROMPT_NAME:
-        raise RuntimeError("LANGSMITH_PROMPT_NAME(.env)이 필요합니다.")
+        raise PermanentError("LANGSMITH_PROMPT_NAME(.env)이 필요합니다.")
     if not os.getenv("GOOGLE_API_KEY"):
-        raise RuntimeError("GOOGLE_API_KEY(.env)이 필요합니다.")
+        raise PermanentError("GOOGLE_API_KEY(.env)이 필요합니다.")
 
-    # 1) LangSmith 프롬프트 가져오기
-    client = Client()
-    prompt = client.pull_prompt(PROMPT_NAME, include_model=True)
+    # 1) LangSmith 프롬프트 가져오기 (프로세스 전역 캐시, TTL 백그라운드 갱신)
+    prompt = prompt_cache.get(PROMPT_NAME, include_model=True)
 
-    # 2) 오디오 로딩
-    if is_url:
+    # 2) 오디오 로딩 (서버 평가 경로는 업로드 때 확보한 bytes를 그대로 넘김)
+    if isinstance(audio_path_or_url, (bytes, bytearray)):
+        audio_bytes = bytes(audio_path_or_url)
+    elif is_url:
         resp = requests.get(audio_path_or_url)
         if resp.status_code != 200:
             raise RuntimeError(f"파일을 가져오지 못했습니다. status={resp.status_code}")
@@ -37,19 +116,21 @@ def google_evaluate_text(audio_path_or_url: str, report, is_url: bool = False) -
         with open(audio_path_or_url, "rb") as f:
             audio_bytes = f.read()
 
-    encoded_audio = base64.b64encode(audio_bytes).decode("utf-8")
-
-    audio_file = HumanMessage(content=[
-        {
-            "type": "audio",
-            "source_type": "base64",
-            "data": encoded_audio,
-            "mime_type": "audio/mp4",  # 확장자에 맞춰 변경 가능 (m4a → audio/mp4)
-        },
-    ])
+    # 3) 전송 방식 선택 (inline base64 / File API 참조)
+    block, inline_reserved = _audio_block(audio_bytes, mime_type, audio_sha256)
+    audio_file = HumanMessage(content=[block])
 
-    # 3) 실행
-    chain = prompt
-    result = chain.invoke({"audio_file": [audio_file], "prev_report": report})
+    # 4) 실행 (응답은 core.report_schema.parse_report 로 Report 변환)
+    chain = _with_report_schema(prompt) if GEMINI_STRUCTURED_OUTPUT else prompt
+    try:
+        result = chain.invoke({"audio_file": [audio_file], "prev_report": report})
+    except Exception:
+        # 업로드 파일이 만료/삭제됐을 수 있으므로 다음 시도는 새로 업로드
+        if "file_uri" in block:
+            file_store.forget(audio_sha256 or hashlib.sha256(audio_bytes).hexdigest())
+        raise
+    finally:
+        if inline_reserved:
+            inline_budget.release(inline_reserved)
 
     return result
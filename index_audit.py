@@ -0,0 +1,53 @@
+# index_audit.py
+"""
+라우터/큐의 쿼리 모양(core.indexes.QUERY_SHAPES)마다 explain()을 실행해
+COLLSCAN 이나 메모리 SORT 가 나오면 실패(exit 1)하는 점검 스크립트.
+같은 검사를 tests/test_indexes.py 가 pytest 로 실행 (mongod 가 없으면 skip).
+
+사용법:
+    MONGO_URI=mongodb://localhost:27017 python index_audit.py [--db chadamjin_index_audit] [--drop-unknown]
+
+지정한 DB에 레지스트리 인덱스를 맞춘 뒤 검사한다 (기본값은 별도 점검용 DB).
+--drop-unknown 을 주면 레지스트리에 없는 인덱스도 삭제한다 (앱 시작 시에는 로그만 남김).
+"""
+import os
+import sys
+import asyncio
+import argparse
+
+from pymongo import AsyncMongoClient
+
+from core.indexes import QUERY_SHAPES, audit_query_shapes, reconcile_indexes
+
+
+async def audit(uri: str, db_name: str, drop_unknown: bool = False) -> int:
+    client = AsyncMongoClient(uri)
+    try:
+        database = client[db_name]
+        await reconcile_indexes(database, drop_unknown=drop_unknown)
+
+        failures = 0
+        for shape, stages, bad in await audit_query_shapes(database):
+            status = "FAIL" if bad else "ok"
+            print(f"[{status:4}] {shape.collection}.{shape.name}: {' > '.join(stages)}")
+            if bad:
+                failures += 1
+        print(f"\n{len(QUERY_SHAPES)}개 쿼리 중 실패 {failures}개")
+        return failures
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="쿼리별 인덱스 사용 점검 (explain)")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("INDEX_AUDIT_DB", "chadamjin_index_audit"))
+    parser.add_argument("--drop-unknown", action="store_true", help="레지스트리에 없는 인덱스 삭제")
+    args = parser.parse_args()
+
+    failures = asyncio.run(audit(args.uri, args.db, drop_unknown=args.drop_unknown))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
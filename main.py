@@ -8,9 +8,17 @@ from minio.error import S3Error
 from dotenv import load_dotenv
 from gemini_service import google_evaluate_text
 from contextlib import asynccontextmanager
-from core.db import init_db, close_db
+from core.db import init_db, close_db, calls as calls_collection
 from core.firebase import setup_firebase
-from router.call import call
+from core.eval_queue import eval_queue
+from core.events import event_bus
+from core.notify import eval_notifier
+from core.user_cache import user_cache
+from core.rate_limit import gemini_limiter
+from core.storage import cleanup_spool
+from core.audio import shutdown_pool as shutdown_audio_pool
+from stt import aclose_clients as close_stt_clients
+from router.call import call, run_eval_job
 from router.user import user
 from router.admin import admin
 from router.push import push
@@ -24,6 +32,15 @@ async def lifespan(app: FastAPI):
     # 1. 데이터베이스 초기화
     await init_db()
     print("✅ Database initialized.")
+
+    # 2. 평가 큐: 이전 프로세스에서 멈춘 작업 회수 후 워커 시작
+    cleanup_spool()
+    swept = await eval_queue.sweep()
+    eval_queue.start(run_eval_job, can_claim=gemini_limiter.has_capacity)
+    event_bus.start_bridge(calls_collection)
+    eval_notifier.start()
+    user_cache.start_watch()
+    print(f"✅ Evaluation workers started ({eval_queue.workers}), re-enqueued {swept} stuck call(s).")
     
     # --- [3. 추가] Firebase Admin SDK 초기화 ---
     try:
@@ -37,6 +54,12 @@ async def lifespan(app: FastAPI):
     
     # 앱 종료 시 실행될 로직
     print("👋 FastAPI application shutting down...")
+    await eval_queue.stop()
+    await event_bus.stop_bridge()
+    await eval_notifier.stop()
+    await user_cache.stop_watch()
+    await close_stt_clients()
+    shutdown_audio_pool()
     await close_db()
     print("✅ Database connection closed.")
 
@@ -5,12 +5,16 @@ from dotenv import load_dotenv
 
 import json
 
-from langsmith import Client
 from langchain_openai import ChatOpenAI
 
+from core.prompt_cache import prompt_cache
+from core.retry import PermanentError
+
 load_dotenv()
 
 PROMPT_NAME = os.getenv("LANGSMITH_PROMPT_NAME")  # LangSmith에 저장된 프롬프트 이름
+# 통화 STT 텍스트 평가용 프롬프트 (입력 변수: 'text', 'prev_report') — 오디오용 LANGSMITH_PROMPT_NAME 과 별도
+TEXT_PROMPT_NAME = os.getenv("LANGSMITH_TEXT_PROMPT_NAME")
 
 def openai_evaluate_text(text: str) -> str:
     """
@@ -20,10 +24,8 @@ def openai_evaluate_text(text: str) -> str:
     if not PROMPT_NAME:
         raise RuntimeError("LANGSMITH_PROMPT_NAME(.env)이 필요합니다.")
 
-    # 1) LangSmith 프롬프트 가져오기 (Hub/전역에 저장되어 있어야 함)
-  
-    client = Client()
-    prompt = client.pull_prompt(PROMPT_NAME, include_model=False)  # 예: "consult-eval-v1" 또는 "owner/name:latest"
+    # 1) LangSmith 프롬프트 가져오기 (Hub/전역에 저장되어 있어야 함, 프로세스 전역 캐시 사용)
+    prompt = prompt_cache.get(PROMPT_NAME, include_model=False)  # 예: "consult-eval-v1" 또는 "owner/name:latest"
     
     # 2) LLM 연결 후 실행
     llm = ChatOpenAI(model="gpt-5-mini")  # OPENAI_API_KEY 자동 사용
@@ -31,3 +33,18 @@ def openai_evaluate_text(text: str) -> str:
     result = chain.invoke({"text": text})
 
     return json.dumps({"message": result.content}, ensure_ascii=False, indent=2)
+
+
+def openai_evaluate_transcript(text: str, prev_report: str = "") -> str:
+    """
+    화자 분리된 통화 텍스트 + 직전 report 로 평가 (LANGSMITH_TEXT_PROMPT_NAME 프롬프트).
+    모델 응답 문자열 그대로 반환 (Report 변환/검증은 호출하는 쪽에서)
+    """
+    if not TEXT_PROMPT_NAME:
+        raise PermanentError("LANGSMITH_TEXT_PROMPT_NAME(.env)이 필요합니다.")
+
+    prompt = prompt_cache.get(TEXT_PROMPT_NAME, include_model=False)
+    llm = ChatOpenAI(model="gpt-5-mini")  # OPENAI_API_KEY 자동 사용
+    chain = prompt | llm
+    result = chain.invoke({"text": text, "prev_report": prev_report})
+    return result.content
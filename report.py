@@ -6,7 +6,7 @@ from openai_service import openai_evaluate_text
 from gemini_service import google_evaluate_text
 def main():
     if len(sys.argv) < 2:
-        print("사용법: python main.py <음성.m4a>")
+        print("사용법: python report.py <음성.m4a>  (여러 파일은 batch_eval.py)")
         raise SystemExit(2)
 
     audio_path = sys.argv[1]
@@ -16,7 +16,7 @@ def main():
     # text = "\n".join(f"[{t['start']}-{t['end']}] {t['speaker']}: {t['text']}" for t in turns)
 
     # LangSmith 프롬프트 실행 → 모델 응답만 출력
-    response = google_evaluate_text(audio_path)
+    response = google_evaluate_text(audio_path, "")  # 직전 리포트 없음
     print(response)
     return response
 
@@ -1,5 +1,20 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from core.db import get_db
+from core.prompt_cache import prompt_cache
+from core.eval_queue import eval_queue
+from core.rate_limit import gemini_limiter
+from core.storage import upload_stats
+from core.report_cache import report_cache
+from core.events import event_bus
+from core.notify import eval_notifier
+from core.push_service import push_service
+from core.user_cache import user_cache
+from core.gemini_files import transport_stats, inline_budget, file_store
+from core.audio import preprocess_stats
+from core.report_schema import parse_stats
+from core.retry import retry_policy
+from eval_providers import provider_router
 
 admin = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -7,10 +22,37 @@ admin = APIRouter(prefix="/admin", tags=["admin"])
 @admin.delete("/users")
 async def delete_all_users(db=Depends(get_db)):
     res = await db["users"].delete_many({})
+    user_cache.clear()
     return {"deleted_count": res.deleted_count}
 
 # 모든 call 삭제
 @admin.delete("/calls")
 async def delete_all_calls(db=Depends(get_db)):
     res = await db["calls"].delete_many({})
-    return {"deleted_count": res.deleted_count}
\ No newline at end of file
+    return {"deleted_count": res.deleted_count}
+
+# report 캐시 정리 (keep_version 을 주면 그 프롬프트 버전 항목은 남김)
+@admin.delete("/report-cache")
+async def delete_report_cache(keep_version: Optional[str] = None):
+    deleted = await report_cache.invalidate(keep_version=keep_version)
+    return {"deleted_count": deleted}
+
+# 내부 캐시/큐 지표
+@admin.get("/metrics")
+async def get_metrics():
+    return {
+        "prompt_cache": prompt_cache.stats(),
+        "eval_queue": eval_queue.stats(),
+        "gemini_limiter": gemini_limiter.stats(),
+        "minio_upload": upload_stats.to_dict(),
+        "report_cache": report_cache.stats(),
+        "events": event_bus.stats(),
+        "eval_notify": eval_notifier.stats(),
+        "push": push_service.stats(),
+        "user_cache": user_cache.stats(),
+        "gemini_transport": transport_stats.to_dict(inline_budget, file_store),
+        "audio_preprocess": preprocess_stats.to_dict(),
+        "report_parse": parse_stats.to_dict(),
+        "eval_retry": retry_policy.stats(),
+        "eval_providers": provider_router.stats(),
+    }
\ No newline at end of file
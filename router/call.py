@@ -1,108 +1,235 @@
-import os, uuid, mimetypes, asyncio, json
+import os, uuid, mimetypes, asyncio, json, base64
+import orjson
 from anyio import to_thread
 from datetime import timedelta, datetime
+from typing import Optional, Union
 from zoneinfo import ZoneInfo
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, BackgroundTasks, Query
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
 
-from minio import Minio
 from minio.error import S3Error
 from dotenv import load_dotenv
 
-from core.db import get_db
-from schema.call import Call, Report, CallBrief
+from core.db import get_db, db as main_db
+from core.eval_queue import eval_queue
+from core.fast_json import TrustedJSONResponse, shape_doc, shape_docs, shape_sparse, model_projection
+from core.export import CALL_PROJECTION, fields_projection, build_export_filter, iter_ndjson, gzip_chunks
+from core.notify import eval_notifier
+from core.events import event_bus, doc_events, report_events, TERMINAL_STATUSES
+from core.retry import RetryPolicy, retry_policy, classify_error
+from core.report_cache import report_cache
+from core.user_cache import user_cache
+from core.queries import CALL_LIST_SORT, PREV_CALL_SORT, calls_by_user, prev_call
+from core.audio import call_audio_fields
+from core.storage import upload_fileobj, public_url, object_name_from_url, remove_spool
+from schema.call import Call, CallBrief, CallPage
 from schema.common import utcnow
-from gemini_service import google_evaluate_text  # 평가 함수 (dict 반환 가정)
+from gemini_service import current_prompt_version
+from eval_pipeline import EvalStages
+from stt import transcribe_speeches_async
 
 load_dotenv()
 
-MINIO_ENDPOINT = "chadamjin.tail3de323.ts.net:9000"
-MINIO_ACCESS   = os.getenv("MINIO_ACCESS_KEY", "")
-MINIO_SECRET   = os.getenv("MINIO_SECRET_KEY", "")
-MINIO_SECURE   = os.getenv("MINIO_SECURE", "false").lower() == "true"
-MINIO_BUCKET   = os.getenv("MINIO_BUCKET", "chadamjin")
-PUBLIC_BASE    = "http://chadamjin.tail3de323.ts.net:9000"
-
-
 call = APIRouter(prefix="/call", tags=["call"])
 
-mc = Minio(
-    MINIO_ENDPOINT,
-    access_key=MINIO_ACCESS,
-    secret_key=MINIO_SECRET,
-    secure=MINIO_SECURE,
-)
-
 def guess_audio_type(name: str) -> str:
     ctype, _ = mimetypes.guess_type(name)
     return ctype or "audio/mpeg"
 
 
-# 1) async 작업 함수 (재시도 + 상태 업데이트)
-async def eval_and_update_call_retry(db, prev_report_text, call_id: str, eval_url: str,
-                                     max_attempts: int = 3, base_delay_sec: int = 5):
-    async def run_once(attempt: int) -> bool:
+# 전체 시도 상한 (분류별 예산은 core.retry 의 EVAL_RETRY_* 로 조정)
+EVAL_MAX_ATTEMPTS = int(os.getenv("EVAL_MAX_ATTEMPTS", "6"))
+CALL_COUNT_MAX_RETRY = 5
+# 평가와 동시에 STT를 돌려 transcript 이벤트를 먼저 보냄 (opt-in, ElevenLabs 키가 있을 때만)
+# 켜면 평가 1건마다 유료 ElevenLabs STT 호출이 1번 추가됨 (녹음 길이만큼 과금)
+EVAL_STREAM_TRANSCRIPT = os.getenv("EVAL_STREAM_TRANSCRIPT", "0") == "1" and bool(os.getenv("ELEVENLABS_API_KEY"))
+EVAL_TRANSCRIPT_WAIT_SEC = float(os.getenv("EVAL_TRANSCRIPT_WAIT_SEC", "10"))  # report 완료 후 STT 대기 한도
+SSE_KEEPALIVE_SEC = float(os.getenv("SSE_KEEPALIVE_SEC", "15"))
+
+
+# 1) async 작업 함수 (단계별 실행 + 오류 분류별 재시도 + 상태 업데이트)
+async def eval_and_update_call_retry(db, prev_report_text, call_id: str, object_name: str,
+                                     max_attempts: int = EVAL_MAX_ATTEMPTS, policy: RetryPolicy = retry_policy,
+                                     start_attempt: int = 1, audio_size: int = 0,
+                                     audio_sha256: Optional[str] = None, user_id: Optional[str] = None):
+    transcript: dict = {}
+    errors: list = []
+
+    async def stream_transcript(audio_bytes: bytes, filename: str):
+        # 턴 목록 반환 (텍스트 평가 provider 가 재사용), 실패하면 None
+        try:
+            turns = await transcribe_speeches_async(audio_bytes, filename=filename)
+        except Exception as e:
+            print(f"⚠️ STT 실패, transcript 이벤트 생략: {e}")
+            return None
+        await db["calls"].update_one({"_id": ObjectId(call_id)}, {"$set": {"transcript": turns}})
+        event_bus.emit(call_id, "transcript", {"turns": turns})
+        return turns
+
+    async def finish_transcript():
+        # report 보다 transcript 가 먼저 가도록 잠깐 기다린 뒤, 늦으면 포기
+        task = transcript.get("task")
+        if task is None or task.done():
+            return
+        try:
+            await asyncio.wait_for(task, EVAL_TRANSCRIPT_WAIT_SEC)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+
+    def emit_status(status: str, attempts: Optional[int] = None, error: Optional[str] = None):
+        event_bus.emit(call_id, "status", {"status": status, "attempts": attempts, "error": error})
+
+    async def mark_done(report_dict: dict, cache_hit: bool = False, provider: Optional[str] = None):
+        await finish_transcript()
         await db["calls"].update_one(
             {"_id": ObjectId(call_id)},
             {"$set": {
-                "evaluation_status": "running" if attempt == 1 else "retrying",
-                "evaluation_attempts": attempt,
+                "report": report_dict,
+                "evaluation_status": "done",
                 "updated_at": utcnow(),
-            }}
+                "evaluation_last_error": None,
+                "evaluation_error_class": None,
+                "report_cache_hit": cache_hit,
+                "evaluation_provider": provider,
+            },
+             "$unset": {"evaluation_lease_until": "", "evaluation_worker": ""}}
         )
+        for event, data in report_events(report_dict):
+            event_bus.emit(call_id, event, data)
+        emit_status("done")
+        eval_notifier.notify(user_id, call_id, "done")
+
+    # 0) 같은 오디오 + 같은 프롬프트 버전 + 같은 이전 report → 캐시된 report 재사용
+    prompt_version = None
+    if audio_sha256:
         try:
-            # 동기 함수 → 스레드에서 실행
-            data = await to_thread.run_sync(google_evaluate_text, eval_url, prev_report_text, True)
-            if not data:
-                raise ValueError("evaluate_text returned None/empty")
-
-            report = Report(**data)
-            await db["calls"].update_one(
-                {"_id": ObjectId(call_id)},
-                {"$set": {
-                    "report": report.model_dump(),
-                    "evaluation_status": "done",
-                    "updated_at": utcnow(),
-                    "evaluation_last_error": None,
-                }}
-            )
-            return True
+            prompt_version = await to_thread.run_sync(current_prompt_version)
+            cached = await report_cache.get(audio_sha256, prompt_version, prev_report_text) if prompt_version else None
         except Exception as e:
-            await db["calls"].update_one(
-                {"_id": ObjectId(call_id)},
-                {"$set": {"evaluation_last_error": str(e), "updated_at": utcnow()}}
-            )
-            return False
-
-    for attempt in range(1, max_attempts + 1):
-        if await run_once(attempt):
+            print(f"⚠️ report 캐시 조회 실패: {e}")
+            cached = None
+        if cached:
+            await mark_done(cached, cache_hit=True)
+            remove_spool(object_name)
             return
-        if attempt < max_attempts:
-            await asyncio.sleep(base_delay_sec * (2 ** (attempt - 1)))
 
+    async def on_prepared(prepared):
+        # 원본/전처리 정보 기록 + 전처리된 오디오로 STT 시작 (재시도 때는 다시 하지 않음)
+        fields = call_audio_fields(prepared)
+        if fields:
+            await db["calls"].update_one({"_id": ObjectId(call_id)}, {"$set": fields})
+        if EVAL_STREAM_TRANSCRIPT:
+            filename = os.path.splitext(os.path.basename(object_name))[0] + prepared.ext
+            transcript["task"] = asyncio.create_task(stream_transcript(prepared.data, filename))
+            stages.transcript = transcript["task"]
+
+    # download → preprocess → inference. 재시도는 실패한 단계부터 (앞 단계 결과 재사용)
+    stages = EvalStages(object_name, prev_report_text, audio_sha256, audio_size, on_prepared=on_prepared)
+    failures: dict = {}  # 오류 분류 → 이번 실행에서 실패한 횟수
+    attempt = start_attempt
+    status = "running" if attempt == 1 else "retrying"
     await db["calls"].update_one(
         {"_id": ObjectId(call_id)},
-        {"$set": {"evaluation_status": "failed", "updated_at": utcnow()}}
+        {"$set": {"evaluation_status": status, "evaluation_attempts": attempt, "updated_at": utcnow()}}
     )
+    emit_status(status, attempt)
 
+    try:
+        while True:
+            try:
+                report_dict = (await stages.run()).model_dump()
+            except Exception as e:
+                error_class = classify_error(e)
+                stage = stages.current
+                failures[error_class] = failures.get(error_class, 0) + 1
+                errors.append(f"[{stage}/{error_class}] {e}")
+                print(f"⚠️ 평가 실패 call={call_id} attempt={attempt} stage={stage} class={error_class}: {e}")
+                if attempt >= max_attempts or not policy.should_retry(error_class, failures[error_class]):
+                    break
+                # 실패 기록 + 다음 시도 예고를 한 번에 저장
+                attempt += 1
+                await db["calls"].update_one(
+                    {"_id": ObjectId(call_id)},
+                    {"$set": {
+                        "evaluation_status": "retrying",
+                        "evaluation_attempts": attempt,
+                        "evaluation_last_error": str(e),
+                        "evaluation_error_class": error_class,
+                        "updated_at": utcnow(),
+                    }}
+                )
+                emit_status("retrying", attempt, str(e))
+                await policy.sleep(error_class, failures[error_class])
+                continue
+
+            await mark_done(report_dict, provider=stages.provider)
+            if audio_sha256 and prompt_version:
+                try:
+                    await report_cache.put(audio_sha256, prompt_version, prev_report_text, report_dict,
+                                           provider=stages.provider)
+                except Exception as e:
+                    print(f"⚠️ report 캐시 저장 실패: {e}")
+            remove_spool(object_name)
+            return
 
-# 2) BackgroundTasks가 호출할 동기 브리지
-def schedule_eval_from_thread(db, prev_report_text, call_id: str, eval_url: str,
-                              max_attempts: int, base_delay_sec: int):
-    import anyio
-    # 스레드에서 메인 루프로 코루틴 실행
-    anyio.from_thread.run(
-        eval_and_update_call_retry,
-        db, prev_report_text, call_id, eval_url, max_attempts, base_delay_sec
+        await db["calls"].update_one(
+            {"_id": ObjectId(call_id)},
+            {"$set": {
+                "evaluation_status": "failed",
+                "evaluation_attempts": attempt,
+                "evaluation_last_error": errors[-1] if errors else None,
+                "evaluation_error_class": error_class,
+                "updated_at": utcnow(),
+            },
+             "$unset": {"evaluation_lease_until": "", "evaluation_worker": ""}}
+        )
+        emit_status("failed", attempt, errors[-1] if errors else None)
+        eval_notifier.notify(user_id, call_id, "failed")
+        remove_spool(object_name)
+    finally:
+        task = transcript.get("task")
+        if task is not None and not task.done():
+            task.cancel()
+
+
+# 2) 평가 큐(core.eval_queue) 워커가 선점한 call 문서를 처리
+async def run_eval_job(doc: dict):
+    # 재시작으로 다시 잡힌 작업은 이미 쓴 시도 횟수 이후부터 이어서 진행
+    await eval_and_update_call_retry(
+        main_db,
+        doc.get("evaluation_prev_report") or "",
+        str(doc["_id"]),
+        doc.get("audio_object") or object_name_from_url(doc["url"]),
+        EVAL_MAX_ATTEMPTS,
+        start_attempt=int(doc.get("evaluation_attempts") or 0) + 1,
+        audio_size=int(doc.get("audio_size") or 0),
+        audio_sha256=doc.get("audio_sha256"),
+        user_id=doc.get("user_id"),
     )
 
 
 
+def encode_cursor(doc: dict) -> str:
+    """(created_at, _id) → 불투명 커서 문자열"""
+    raw = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, oid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), ObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @call.post("", response_model=Call)
 async def create_call(
-    background: BackgroundTasks,
     phone_id: str = Form(...),
     customer_num: str = Form(...),
     customer_name: str = Form(...),
@@ -112,12 +239,8 @@ async def create_call(
     """
     통화기록 데이터 생성
     """
-    # 0) phone_id로 유저 확인 (가장 최근 생성된 user 선택)
-    user_doc = await db_dep["users"].find_one(
-        {"phone_id": phone_id},
-        sort=[("created_at", -1), ("_id", -1)],
-        projection={"_id": 1, "agent_id": 1}
-    )
+    # 0) phone_id로 유저 확인 (가장 최근 생성된 user 선택, 프로세스 내 캐시)
+    user_doc = await user_cache.get_by_phone(phone_id)
     if not user_doc:
         raise HTTPException(404, "User with this phone_id not found")
 
@@ -140,68 +263,94 @@ async def create_call(
     full_object_path = f"{today_str}/{object_name}"
 
     try:
-        mc.put_object(
-            MINIO_BUCKET,
-            full_object_path,
-            data=file.file,
-            length=-1,
-            part_size=10 * 1024 * 1024,
-            content_type=content_type,
-        )
+        # 업로드 전용 스레드 풀에서 실행 → 이벤트 루프 블로킹 없음
+        uploaded = await upload_fileobj(file.file, full_object_path, content_type)
     except S3Error as e:
         raise HTTPException(500, f"MinIO 업로드 실패: {e}")
 
-    
-    fixed_url = f"{PUBLIC_BASE}/{MINIO_BUCKET}/{full_object_path}"
-    eval_url = fixed_url
+    fixed_url = public_url(full_object_path)
 
-    # 3) call_count: (user_id, customer_num) 최신값 + 1 로 계산
-    latest = await db_dep["calls"].find_one(
-        {"user_id": user_id, "customer_num": customer_num},
-        sort=[("call_count", -1)],
-        projection={"call_count": 1},
-    )
-    next_count = (int(latest.get("call_count", 0)) + 1) if latest else 1
-
-    # ✅ 바로 이전 통화 1건의 report만 추출
-    if next_count > 1:
-        prev_doc = await db_dep["calls"].find_one(
-            {"user_id": user_id, "customer_num": customer_num},
-            sort=[("call_count", -1)],
-            projection={"report": 1, "call_count": 1}
+    # 3) 직전 통화 1건에서 call_count와 report를 한 번에 조회
+    #    ((user_id, customer_num, call_count desc) 유니크 인덱스 사용)
+    #    동시에 같은 고객 통화가 올라와 call_count가 겹치면 유니크 제약에 걸리므로 다시 계산
+    for _ in range(CALL_COUNT_MAX_RETRY):
+        latest = await db_dep["calls"].find_one(
+            prev_call(user_id, customer_num),
+            sort=PREV_CALL_SORT,
+            projection={"_id": 0, "call_count": 1, "report": 1},
         )
-        prev_report = (prev_doc or {}).get("report")
+        next_count = (int(latest.get("call_count", 0)) + 1) if latest else 1
+
+        # ✅ 바로 이전 통화 1건의 report
+        prev_report = (latest or {}).get("report")
         prev_report_text = json.dumps(prev_report, ensure_ascii=False) if prev_report else ""
+
+        # 4) 콜 문서 우선 저장 (report 없음, pending)
+        doc = Call(
+            user_id=user_id,               # ✅ phone_id로 찾은 user_id를 저장
+            agent_id=agent_id,
+            report=None,
+            created_at=utcnow(),
+            call_count=next_count,
+            customer_num=customer_num,
+            customer_name=customer_name,
+            url=fixed_url,
+            audio_size=uploaded.size,
+            audio_sha256=uploaded.sha256,
+            evaluation_status="pending",
+            evaluation_attempts=0
+        )
+        try:
+            # 평가 입력(이전 report)도 함께 저장 → 서버가 재시작돼도 큐에서 그대로 재개
+            res = await db_dep["calls"].insert_one({
+                **doc.model_dump(by_alias=True, exclude_none=True),
+                "evaluation_prev_report": prev_report_text,
+                "audio_object": full_object_path,
+            })
+            break
+        except DuplicateKeyError:
+            continue
     else:
-        prev_report_text = ""
-
-    # 4) 콜 문서 우선 저장 (report 없음, pending)
-    doc = Call(
-        user_id=user_id,               # ✅ phone_id로 찾은 user_id를 저장
-        agent_id=agent_id,
-        report=None,
-        created_at=utcnow(),
-        call_count=next_count,
-        customer_num=customer_num,
-        customer_name=customer_name,
-        url=fixed_url,
-        evaluation_status="pending",
-        evaluation_attempts=0
-    )
-    res = await db_dep["calls"].insert_one(doc.model_dump(by_alias=True, exclude_none=True))
+        raise HTTPException(409, "동시에 같은 고객 통화가 등록되어 call_count를 정하지 못했습니다. 다시 시도해 주세요.")
     call_id = str(res.inserted_id)
 
-    # 5) 백그라운드 평가 작업 등록
-    background.add_task(
-        schedule_eval_from_thread, db_dep, prev_report_text, call_id, eval_url, 3, 5
-    )
+    # 5) 평가 큐에 작업이 들어왔음을 알림 (pending 문서 자체가 작업)
+    eval_queue.notify()
 
     # 6) 즉시 응답
     created = await db_dep["calls"].find_one({"_id": ObjectId(call_id)})
     return Call.model_validate(created)
 
+# 0) 대량 내보내기 (NDJSON 스트리밍) — "/{call_id}" 보다 먼저 등록해야 함
+@call.get("/export")
+async def export_calls(
+    agent_id: Optional[str] = Query(None, description="상담원 agent_id"),
+    user_id: Optional[str] = Query(None, description="users._id"),
+    date_from: Optional[datetime] = Query(None, description="created_at 시작(포함), 시간대 없으면 KST"),
+    date_to: Optional[datetime] = Query(None, description="created_at 끝(제외), 시간대 없으면 KST"),
+    evaluation_status: Optional[str] = Query(None, description="pending | running | retrying | done | failed"),
+    fields: Optional[str] = Query(None, description="내보낼 필드 (쉼표 구분, 없으면 Call 전체)"),
+    gzip: bool = Query(False, description="gzip 압축(.ndjson.gz)으로 받기"),
+    db=Depends(get_db),
+):
+    """
+    통화기록 NDJSON 내보내기 (한 줄 = call 하나). 건수와 상관없이 서버 메모리 일정
+    """
+    projection = parse_fields(fields)
+    query = build_export_filter(agent_id, user_id, date_from, date_to, evaluation_status)
+
+    body = iter_ndjson(db["calls"], query, projection)
+    if gzip:
+        return StreamingResponse(
+            gzip_chunks(body),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="calls.ndjson.gz"'},
+        )
+    return StreamingResponse(body, media_type="application/x-ndjson")
+
+
 # 1) call_id로 단일 문서 조회
-@call.get("/{call_id}", response_model=Call)
+@call.get("/{call_id}", response_model=Call, response_class=TrustedJSONResponse)
 async def get_call_by_id(call_id: str, db=Depends(get_db)):
     """
     통화기록 id로 하나의 데이터객체 출력
@@ -210,16 +359,86 @@ async def get_call_by_id(call_id: str, db=Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid call_id")
 
     calls = db["calls"]
-    doc = await calls.find_one({"_id": ObjectId(call_id)})
+    doc = await calls.find_one({"_id": ObjectId(call_id)}, projection=CALL_PROJECTION)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Call not found")
+
+    # 우리가 검증 후 저장한 문서 → 재검증 없이 바로 직렬화
+    return TrustedJSONResponse(shape_doc(doc, Call))
+
+
+def sse_message(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data, default=str) + b"\n\n"
+
+
+EVENTS_PROJECTION = {"evaluation_status": 1, "evaluation_attempts": 1, "evaluation_last_error": 1,
+                     "transcript": 1, "report": 1}
+
+
+# 1-1) 평가 진행 상황 실시간 구독 (Server-Sent Events)
+@call.get("/{call_id}/events")
+async def stream_call_events(call_id: str, request: Request, db=Depends(get_db)):
+    """
+    평가 상태 변경(pending→running→retrying→done/failed)과 부분 결과(transcript → summary → criteria)를
+    SSE 로 전달. 구독 시점의 현재 상태를 먼저 보내고, done/failed 가 되면 스트림 종료
+    """
+    if not ObjectId.is_valid(call_id):
+        raise HTTPException(status_code=400, detail="Invalid call_id")
+
+    # 스냅샷 조회 전에 구독부터 (그 사이 이벤트 유실 방지)
+    queue = event_bus.subscribe(call_id)
+    try:
+        doc = await db["calls"].find_one({"_id": ObjectId(call_id)}, projection=EVENTS_PROJECTION)
+    except BaseException:
+        event_bus.unsubscribe(call_id, queue)
+        raise
     if not doc:
+        event_bus.unsubscribe(call_id, queue)
         raise HTTPException(status_code=404, detail="Call not found")
 
-    return Call.model_validate(doc)
+    async def body():
+        try:
+            for event, data in doc_events(doc):
+                yield sse_message(event, data)
+            if doc.get("evaluation_status") in TERMINAL_STATUSES:
+                return
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield sse_message(event, data)
+                if event == "status" and data.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            event_bus.unsubscribe(call_id, queue)
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# --- 목록 응답: 요약(CallBrief) projection + fields= 부분 필드 ---
+# 목록에서는 report 전체(conversation_list, criteria evidence 등) 대신 요약 필드만 읽음
+BRIEF_PROJECTION = model_projection(CallBrief)
+def parse_fields(fields: Optional[str]) -> Optional[dict]:
+    """fields=call_count,report.overall_score 형태 → Mongo projection (없으면 None)"""
+    try:
+        return fields_projection(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+FIELDS_QUERY = Query(
+    None,
+    description="부분 필드만 받기 (쉼표 구분, 예: call_count,evaluation_status,report.overall_score). "
+                "지정하지 않으면 CallBrief 요약 필드",
+)
 
 
 # 2) user_id로 해당 유저의 모든 call 조회 (요약 버전)
-@call.get("/user/{user_id}", response_model=list[Call])
-async def get_calls_by_user(user_id: str, db=Depends(get_db)):
+@call.get("/user/{user_id}", response_model=list[CallBrief], response_class=TrustedJSONResponse)
+async def get_calls_by_user(user_id: str, fields: Optional[str] = FIELDS_QUERY, db=Depends(get_db)):
     """
     해당 유저의 모든 통화기록 조회
     """
@@ -227,81 +446,108 @@ async def get_calls_by_user(user_id: str, db=Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid user_id")
 
     calls = db["calls"]
+    projection = parse_fields(fields)
 
     # ✅ 필요한 필드만 projection
     cursor = calls.find(
-        {"user_id": str(user_id)},
-    ).sort("created_at", -1)
+        calls_by_user(str(user_id)),
+        projection=projection or BRIEF_PROJECTION,
+    ).sort(CALL_LIST_SORT)
 
-    results = [Call.model_validate(doc) async for doc in cursor]
+    docs = [doc async for doc in cursor]
 
-    if not results:
+    if not docs:
         raise HTTPException(status_code=404, detail="No calls found for this user")
 
-    return results
+    if projection:
+        return TrustedJSONResponse([shape_sparse(doc) for doc in docs])
+    return TrustedJSONResponse(shape_docs(docs, CallBrief))
 
 
-@call.get("/user/{user_id}/paged", response_model=list[Call])
+@call.get("/user/{user_id}/paged", response_model=Union[CallPage, list[CallBrief]],
+          response_class=TrustedJSONResponse)
 async def get_calls_by_user_paginated(
     user_id: str,
     page: int = Query(1, description="페이지 번호", gt=0),
     limit: int = Query(30, description="페이지 당 결과 수", gt=0, le=100),
+    cursor: Optional[str] = Query(
+        None,
+        description="커서 모드: 첫 페이지는 빈 문자열, 이후엔 응답의 next_cursor 전달 (지정 시 page 무시)",
+    ),
+    fields: Optional[str] = FIELDS_QUERY,
     db=Depends(get_db)
 ):
     """
     해당 유저의 통화기록을 페이지네이션하여 조회 (기본 30개씩)
+    - page 모드(기존): list[CallBrief] 반환
+    - cursor 모드: (created_at, _id) 기준 keyset → {"items": [...], "next_cursor": "..."} 반환
     """
     if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="Invalid user_id")
 
     calls = db["calls"]
+    sort = CALL_LIST_SORT
+    projection = parse_fields(fields)
+
+    if cursor is not None:
+        # 직전 페이지 마지막 문서보다 "뒤"(더 오래된) 문서만 → offset 비용 없음, 새 통화가 들어와도 페이지가 밀리지 않음
+        query = calls_by_user(str(user_id), after=decode_cursor(cursor) if cursor else None)
+        # 다음 커서를 만들려면 created_at이 필요
+        page_projection = {**projection, "created_at": 1} if projection else BRIEF_PROJECTION
+        docs = [doc async for doc in calls.find(query, projection=page_projection).sort(sort).limit(limit + 1)]
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]) if has_more else None
+        items = [shape_sparse(doc) for doc in docs] if projection else shape_docs(docs, CallBrief)
+        return TrustedJSONResponse({"items": items, "next_cursor": next_cursor})
 
     # 페이지네이션을 위한 skip 값 계산
     skip = (page - 1) * limit
 
     # ✅ skip과 limit을 적용하여 쿼리
     cursor = calls.find(
-        {"user_id": str(user_id)},
-    ).sort("created_at", -1).skip(skip).limit(limit)
+        calls_by_user(str(user_id)),
+        projection=projection or BRIEF_PROJECTION,
+    ).sort(sort).skip(skip).limit(limit)
 
-    results = [Call.model_validate(doc) async for doc in cursor]
+    docs = [doc async for doc in cursor]
 
     # 참고: 만약 첫 페이지(page=1)에서 결과가 없을 때만 404를 반환하고 싶다면 아래와 같이 수정할 수 있습니다.
     # if not results and page == 1:
     #     raise HTTPException(status_code=404, detail="No calls found for this user")
 
-    return results
+    if projection:
+        return TrustedJSONResponse([shape_sparse(doc) for doc in docs])
+    return TrustedJSONResponse(shape_docs(docs, CallBrief))
 
 # 3) phone_id로 해당 유저의 모든 call 조회 (요약 버전)
-@call.get("/phone/{phone_id}", response_model=list[Call])
-async def get_calls_by_user(user_id: str, db=Depends(get_db)):
+@call.get("/phone/{phone_id}", response_model=list[CallBrief], response_class=TrustedJSONResponse)
+async def get_calls_by_phone_id(phone_id: str, fields: Optional[str] = FIELDS_QUERY, db=Depends(get_db)):
     """
     기기 아이디로 모든 통화기록 조회
     """
-    users = db["users"]
-
     # phone_id로 유저 찾기 — 가장 최근 생성된 유저 1명 선택
-    # created_at 정렬 우선, 없으면 _id 기준(생성시간)으로 보조 정렬
-    user_doc = await users.find_one(
-        {"phone_id": phone_id},
-        sort=[("created_at", -1), ("_id", -1)],
-        projection={"_id": 1}
-    )
+    # created_at 정렬 우선, 없으면 _id 기준(생성시간)으로 보조 정렬 (프로세스 내 캐시)
+    user_doc = await user_cache.get_by_phone(phone_id)
     if not user_doc:
         raise HTTPException(status_code=404, detail="User with this phone_id not found")
 
     user_id_str = str(user_doc["_id"])
 
     calls = db["calls"]
+    projection = parse_fields(fields)
 
     # ✅ 필요한 필드만 projection
     cursor = calls.find(
-        {"user_id": user_id_str}
-    ).sort("created_at", -1)
+        calls_by_user(user_id_str),
+        projection=projection or BRIEF_PROJECTION,
+    ).sort(CALL_LIST_SORT)
 
-    results = [Call.model_validate(doc) async for doc in cursor]
+    docs = [doc async for doc in cursor]
 
-    if not results:
+    if not docs:
         raise HTTPException(status_code=404, detail="No calls found for this user")
 
-    return results
+    if projection:
+        return TrustedJSONResponse([shape_sparse(doc) for doc in docs])
+    return TrustedJSONResponse(shape_docs(docs, CallBrief))
@@ -7,7 +7,11 @@ from firebase_admin import messaging  # Firebase 푸시 알림 기능을 사용
 
 # 2. 우리 프로젝트의 다른 모듈들을 가져옵니다.
 from core.db import get_db  # 데이터베이스 연결을 가져오는 함수
+from core.push_service import push_service, is_invalid_token_error  # 비동기 FCM 전송 + 만료 토큰 정리
+from core.queries import push_targets  # 푸시 대상 유저 조회 조건 (평가 알림과 공용)
+from core.user_cache import user_cache  # 유저 문서 캐시 (자주 바뀌지 않음)
 from schema.user import User  # 사용자 데이터의 형태를 정의한 스키마
+from schema.push import BulkPushIn, BulkPushResult  # 일괄 발송 요청/결과 스키마
 
 # 3. FastAPI의 APIRouter를 생성합니다.
 # 이 라우터에 등록된 모든 API는 주소 앞에 /push가 붙게 됩니다.
@@ -35,9 +39,8 @@ async def send_call_notification(
     if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="올바르지 않은 상담원 ID 형식입니다.")
 
-    # 데이터베이스의 'users' 컬렉션에서 해당 ID를 가진 상담원을 찾습니다.
-    users_collection = db["users"]
-    user_document = await users_collection.find_one({"_id": ObjectId(user_id)})
+    # 'users' 컬렉션에서 해당 ID를 가진 상담원을 찾습니다. (최근 조회한 상담원은 캐시에서)
+    user_document = await user_cache.get_by_id(user_id)
 
     # 상담원이 존재하지 않으면, 404 Not Found 에러를 반환하고 함수를 종료합니다.
     if not user_document:
@@ -82,7 +85,8 @@ async def send_call_notification(
     print("Firebase에 푸시 알림 발송을 요청합니다...")
     try:
         # 생성한 메시지를 Firebase 서버로 전송합니다.
-        response = messaging.send(message_to_send)
+        # (동기 전송은 스레드에서 실행되므로 그동안 서버가 다른 요청을 처리할 수 있습니다)
+        response = await push_service.send(message_to_send)
         
         # 성공 시, Firebase가 반환하는 메시지 ID를 로그에 남깁니다.
         print(f"푸시 알림 발송 성공! Message ID: {response}")
@@ -97,9 +101,58 @@ async def send_call_notification(
     except Exception as e:
         # 메시지 전송 중 오류가 발생한 경우 (예: 토큰이 만료됨)
         print(f"푸시 알림 발송 중 오류 발생: {e}")
+
+        # 만료/잘못된 토큰이면 이미 DB에서 지워졌으므로, 앱에서 토큰을 다시 등록해야 합니다.
+        if is_invalid_token_error(e):
+            raise HTTPException(
+                status_code=410,
+                detail=f"상담원 '{user.agent_id}'의 푸시 토큰이 만료되어 삭제했습니다. 앱에서 다시 등록해야 합니다."
+            )
         
         # 웹(호출한 쪽)에 실패 메시지와 함께 500 Server Error를 반환합니다.
         raise HTTPException(
             status_code=500,
             detail=f"푸시 알림 발송에 실패했습니다: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+# 여러 상담원에게 같은 알림을 한 번에 보냅니다. (공지, 일괄 안내 등)
+@push.post("/bulk", response_model=BulkPushResult)
+async def send_bulk_notification(payload: BulkPushIn, db=Depends(get_db)):
+    """
+    user_ids 의 상담원들에게 같은 푸시 알림을 일괄 전송.
+    토큰 500개씩 묶어서 보내고, 만료/잘못된 토큰은 자동으로 정리.
+    """
+    # --- 1. 대상 상담원들의 토큰을 한 번에 조회 ---
+    user_ids = list(dict.fromkeys(payload.user_ids))  # 중복 제거 (순서 유지)
+    oids = [ObjectId(uid) for uid in user_ids if ObjectId.is_valid(uid)]
+    token_to_user = {}
+    async for doc in db["users"].find(
+        push_targets(oids),
+        projection={"push_token": 1},
+    ):
+        token_to_user.setdefault(doc["push_token"], str(doc["_id"]))
+
+    found = set(token_to_user.values())
+    missing = [uid for uid in user_ids if uid not in found]
+
+    # --- 2. 메시지 구성 (title 이 없으면 앱이 직접 처리하는 data 메시지만) ---
+    notification = None
+    if payload.title or payload.body:
+        notification = messaging.Notification(title=payload.title, body=payload.body)
+
+    # --- 3. 일괄 발송 ---
+    result = await push_service.send_multicast(list(token_to_user), data=payload.data or None,
+                                               notification=notification)
+    print(f"일괄 푸시 발송: 대상 {len(token_to_user)}명, 성공 {result.success}, 실패 {result.failure}, "
+          f"토큰 정리 {result.pruned}")
+
+    return BulkPushResult(
+        requested=len(user_ids),
+        targeted=len(token_to_user),
+        success=result.success,
+        failure=result.failure,
+        pruned=result.pruned,
+        missing_token=missing,
+        errors={token_to_user[t]: err for t, err in result.errors.items()},
+    )
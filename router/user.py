@@ -3,6 +3,8 @@ from bson import ObjectId
 from typing import Any, Dict
 
 from core.db import get_db
+from core.queries import active_users, ALL_USERS_SORT
+from core.user_cache import user_cache
 from schema.user import UserIn, User
 
 user = APIRouter(prefix="/user", tags=["user"])
@@ -21,10 +23,8 @@ async def get_all_user(db = Depends(get_db)):
     """
     users_col = db["users"]
     
-    # is_deleted가 True가 아닌 (즉, False이거나 필드가 없는) 사용자만 찾도록 필터 추가
-    query = {"is_deleted": {"$ne": True}}
-    
-    cursor = users_col.find(query).sort("created_at", -1)
+    # 삭제되지 않은 사용자만 (is_deleted 가 없는 예전/수동 입력 문서 포함)
+    cursor = users_col.find(active_users()).sort(ALL_USERS_SORT)
     return [User.model_validate(doc) async for doc in cursor]
 
 
@@ -39,6 +39,8 @@ async def create_user(payload: UserIn, db = Depends(get_db)):
     user_doc = User(**payload.model_dump())
 
     res = await users.insert_one(user_doc.model_dump(by_alias=True, exclude_none=True))
+    # 같은 phone_id 의 '최신 유저' 캐시가 바뀌므로 무효화
+    user_cache.invalidate(phone_id=payload.phone_id)
     created = await users.find_one({"_id": res.inserted_id})
 
     return User.model_validate(created)
@@ -52,12 +54,8 @@ async def get_user_by_id(id: str, db = Depends(get_db)): # 함수 이름 변경
     if not ObjectId.is_valid(id):
         raise HTTPException(400, "Invalid ObjectId format")
 
-    users = db["users"]
-    
-    # 조회 조건에 is_deleted 필터 추가
-    query = {"_id": ObjectId(id), "is_deleted": {"$ne": True}}
-    
-    doc = await users.find_one(query)
+    # 삭제되지 않은 유저만 (프로세스 내 캐시)
+    doc = await user_cache.get_by_id(id, active_only=True)
     
     # doc이 없으면 (ID가 없거나, 있더라도 is_deleted=True인 경우) 404 에러
     if not doc:
@@ -72,29 +70,17 @@ async def get_user_by_phone_id(phone_id: str, db = Depends(get_db)): # 함수 
     """
     기기 id로 유저 한명 출력
     """
-    users = db["users"]
+    # 삭제되지 않은 유저 중 최신 (프로세스 내 캐시)
+    user_doc = await user_cache.get_by_phone(phone_id, active_only=True)
 
-    # 조회 조건에 is_deleted 필터 추가
-    query = {"phone_id": phone_id, "is_deleted": {"$ne": True}}
-    
-    user_doc = await users.find_one(
-        query,
-        sort=[("created_at", -1), ("_id", -1)],
-        projection={
-            "_id": 1,
-            "agent_id": 1,
-            "phone_id": 1,
-            "created_at": 1,
-            "is_deleted": 1, # is_deleted 필드도 함께 가져오도록 추가 (선택)
-        },
-    )
-    
     if not user_doc:
         raise HTTPException(
             status_code=404,
             detail="User with this phone_id not found or has been deleted"
         )
     
+    # push_token 은 이 응답에 포함하지 않음
+    user_doc.pop("push_token", None)
     return User.model_validate(user_doc)
 
 @user.put("/{user_id}/logout")
@@ -114,6 +100,7 @@ async def logout_user_by_id(user_id: str, db = Depends(get_db)):
         {"_id": ObjectId(user_id)},
         {"$set": {"is_deleted": True}}
     )
+    user_cache.invalidate(user_id=user_id)
 
     if res.matched_count == 0:
         raise HTTPException(
@@ -10,6 +10,13 @@ class ConversationTurn(BaseModel):
     text: str
     speaker_role: Literal["agent", "customer"]
 
+# STT 턴 (평가 중 transcript 이벤트로 먼저 전달)
+class TranscriptTurn(BaseModel):
+    speaker: str
+    text: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+
 # 평가 항목 상세
 class CriteriaDetail(BaseModel):
     score: int = Field(ge=0, le=100)
@@ -42,14 +49,24 @@ class Call(MongoBaseModel, CreatedAtKSTMixin):
     user_id: str = Field(..., description="users._id (문자열) 보관")
     agent_id: str
     report: Optional[Report] = None
+    transcript: Optional[List[TranscriptTurn]] = None  # 평가 중 STT 결과 (EVAL_STREAM_TRANSCRIPT)
     created_at: Optional[datetime] = None
     call_count: int = Field(ge=1)
     customer_num: str
     customer_name : Optional[str] = None
     url: str
+    audio_size: Optional[int] = None               # 업로드된 원본 오디오 크기(byte)
+    audio_sha256: Optional[str] = None             # 업로드 중 계산한 오디오 내용 해시
+    audio_format: Optional[str] = None             # ffprobe 로 확인한 실제 컨테이너 (예: "mov,mp4,m4a,3gp,3g2,mj2")
+    audio_duration_sec: Optional[float] = None     # 원본 길이(초)
+    processed_audio_size: Optional[int] = None     # 평가 전처리(mono 16kHz, 앞뒤 무음 제거) 후 크기(byte)
+    processed_audio_duration_sec: Optional[float] = None
+    processed_audio_mime: Optional[str] = None
     evaluation_status: str = "pending"              # "pending" | "running" | "retrying" | "done" | "failed"
-    evaluation_attempts: int = 0   
+    evaluation_attempts: int = 0
     evaluation_last_error: Optional[str] = None
+    evaluation_error_class: Optional[str] = None   # "transient" | "rate_limit" | "validation" | "permanent"
+    evaluation_provider: Optional[str] = None      # report 를 만든 평가 백엔드 ("gemini" | "openai" | "fake")
 
 
 class ReportBrief(BaseModel):
@@ -57,7 +74,7 @@ class ReportBrief(BaseModel):
     keyword: List[str] = []
     is_valid: bool
 
-class CallBrief(MongoBaseModel):
+class CallBrief(MongoBaseModel, CreatedAtKSTMixin):
     user_id: str
     agent_id: str
     report: Optional[ReportBrief] = None   # pending인 경우 None일 수 있음
@@ -69,3 +86,9 @@ class CallBrief(MongoBaseModel):
     evaluation_status: str = "pending"
     evaluation_attempts: int = 0
     evaluation_last_error: Optional[str] = None
+
+
+# 커서(keyset) 페이지네이션 응답
+class CallPage(BaseModel):
+    items: List[CallBrief] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="다음 페이지 요청 시 cursor로 전달 (없으면 마지막 페이지)")
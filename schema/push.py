@@ -0,0 +1,28 @@
+from __future__ import annotations
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+
+# 여러 상담원에게 같은 알림 보내기
+class BulkPushIn(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, description="users._id 목록")
+    title: Optional[str] = None                       # 없으면 data 메시지만 전송
+    body: Optional[str] = None
+    data: Dict[str, str] = Field(default_factory=dict)  # 앱과 약속한 key/value (문자열만)
+
+    @model_validator(mode="after")
+    def _not_empty(self):
+        # 빈 알림이 모든 토큰으로 나가지 않도록 (FastAPI 가 422 로 응답)
+        if not (self.title or self.body or self.data):
+            raise ValueError("title, body, data 중 하나는 있어야 합니다")
+        return self
+
+
+class BulkPushResult(BaseModel):
+    requested: int                 # 요청한 유저 수
+    targeted: int                  # 토큰이 있어 실제로 보낸 수
+    success: int
+    failure: int
+    pruned: int                    # 정리된 만료/잘못된 토큰 수
+    missing_token: List[str] = Field(default_factory=list)  # 토큰이 없거나 없는 유저
+    errors: Dict[str, str] = Field(default_factory=dict)    # user_id → 오류
@@ -1,13 +1,85 @@
 # stt.py
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Union
+from typing import List, Tuple, Dict, Any, Optional, Union
 from dotenv import load_dotenv
 
 load_dotenv()
 API_KEY = os.getenv("ELEVENLABS_API_KEY")
 MODEL_ID = os.getenv("ELEVENLABS_STT_MODEL", "scribe_v1")
 
+# 긴 녹음 분할 처리
+STT_CHUNK_MIN_SEC = float(os.getenv("STT_CHUNK_MIN_SEC", "300"))       # 이 길이 이상이면 자동 분할
+STT_CHUNK_SEC = float(os.getenv("STT_CHUNK_SEC", "120"))               # 청크 목표 길이
+STT_CHUNK_OVERLAP_SEC = float(os.getenv("STT_CHUNK_OVERLAP_SEC", "4"))  # 경계 양쪽 겹침(합계)
+STT_CHUNK_WORKERS = int(os.getenv("STT_CHUNK_WORKERS", "4"))
+
+# ElevenLabs HTTP 연결 (프로세스 전역 클라이언트, keep-alive 로 TLS 재사용)
+STT_CONNECT_TIMEOUT_SEC = float(os.getenv("STT_CONNECT_TIMEOUT_SEC", "10"))
+STT_READ_TIMEOUT_SEC = float(os.getenv("STT_READ_TIMEOUT_SEC", "240"))
+STT_MAX_CONNECTIONS = int(os.getenv("STT_MAX_CONNECTIONS", "16"))
+STT_KEEPALIVE_SEC = float(os.getenv("STT_KEEPALIVE_SEC", "60"))
+
+_client = None
+_async_client = None
+_http = None        # httpx.Client (동기 클라이언트가 사용)
+_async_http = None  # httpx.AsyncClient
+_client_lock = threading.Lock()
+
+
+def _http_options() -> Dict[str, Any]:
+    import httpx
+    return {
+        "timeout": httpx.Timeout(STT_READ_TIMEOUT_SEC, connect=STT_CONNECT_TIMEOUT_SEC),
+        "limits": httpx.Limits(
+            max_connections=STT_MAX_CONNECTIONS,
+            max_keepalive_connections=STT_MAX_CONNECTIONS,
+            keepalive_expiry=STT_KEEPALIVE_SEC,
+        ),
+        "follow_redirects": True,
+    }
+
+
+def get_client():
+    """동기 ElevenLabs 클라이언트 (스레드 간 공유, 처음 호출 때 생성)"""
+    global _client, _http
+    if not API_KEY:
+        raise RuntimeError("ELEVENLABS_API_KEY가 .env에 없습니다.")
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from elevenlabs.client import ElevenLabs
+                _http = httpx.Client(**_http_options())
+                _client = ElevenLabs(api_key=API_KEY, timeout=STT_READ_TIMEOUT_SEC, httpx_client=_http)
+    return _client
+
+
+def get_async_client():
+    """비동기 ElevenLabs 클라이언트 (이벤트 루프 하나에서 공유)"""
+    global _async_client, _async_http
+    if not API_KEY:
+        raise RuntimeError("ELEVENLABS_API_KEY가 .env에 없습니다.")
+    if _async_client is None:
+        import httpx
+        from elevenlabs.client import AsyncElevenLabs
+        _async_http = httpx.AsyncClient(**_http_options())
+        _async_client = AsyncElevenLabs(api_key=API_KEY, timeout=STT_READ_TIMEOUT_SEC, httpx_client=_async_http)
+    return _async_client
+
+
+async def aclose_clients() -> None:
+    """앱 종료 시 연결 풀 정리"""
+    global _client, _async_client, _http, _async_http
+    if _async_http is not None:
+        await _async_http.aclose()
+    if _http is not None:
+        _http.close()
+    _client = _async_client = _http = _async_http = None
+
 def _to_dict(x: Any) -> Dict[str, Any]:
     """Pydantic 모델/일반 dict를 공통 dict로 정규화"""
     if hasattr(x, "model_dump"):  # pydantic v2
@@ -115,34 +187,78 @@ def _merge_items_by_speaker(
 
     return turns
 
-def transcribe_speeches(audio_path: str | Path, expected_speakers: int = 2) -> List[Dict[str, Union[str, float]]]:
+class _Turn:
+    """병합 중인 턴 (단어 수만큼 생기지 않도록 턴 단위로만 만듦)"""
+    __slots__ = ("label", "tokens", "start", "end")
+
+    def __init__(self, label: str, token: str, start, end):
+        self.label = label
+        self.tokens = [token]
+        self.start = start
+        self.end = end
+
+    def as_dict(self) -> Dict[str, Union[str, float]]:
+        return {
+            "speaker": self.label,
+            "text": " ".join(self.tokens),
+            "start": round(float(self.start), 2) if self.start is not None else None,
+            "end": round(float(self.end), 2) if self.end is not None else None,
+        }
+
+
+_LABELS = ("speech1", "speech2", "speech3", "speech4")
+
+
+def _merge_words(words: Any) -> List[Dict[str, Union[str, float]]]:
     """
-    m4a/mp3/wav → ElevenLabs STT(diarize) →
-    [
-      {"speaker": "speech1", "text": "...", "start": 0.12, "end": 2.34},
-      {"speaker": "speech2", "text": "...", "start": 2.50, "end": 5.10},
-      ...
-    ]
+    word 목록(SDK 객체 또는 dict) → 화자별 턴, 한 번 순회로 처리.
+    _to_dict → 작은 조각 묶기 → _merge_items_by_speaker 를 거친 결과와 같음:
+    - 라벨: 등장 순서대로 speech1..4 (5번째 화자부터 speech4)
+    - start: 턴의 첫 번째 None 아닌 값, end: 마지막 None 아닌 값 (소수점 2자리)
     """
-    if not API_KEY:
-        raise RuntimeError("ELEVENLABS_API_KEY가 .env에 없습니다.")
-    p = Path(audio_path)
-    if not p.exists():
-        raise FileNotFoundError(f"파일이 없습니다: {p.resolve()}")
+    labels: Dict[str, str] = {}
+    turns: List[Dict[str, Union[str, float]]] = []
+    cur: Optional[_Turn] = None
 
-    from elevenlabs.client import ElevenLabs
-    client = ElevenLabs(api_key=API_KEY)
+    for w in words:
+        if isinstance(w, dict):
+            text = w.get("text")
+            raw = w.get("speaker_id") or w.get("speaker")
+            s = w.get("start")
+            e = w.get("end")
+        else:
+            text = getattr(w, "text", None)
+            raw = getattr(w, "speaker_id", None) or getattr(w, "speaker", None)
+            s = getattr(w, "start", None)
+            e = getattr(w, "end", None)
 
-    with p.open("rb") as f:
-        resp = client.speech_to_text.convert(
-            file=f,
-            model_id=MODEL_ID,
-            diarize=True,
-            num_speakers=expected_speakers,
-            timestamps_granularity="word",  # 'segment'로 바꾸고 싶으면 여기만 교체
-            language_code="ko",
-        )
+        token = text.strip() if text else ""
+        if not token:
+            continue
 
+        key = str(raw) if raw is not None else "__unknown__"
+        label = labels.get(key)
+        if label is None:
+            label = labels[key] = _LABELS[min(len(labels), len(_LABELS) - 1)]
+
+        if cur is None or label != cur.label:
+            if cur is not None:
+                turns.append(cur.as_dict())
+            cur = _Turn(label, token, s, e)
+        else:
+            cur.tokens.append(token)
+            if cur.start is None:
+                cur.start = s
+            if e is not None:
+                cur.end = e
+
+    if cur is not None:
+        turns.append(cur.as_dict())
+    return turns
+
+
+def _turns_from_response(resp: Any) -> List[Dict[str, Union[str, float]]]:
+    """ElevenLabs STT 응답 → 화자별 턴 목록"""
     words = getattr(resp, "words", None)
     segments = getattr(resp, "segments", None)
 
@@ -159,58 +275,225 @@ def transcribe_speeches(audio_path: str | Path, expected_speakers: int = 2) -> L
 
     # 2) word 기반(단어들을 같은 화자 기준으로 묶으면서 start/end 계산)
     if words:
-        ws = [_to_dict(w) for w in words]
-        # word → 작은 조각으로 먼저 묶어 준 뒤(연속 화자), 그 결과를 merge 함수에 태워 동일 로직
-        merged_small: List[Dict[str, Any]] = []
-        cur_spk = None
-        buf: List[str] = []
-        start = None
-        end = None
-
-        def flush_small():
-            nonlocal buf, start, end, cur_spk
-            if buf:
-                merged_small.append({
-                    "speaker_id": cur_spk,
-                    "text": " ".join(buf).strip(),
-                    "start": start,
-                    "end": end,
-                })
-            buf = []
-            start = None
-            end = None
-
-        for w in ws:
-            spk = w.get("speaker_id")
-            token = (w.get("text") or "").strip()
-            s = w.get("start")
-            e = w.get("end")
-            if not token:
-                continue
-            if spk != cur_spk:
-                flush_small()
-                cur_spk = spk
-                buf = [token]
-                start = s
-                end = e
-            else:
-                buf.append(token)
-                if start is None and s is not None:
-                    start = s
-                if e is not None:
-                    end = e
-        flush_small()
-
-        return _merge_items_by_speaker(
-            merged_small,
-            field_text="text",
-            field_speaker="speaker_id",
-            field_start="start",
-            field_end="end",
-        )
+        return _merge_words(words)
 
     # 3) 타임라인 정보가 전혀 없고 전체 텍스트만 있을 때
     whole = getattr(resp, "text", None) or (resp.get("text") if isinstance(resp, dict) else None)
     if not whole:
         raise RuntimeError(f"STT 결과를 해석할 수 없습니다: {type(resp)}")
     return [{"speaker": "speech1", "text": whole.strip(), "start": None, "end": None}]
+
+
+def _convert_kwargs(expected_speakers: int) -> Dict[str, Any]:
+    return dict(
+        model_id=MODEL_ID,
+        diarize=True,
+        num_speakers=expected_speakers,
+        timestamps_granularity="word",  # 'segment'로 바꾸고 싶으면 여기만 교체
+        language_code="ko",
+    )
+
+
+def _convert(client, fileobj, expected_speakers: int):
+    return client.speech_to_text.convert(file=fileobj, **_convert_kwargs(expected_speakers))
+
+
+# ---------------------------------------------------------------------------
+# 긴 녹음: 무음 경계로 겹치게 잘라서 병렬 STT → 이어붙이기
+# ---------------------------------------------------------------------------
+
+def _chunk_words(resp: Any, idx: int, offset: float, span: Tuple[float, float]) -> List[Dict[str, Any]]:
+    """청크 응답 → 원본 기준 시간/청크별 화자 id 가 붙은 word 목록"""
+    words = [_to_dict(w) for w in (getattr(resp, "words", None) or [])]
+    if not words:
+        text = getattr(resp, "text", None) or ""
+        words = [{"text": text, "start": 0.0, "end": span[1] - span[0], "speaker_id": None}] if text.strip() else []
+    out = []
+    for w in words:
+        if not (w.get("text") or "").strip():
+            continue
+        out.append({
+            "text": w["text"],
+            "start": w["start"] + offset if w.get("start") is not None else None,
+            "end": w["end"] + offset if w.get("end") is not None else None,
+            "speaker_id": (idx, w.get("speaker_id")),
+        })
+    return out
+
+
+def _vote_speakers(prev: List[Dict[str, Any]], cur: List[Dict[str, Any]],
+                   lo: float, hi: float) -> Dict[Any, Any]:
+    """
+    겹치는 구간 [lo, hi) 안에서 시간이 겹치는 단어끼리 화자 투표 →
+    cur 청크의 화자 id → prev 청크의 (전역) 화자 id (1:1, 표가 많은 쌍부터)
+    """
+    votes: Dict[Tuple[Any, Any], float] = {}
+    a = [w for w in prev if w["start"] is not None and w["end"] is not None and lo <= w["start"] < hi]
+    b = [w for w in cur if w["start"] is not None and w["end"] is not None and lo <= w["start"] < hi]
+    for wb in b:
+        for wa in a:
+            ov = min(wa["end"], wb["end"]) - max(wa["start"], wb["start"])
+            if ov > 0:
+                bonus = 2.0 if wa["text"].strip() == wb["text"].strip() else 1.0
+                key = (wb["speaker_id"], wa["speaker_id"])
+                votes[key] = votes.get(key, 0.0) + ov * bonus
+
+    mapping: Dict[Any, Any] = {}
+    used = set()
+    for (local, glob), _ in sorted(votes.items(), key=lambda kv: kv[1], reverse=True):
+        if local in mapping or glob in used:
+            continue
+        mapping[local] = glob
+        used.add(glob)
+    return mapping
+
+
+def _stitch_chunks(chunks: List[List[Dict[str, Any]]], spans: List[Tuple[float, float]]) -> List[Dict[str, Any]]:
+    """
+    청크별 word 목록을 하나로:
+    - 화자: 겹치는 구간 투표로 이전 청크 화자에 맞춤. 투표가 없는 화자는 아직 안 쓰인 기존 화자 → 없으면 새 화자
+    - 중복: 겹치는 구간 한가운데를 기준으로 앞 청크는 그 전, 뒤 청크는 그 후 단어만 사용
+    """
+    out: List[Dict[str, Any]] = []
+    known: List[str] = []  # 등장 순서대로의 전역 화자 id
+    prev: List[Dict[str, Any]] = []
+
+    for i, words in enumerate(chunks):
+        mapping: Dict[Any, Any] = {}
+        if i > 0:
+            lo, hi = spans[i][0], spans[i - 1][1]
+            mapping = _vote_speakers(prev, words, lo, hi)
+            cut = (lo + hi) / 2
+            out = [w for w in out if w["start"] is None or w["start"] < cut]
+            words = [w for w in words if w["start"] is None or w["start"] >= cut]
+
+        for w in words:
+            local = w["speaker_id"]
+            if local not in mapping:
+                free = [g for g in known if g not in mapping.values()]
+                if free:
+                    mapping[local] = free[0]
+                else:
+                    mapping[local] = f"speaker_{len(known)}"
+                    known.append(mapping[local])
+            w["speaker_id"] = mapping[local]
+
+        out.extend(words)
+        prev = words
+    return out
+
+
+def transcribe_speeches_chunked(audio_path: str | Path, expected_speakers: int = 2,
+                                chunk_sec: float = None, overlap_sec: float = None,
+                                workers: int = None) -> List[Dict[str, Union[str, float]]]:
+    """
+    긴 녹음용: 무음 경계에서 겹치게 잘라 청크별 STT를 동시에 돌리고 다시 이어붙임.
+    전체 소요 시간 ≈ (청크 수 / workers) × 청크 하나 처리 시간
+    """
+    from core.audio import probe_duration, detect_silences, plan_chunks, cut_chunk
+
+    chunk_sec = chunk_sec or STT_CHUNK_SEC
+    overlap_sec = STT_CHUNK_OVERLAP_SEC if overlap_sec is None else overlap_sec
+    workers = workers or STT_CHUNK_WORKERS
+
+    path = str(audio_path)
+    duration = probe_duration(path)
+    spans = plan_chunks(duration, detect_silences(path), chunk_sec, overlap_sec)
+    client = get_client()
+
+    def run(idx: int, span: Tuple[float, float], tmpdir: str) -> List[Dict[str, Any]]:
+        chunk_path = cut_chunk(path, span[0], span[1], os.path.join(tmpdir, f"chunk_{idx:04d}.flac"))
+        with open(chunk_path, "rb") as f:
+            resp = _convert(client, f, expected_speakers)
+        return _chunk_words(resp, idx, span[0], span)
+
+    with tempfile.TemporaryDirectory(prefix="stt_chunks_") as tmpdir:
+        with ThreadPoolExecutor(max_workers=min(workers, len(spans))) as pool:
+            chunks = list(pool.map(lambda a: run(a[0], a[1], tmpdir), enumerate(spans)))
+
+    return _merge_words(_stitch_chunks(chunks, spans))
+
+
+def transcribe_speeches(audio_path: str | Path, expected_speakers: int = 2,
+                        chunked: Optional[bool] = None) -> List[Dict[str, Union[str, float]]]:
+    """
+    m4a/mp3/wav → ElevenLabs STT(diarize) →
+    [
+      {"speaker": "speech1", "text": "...", "start": 0.12, "end": 2.34},
+      {"speaker": "speech2", "text": "...", "start": 2.50, "end": 5.10},
+      ...
+    ]
+    chunked: True면 분할 병렬 처리, None이면 길이가 STT_CHUNK_MIN_SEC 이상일 때만 (ffmpeg 필요)
+    """
+    p = Path(audio_path)
+    if not p.exists():
+        raise FileNotFoundError(f"파일이 없습니다: {p.resolve()}")
+    client = get_client()
+
+    if chunked is None:
+        from core.audio import ffmpeg_available, probe_duration
+        chunked = ffmpeg_available() and probe_duration(str(p)) >= STT_CHUNK_MIN_SEC
+    if chunked:
+        return transcribe_speeches_chunked(p, expected_speakers)
+
+    with p.open("rb") as f:
+        resp = _convert(client, f, expected_speakers)
+
+    return _turns_from_response(resp)
+
+
+def _transcribe_long_bytes(data: bytes, expected_speakers: int,
+                           suffix: str = "") -> Optional[List[Dict[str, Union[str, float]]]]:
+    """
+    메모리의 오디오를 임시 파일로 써서 길이를 확인하고,
+    STT_CHUNK_MIN_SEC 이상이면 분할 병렬 처리 (짧거나 길이를 못 읽으면 None → 단일 요청)
+    """
+    from core.audio import probe_duration
+
+    fd, path = tempfile.mkstemp(prefix="stt_in_", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            duration = probe_duration(path)
+        except Exception as e:
+            print(f"⚠️ STT 입력 길이 확인 실패, 단일 요청으로 처리: {e}")
+            return None
+        if duration < STT_CHUNK_MIN_SEC:
+            return None
+        return transcribe_speeches_chunked(path, expected_speakers)
+    finally:
+        os.unlink(path)
+
+
+async def transcribe_speeches_async(audio: Union[str, Path, bytes], expected_speakers: int = 2,
+                                    filename: str = "audio.m4a") -> List[Dict[str, Union[str, float]]]:
+    """
+    transcribe_speeches 의 비동기 버전 (FastAPI에서 워커 스레드 없이 await)
+    audio: 파일 경로 또는 이미 메모리에 있는 bytes
+    긴 녹음 분할 처리(ffmpeg)는 동기 경로를 스레드에서 실행 (bytes 는 임시 파일로 써서 길이 확인)
+    """
+    from anyio import to_thread
+    from core.audio import ffmpeg_available, probe_duration
+
+    if isinstance(audio, (bytes, bytearray)):
+        if ffmpeg_available():
+            turns = await to_thread.run_sync(
+                _transcribe_long_bytes, bytes(audio), expected_speakers, Path(filename).suffix
+            )
+            if turns is not None:
+                return turns
+    else:
+        p = Path(audio)
+        if not p.exists():
+            raise FileNotFoundError(f"파일이 없습니다: {p.resolve()}")
+        if ffmpeg_available() and await to_thread.run_sync(probe_duration, str(p)) >= STT_CHUNK_MIN_SEC:
+            return await to_thread.run_sync(transcribe_speeches_chunked, p, expected_speakers)
+        filename = p.name
+        audio = await to_thread.run_sync(p.read_bytes)
+
+    client = get_async_client()
+    resp = await client.speech_to_text.convert(
+        file=(filename, bytes(audio)), **_convert_kwargs(expected_speakers)
+    )
+    return _turns_from_response(resp)
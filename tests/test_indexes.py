@@ -0,0 +1,43 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.errors import PyMongoError
+
+from core.indexes import QUERY_SHAPES, audit_query_shapes, reconcile_indexes
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+
+
+def _mongod_reachable() -> bool:
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
+
+
+@pytest.mark.skipif(not _mongod_reachable(), reason=f"mongod 에 연결할 수 없음 ({MONGO_URI})")
+def test_query_shapes_use_indexes():
+    async def run():
+        client = AsyncMongoClient(MONGO_URI)
+        db_name = f"chadamjin_index_test_{uuid.uuid4().hex[:8]}"
+        try:
+            database = client[db_name]
+            await reconcile_indexes(database)
+            results = await audit_query_shapes(database)
+        finally:
+            await client.drop_database(db_name)
+            await client.close()
+        return results
+
+    results = asyncio.run(run())
+    assert len(results) == len(QUERY_SHAPES)
+    failures = {f"{shape.collection}.{shape.name}": " > ".join(stages)
+                for shape, stages, bad in results if bad}
+    assert not failures, f"COLLSCAN/메모리 SORT: {failures}"
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from core.rate_limit import EvalLimiter, LimiterFull
+
+
+def test_slot_raises_limiter_full_when_queue_is_full():
+    async def run():
+        limiter = EvalLimiter(max_in_flight=1, rpm=6000, bytes_per_min=10 ** 9, max_queue=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot(10):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())  # 슬롯이 없어 대기열로
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        assert not limiter.has_capacity()
+
+        with pytest.raises(LimiterFull):
+            async with limiter.slot(10):
+                pass
+        assert limiter.total_rejected == 1
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+        assert limiter.has_capacity()
+
+    asyncio.run(run())
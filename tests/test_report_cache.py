@@ -0,0 +1,59 @@
+import asyncio
+
+from core.audio import PreparedAudio
+from core.report_cache import ReportCache
+from eval_providers import FakeProvider, Provider, ProviderRouter
+
+
+class MemoryCollection:
+    """report_cache 컬렉션 대역 (update_one upsert / find_one 만)"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"_id": query["_id"]}).update(update["$set"])
+
+    async def find_one(self, query, projection=None):
+        doc = self.docs.get(query["_id"])
+        if doc and doc["expires_at"] > query["expires_at"]["$gt"]:
+            return doc
+        return None
+
+
+class FailingGemini(Provider):
+    name = "gemini"
+
+    async def evaluate(self, audio, prev_report_text, audio_sha256, filename, transcript=None):
+        raise ConnectionError("gemini down")
+
+
+def _evaluate_and_cache(providers):
+    cache = ReportCache(MemoryCollection())
+
+    async def run():
+        router = ProviderRouter(providers, hedge=False)
+        result = await router.evaluate(PreparedAudio(b"audio", "audio/ogg", ".ogg"), "")
+        stored = await cache.put("sha", "gemini-v1", "", result.report.model_dump(), provider=result.provider)
+        return result, stored, await cache.get("sha", "gemini-v1", "")
+
+    return cache, asyncio.run(run())
+
+
+def test_failover_report_is_not_cached_under_gemini_key():
+    cache, (result, stored, cached) = _evaluate_and_cache([FailingGemini(), FakeProvider(latency_sec=0)])
+
+    assert result.provider == "fake"
+    assert stored is False
+    assert cached is None
+    assert cache.skipped_provider == 1
+
+
+def test_gemini_report_is_cached():
+    gemini = FakeProvider(latency_sec=0)
+    gemini.name = "gemini"
+    cache, (result, stored, cached) = _evaluate_and_cache([gemini])
+
+    assert result.provider == "gemini"
+    assert stored is True
+    assert cached == result.report.model_dump()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import stt
+import core.audio
+
+
+def test_async_transcribe_splits_long_bytes_input(monkeypatch):
+    data = b"\x00fake-m4a" * 1024
+    seen = {}
+
+    def fake_chunked(path, expected_speakers=2):
+        with open(path, "rb") as f:
+            seen["data"] = f.read()
+        seen["path"] = str(path)
+        return [{"speaker": "speech1", "text": "안녕하세요", "start": 0.0, "end": 1.0}]
+
+    def no_single_request():
+        raise AssertionError("긴 bytes 입력이 단일 요청 경로로 감")
+
+    monkeypatch.setattr(core.audio, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(core.audio, "probe_duration", lambda path: stt.STT_CHUNK_MIN_SEC + 60)
+    monkeypatch.setattr(stt, "transcribe_speeches_chunked", fake_chunked)
+    monkeypatch.setattr(stt, "get_async_client", no_single_request)
+
+    turns = asyncio.run(stt.transcribe_speeches_async(data, filename="call.m4a"))
+
+    assert turns[0]["text"] == "안녕하세요"
+    assert seen["data"] == data
+    assert seen["path"].endswith(".m4a")
+    assert not os.path.exists(seen["path"])  # 임시 파일 정리
+
+
+# 단어 → 턴 병합 golden: 화자 전환, speaker_id 누락, 문장부호만 있는 토큰, spacing/빈 토큰
+MERGE_WORDS = [
+    {"text": "안녕하세요", "start": 0.0, "end": 0.5, "type": "word", "speaker_id": "speaker_0"},
+    {"text": " ", "start": 0.5, "end": 0.55, "type": "spacing", "speaker_id": "speaker_0"},
+    {"text": "고객님", "start": 0.55, "end": 1.0, "type": "word", "speaker_id": "speaker_0"},
+    {"text": ".", "start": 1.0, "end": 1.0, "type": "word", "speaker_id": "speaker_0"},
+    {"text": "네", "start": 1.2, "end": 1.4, "type": "word", "speaker_id": "speaker_1"},
+    {"text": "?", "start": None, "end": None, "type": "word", "speaker_id": "speaker_1"},
+    {"text": "누구", "start": 1.6, "end": 1.9, "type": "word", "speaker_id": None},
+    {"text": "세요", "start": 1.9, "end": None, "type": "word"},
+    {"text": "...", "start": 2.0, "end": 2.1, "type": "word", "speaker_id": "speaker_0"},
+    {"text": "", "start": 2.1, "end": 2.2, "type": "word", "speaker_id": "speaker_0"},
+    {"text": "네", "start": 2.3, "end": 2.456, "type": "word", "speaker": "speaker_1"},
+]
+
+MERGE_TURNS = [
+    {"speaker": "speech1", "text": "안녕하세요 고객님 .", "start": 0.0, "end": 1.0},
+    {"speaker": "speech2", "text": "네 ?", "start": 1.2, "end": 1.4},
+    {"speaker": "speech3", "text": "누구 세요", "start": 1.6, "end": 1.9},
+    {"speaker": "speech1", "text": "...", "start": 2.0, "end": 2.1},
+    {"speaker": "speech2", "text": "네", "start": 2.3, "end": 2.46},
+]
+
+
+@pytest.mark.parametrize("as_objects", [False, True], ids=["dict", "sdk-object"])
+def test_merge_words_matches_legacy_merge(as_objects):
+    from bench_stt_merge import legacy_merge
+
+    words = [SimpleNamespace(**w) for w in MERGE_WORDS] if as_objects else MERGE_WORDS
+    assert stt._merge_words(words) == MERGE_TURNS
+    assert legacy_merge(words) == MERGE_TURNS
+
+
+def test_merge_words_folds_extra_speakers_into_last_label():
+    words = [{"text": f"w{i}", "start": i, "end": i + 0.5, "speaker_id": f"s{i}"} for i in range(6)]
+    from bench_stt_merge import legacy_merge
+
+    turns = stt._merge_words(words)
+    assert [t["speaker"] for t in turns] == ["speech1", "speech2", "speech3", "speech4"]
+    assert turns[-1]["text"] == "w3 w4 w5"
+    assert turns == legacy_merge(words)